@@ -4,21 +4,32 @@ PersonaGym-R Green Agent for AgentBeats Platform
 This module implements an A2A-compliant green agent that orchestrates
 persona adherence testing on the AgentBeats platform.
 """
-import json
+import asyncio
 import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 import uvicorn
 
 # Import PersonaGym-R components
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
-from src.personagym_r.orchestrator import load_task, run_dialog
-from src.personagym_r.api_schema import PersonaCard, Goal, Rubric, SeedCfg, Score, TraceEvent
-from src.personagym_r.tools import io_bus
+from src.personagym_r.orchestrator import arun_dialog, load_task
+from src.personagym_r.api_schema import PersonaCard, Goal, Rubric, SeedCfg, TraceEvent
+from src.personagym_r.tools import ratelimit
+from src.personagym_r.tools.executors import executor_from_env
+from src.personagym_r.tools.metrics import CONTENT_TYPE, MetricsRegistry
+from src.personagym_r.tools.retry import RETRYABLE_STATUS, LatencyTracker, RetryPolicy, retry_after_seconds
+from src.personagym_r.tools.taskcache import get_task_cache
+from src.personagym_r.tools.timeouts import Budgets, Deadline, DeadlineExceeded, arun_within
 
 # A2A Protocol Models
 class AgentCard(BaseModel):
@@ -41,7 +52,7 @@ class TaskRequest(BaseModel):
     task_type: str
     participant_agents: List[str]  # URLs of white agents to test
     config: Dict[str, Any]  # Task-specific configuration
-    timeout_seconds: Optional[int] = 300
+    timeout_seconds: Optional[int] = 300  # Budget for the whole assessment, all participants included
 
 class TaskResponse(BaseModel):
     """Response to task assignment."""
@@ -69,75 +80,401 @@ class AssessmentResult(BaseModel):
 class StatusUpdate(BaseModel):
     """Progress update during assessment."""
     task_id: str
-    status: str  # "running", "completed", "failed"
+    status: str  # "queued", "running", "completed", "failed"
     progress_percent: int
     message: str
     results: Optional[List[AssessmentResult]] = None
+    job_id: Optional[str] = None
+    turns_completed: int = 0
+    turns_total: int = 0
+
+
+# Shared HTTP connection pool
+class HTTPClientPool:
+    """One keep-alive `httpx.AsyncClient` per white-agent host.
+    
+    Every turn of every dialog against the same host reuses the pooled
+    connections instead of opening a new client per request. The pool also
+    keeps each host's turn latencies for hedging and counts the retries
+    and hedged requests of its clients in `stats`.
+    """
+    
+    def __init__(self, timeout: float = 30.0, max_connections: int = 20, transport: Any = None):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.transport = transport
+        self.stats: Dict[str, int] = {"retries": 0, "hedges": 0, "hedge_wins": 0}
+        self._clients: Dict[str, Any] = {}
+        self._latency: Dict[str, LatencyTracker] = {}
+    
+    @staticmethod
+    def host_key(url: str) -> str:
+        """Pool key for a URL: scheme plus host and port."""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+    
+    def get(self, url: str):
+        """Return the pooled client for the host serving `url`."""
+        import httpx
+        key = self.host_key(url)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                transport=self.transport
+            )
+            self._clients[key] = client
+        return client
+    
+    def latency(self, url: str) -> LatencyTracker:
+        """Turn latencies of the host serving `url`, shared by all its dialogs."""
+        return self._latency.setdefault(self.host_key(url), LatencyTracker())
+    
+    async def aclose(self):
+        """Close all pooled clients."""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
 
 
 # A2A-Compliant White Agent Client
 class A2AWhiteAgentClient:
-    """Client for interacting with A2A-compliant white agents."""
+    """Client for interacting with A2A-compliant white agents.
     
-    def __init__(self, agent_url: str, persona: PersonaCard):
+    Requests that fail with a connection error, a timeout or a retryable
+    status (429, 5xx, ...) are retried with jittered exponential backoff
+    per `retry`. Every attempt of a request carries the same
+    `Idempotency-Key` header, for turns `<session_id>:<turn>`, so an agent
+    that honours it never applies a retried or hedged turn twice.
+    """
+    
+    def __init__(self, agent_url: str, persona: PersonaCard,
+                 pool: Optional[HTTPClientPool] = None,
+                 retry: Optional[RetryPolicy] = None):
         self.agent_url = agent_url
         self.persona = persona
         self.session_id = None
+        self.pool = pool or HTTPClientPool()
+        self.retry = retry or RetryPolicy()
+        self.turn = 0
+        self.logger = logging.getLogger("A2AWhiteAgentClient")
+    
+    async def _send(self, path: str, payload: Optional[Dict[str, Any]], key: str):
+        """One POST attempt over the pooled connection."""
+        client = self.pool.get(self.agent_url)
+        response = await client.post(f"{self.agent_url}{path}", json=payload,
+                                     headers={"Idempotency-Key": key})
+        response.raise_for_status()
+        return response
+    
+    async def _hedged(self, path: str, payload: Optional[Dict[str, Any]], key: str):
+        """One attempt, sent again if still pending after the host's p95 turn latency."""
+        tracker = self.pool.latency(self.agent_url)
+        delay = tracker.quantile(0.95) if self.retry.hedge else None
+        
+        async def timed():
+            start = time.perf_counter()
+            response = await self._send(path, payload, key)
+            tracker.observe(time.perf_counter() - start)
+            return response
         
+        tasks = [asyncio.ensure_future(timed())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.pool.stats["hedges"] += 1
+                tasks.append(asyncio.ensure_future(timed()))
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self.pool.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _post(self, path: str, payload: Optional[Dict[str, Any]] = None,
+                    key: Optional[str] = None, hedge: bool = False):
+        """POST to the white agent, retrying transient failures under one idempotency key."""
+        import httpx
+        key = key or uuid.uuid4().hex
+        for attempt in range(self.retry.retries + 1):
+            try:
+                if hedge:
+                    return await self._hedged(path, payload, key)
+                return await self._send(path, payload, key)
+            except httpx.HTTPStatusError as e:
+                if attempt == self.retry.retries or e.response.status_code not in RETRYABLE_STATUS:
+                    raise
+                delay = self.retry.delay(attempt, retry_after_seconds(e.response.headers))
+            except httpx.TransportError as e:
+                if attempt == self.retry.retries:
+                    raise
+                delay = self.retry.delay(attempt)
+            self.pool.stats["retries"] += 1
+            self.logger.warning(f"{path} on {self.agent_url} failed, retry {attempt + 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+    
     async def initialize_session(self):
         """Initialize a new session with the white agent."""
-        import httpx
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.agent_url}/a2a/session",
-                json={"persona": self.persona.model_dump()}
-            )
-            response.raise_for_status()
-            self.session_id = response.json()["session_id"]
+        response = await self._post("/a2a/session", {"persona": self.persona.model_dump()})
+        self.session_id = response.json()["session_id"]
+        self.turn = 0
     
-    def respond(self, observation: Dict[str, Any]) -> str:
-        """Get response from white agent (synchronous wrapper)."""
-        import httpx
-        with httpx.Client(timeout=30.0) as client:
-            response = client.post(
-                f"{self.agent_url}/a2a/respond",
-                json={
-                    "session_id": self.session_id,
-                    "observation": observation
-                }
-            )
-            response.raise_for_status()
-            return response.json()["response"]
+    async def respond(self, observation: Any) -> str:
+        """Get response from white agent."""
+        if hasattr(observation, "model_dump"):
+            observation = observation.model_dump()
+        self.turn = observation.get("turn", self.turn + 1) if isinstance(observation, dict) else self.turn + 1
+        response = await self._post("/a2a/respond", {
+            "session_id": self.session_id,
+            "observation": observation
+        }, key=f"{self.session_id}:{self.turn}", hedge=True)
+        return response.json()["response"]
     
-    def submit(self) -> str:
+    async def submit(self) -> str:
         """Get final submission from white agent."""
-        import httpx
-        with httpx.Client(timeout=30.0) as client:
-            response = client.post(
-                f"{self.agent_url}/a2a/submit",
-                json={"session_id": self.session_id}
-            )
-            response.raise_for_status()
-            return response.json()["final_response"]
+        response = await self._post("/a2a/submit", {"session_id": self.session_id},
+                                    key=f"{self.session_id}:submit", hedge=True)
+        return response.json()["final_response"]
     
     async def reset(self):
         """Reset the white agent for a new assessment."""
-        import httpx
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.agent_url}/a2a/reset"
-            )
-            response.raise_for_status()
+        await self._post("/a2a/reset")
+
+
+# In-process job queue for /a2a/run
+class Job:
+    """One queued assessment and its latest StatusUpdate.
+    
+    Every update bumps `version` and wakes the coroutines waiting in
+    `wait_changed`, which is how the event stream follows a job.
+    """
+    
+    def __init__(self, job_id: str, task_request: TaskRequest):
+        self.job_id = job_id
+        self.request = task_request
+        self.status = StatusUpdate(
+            task_id=task_request.task_id,
+            status="queued",
+            progress_percent=0,
+            message="Queued",
+            job_id=job_id
+        )
+        self.version = 0
+        self._changed = asyncio.Event()
+    
+    @property
+    def done(self) -> bool:
+        return self.status.status in ("completed", "failed")
+    
+    def update(self, **fields: Any) -> None:
+        """Replace fields of the status and wake waiters."""
+        self.status = self.status.model_copy(update=fields)
+        self.version += 1
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+    
+    async def wait_changed(self, version: int, timeout: Optional[float] = None) -> bool:
+        """Wait until the status moves past `version`; False on timeout."""
+        if self.version != version:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+    
+    async def wait_done(self) -> StatusUpdate:
+        """Wait for the job to complete or fail and return its final status."""
+        while not self.done:
+            await self.wait_changed(self.version)
+        return self.status
+
+class JobQueue:
+    """Bounded in-process queue of assessments run by a fixed pool of workers.
+    
+    `submit` returns at once; `workers` coroutines take jobs in order and
+    run them with `run(job)`. At most `max_pending` jobs wait in the queue,
+    and only the latest `max_finished` finished jobs are kept for lookup.
+    """
+    
+    def __init__(
+        self,
+        run: Callable[[Job], Awaitable[List[AssessmentResult]]],
+        workers: int = 2,
+        max_pending: int = 100,
+        max_finished: int = 1000
+    ):
+        self.run = run
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.logger = logging.getLogger("JobQueue")
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+    
+    def start(self) -> None:
+        """Start the workers on the running event loop (idempotent)."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.get_running_loop().create_task(self._worker())
+                       for _ in range(self.workers)]
+    
+    async def stop(self) -> None:
+        """Cancel the workers; queued and running jobs are abandoned."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def submit(self, task_request: TaskRequest) -> Job:
+        """Queue an assessment; raises `asyncio.QueueFull` when the queue is full."""
+        self.start()
+        job = Job(uuid.uuid4().hex, task_request)
+        self._queue.put_nowait(job)
+        self.jobs[job.job_id] = job
+        self._prune()
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+    
+    def counts(self) -> Dict[str, int]:
+        """Number of known jobs per status."""
+        counts = {status: 0 for status in ("queued", "running", "completed", "failed")}
+        for job in self.jobs.values():
+            counts[job.status.status] += 1
+        return counts
+    
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+    
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                job.update(status="running", message="Running")
+                results = await self.run(job)
+                job.update(
+                    status="completed",
+                    progress_percent=100,
+                    turns_completed=job.status.turns_total,
+                    message=f"Tested {len(results)} agent(s)",
+                    results=results
+                )
+            except asyncio.CancelledError:
+                job.update(status="failed", message="Assessment cancelled")
+                raise
+            except Exception as e:
+                self.logger.error(f"Job {job.job_id} failed: {e}")
+                job.update(status="failed", message=f"Assessment failed: {str(e)}")
+            finally:
+                self._queue.task_done()
+                self._prune()
+
+class _ProgressTrace(list):
+    """Trace list that reports each appended event, used as a `trace_sink`."""
+    
+    def __init__(self, on_event: Optional[Callable[[TraceEvent], None]] = None):
+        super().__init__()
+        self.on_event = on_event
+    
+    def append(self, event: TraceEvent) -> None:
+        super().append(event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+
+# Metrics served on /metrics
+metrics_registry = MetricsRegistry()
+ASSESSMENTS = metrics_registry.counter(
+    "personagym_assessments_total", "Participant assessments by outcome", ["outcome"])
+IN_FLIGHT = metrics_registry.gauge(
+    "personagym_assessments_in_flight", "Participant assessments currently running")
+ASSESSMENT_SECONDS = metrics_registry.histogram(
+    "personagym_assessment_duration_seconds", "Wall time of one participant assessment")
+WHITE_SECONDS = metrics_registry.histogram(
+    "personagym_white_turn_seconds", "White agent respond latency per turn")
+ATTACKER_SECONDS = metrics_registry.histogram(
+    "personagym_attacker_call_seconds", "Attacker message generation latency per turn")
+BREAKS = metrics_registry.counter(
+    "personagym_breaks_total", "Persona breaks detected", ["level", "code"])
+
+# Export zeros before the first assessment so alerts have a series to watch
+IN_FLIGHT.inc(0)
+for _outcome in ("success", "timeout", "error"):
+    ASSESSMENTS.inc(0, outcome=_outcome)
+
+def _task_cache_lookups() -> Dict[tuple, float]:
+    stats = get_task_cache().stats()
+    return {(result,): stats[key] for result, key in
+            (("hit", "hits"), ("pack_hit", "pack_hits"), ("miss", "misses"))}
+
+def _task_cache_hit_ratio() -> Dict[tuple, float]:
+    stats = get_task_cache().stats()
+    total = stats["hits"] + stats["pack_hits"] + stats["misses"]
+    return {(): stats["hits"] / total if total else 0.0}
+
+metrics_registry.callback("personagym_task_cache_lookups_total", "Task loads by cache result",
+                 _task_cache_lookups, ["result"], kind="counter")
+metrics_registry.callback("personagym_task_cache_hit_ratio", "Share of task loads served from memory",
+                 _task_cache_hit_ratio)
+
+# Grading runs in worker threads and processes so the event loop stays responsive
+grading_executor = executor_from_env()
+metrics_registry.callback("personagym_grading_calls_total", "Turns graded off the event loop by pool",
+                 lambda: {(pool,): n for pool, n in grading_executor.calls.items()}, ["pool"], kind="counter")
+
+metrics_registry.callback("personagym_white_retries_total", "White agent requests retried after a transient failure",
+                 lambda: {(): green_agent.http_pool.stats["retries"]}, kind="counter")
+metrics_registry.callback("personagym_white_hedges_total", "Duplicate white agent turn requests sent past the p95 latency",
+                 lambda: {(): green_agent.http_pool.stats["hedges"]}, kind="counter")
+metrics_registry.callback("personagym_white_hedge_wins_total", "Hedged turns answered first by the duplicate",
+                 lambda: {(): green_agent.http_pool.stats["hedge_wins"]}, kind="counter")
+
+# Model provider calls (attacker, hosted white agents) queue in shared rate limiters
+metrics_registry.register(ratelimit.QUEUE_WAIT_SECONDS)
+metrics_registry.register(ratelimit.THROTTLED)
+
+def _observe_turn(evt: TraceEvent) -> None:
+    """Record a turn's latencies and break as soon as it is traced.
+    
+    Dialogs that later fail or time out still contribute their turns.
+    """
+    timings = evt.timings or {}
+    if "white" in timings:
+        WHITE_SECONDS.observe(timings["white"])
+    if "attacker" in timings:
+        ATTACKER_SECONDS.observe(timings["attacker"])
+    if evt.break_signal:
+        BREAKS.inc(level=str(evt.break_signal.get("level")), code=str(evt.break_signal.get("code")))
 
 
 # Green Agent Implementation
 class PersonaGymGreenAgent:
     """Green agent orchestrating PersonaGym-R evaluations."""
     
-    def __init__(self, tasks_dir: str = "tasks"):
+    def __init__(self, tasks_dir: str = "tasks", max_concurrency: int = 3):
         self.tasks_dir = Path(tasks_dir)
         self.active_tasks: Dict[str, Dict] = {}
         self.logger = logging.getLogger("PersonaGymGreenAgent")
+        self.max_concurrency = max_concurrency
+        self.http_pool = HTTPClientPool()
+        self.retry_policy = RetryPolicy.from_env()
         
     def get_agent_card(self) -> AgentCard:
         """Return agent card per A2A protocol."""
@@ -189,9 +526,26 @@ class PersonaGymGreenAgent:
             message=f"Will test {len(task_request.participant_agents)} agent(s)"
         )
     
-    async def run_assessment(self, task_request: TaskRequest) -> List[AssessmentResult]:
-        """Run the assessment on participant agents."""
-        results = []
+    async def run_assessment(
+        self,
+        task_request: TaskRequest,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> List[AssessmentResult]:
+        """Run the assessment on all participant agents concurrently.
+        
+        At most `config["max_concurrency"]` (default: the agent's
+        `max_concurrency`) dialogs run at once; results keep the order of
+        `participant_agents`. `progress(turns_completed, turns_total)` is
+        called after every turn of every dialog; a dialog that ends early
+        counts its remaining turns as completed.
+        
+        `timeout_seconds` bounds the whole assessment, and
+        `config["white_timeout_seconds"]` / `config["attacker_timeout_seconds"]`
+        bound each turn (defaults from `Budgets.from_env()`). When a budget
+        runs out the outstanding calls are cancelled and, per
+        `config["on_timeout"]`, the turns played so far are scored ("score")
+        or the participant fails ("fail").
+        """
         task_path = self.tasks_dir / task_request.task_id
         
         # Load task configuration
@@ -201,83 +555,148 @@ class PersonaGymGreenAgent:
         if "seed" in task_request.config:
             seed.rng_seed = task_request.config["seed"]
         
-        # Test each participant agent
-        for agent_url in task_request.participant_agents:
-            start_time = datetime.now()
-            
-            try:
-                # Create A2A client for the white agent
-                white_agent = A2AWhiteAgentClient(agent_url, persona_data)
-                
-                # Reset the agent before testing
-                await white_agent.reset()
-                
-                # Initialize session
-                await white_agent.initialize_session()
-                
-                # Run the dialog evaluation
-                score, trace = run_dialog(white_agent, persona_data, goal, rubric, seed)
-                
-                # Convert to AgentBeats metrics
-                metrics = [
-                    MetricResult(
-                        name="persona_adherence",
-                        value=score.P,
-                        description="How well the agent maintained the persona"
-                    ),
-                    MetricResult(
-                        name="break_resistance",
-                        value=score.B,
-                        description="Resistance to adversarial attacks"
-                    ),
-                    MetricResult(
-                        name="safety",
-                        value=score.S,
-                        description="Safety score (PII, harmful content)"
-                    ),
-                    MetricResult(
-                        name="efficiency",
-                        value=score.E,
-                        description="Task completion efficiency"
-                    ),
-                    MetricResult(
-                        name="overall_score",
-                        value=score.R,
-                        description="Weighted overall rating (PBSE)"
+        budgets = Budgets.from_env(
+            white_s=task_request.config.get("white_timeout_seconds"),
+            attacker_s=task_request.config.get("attacker_timeout_seconds"),
+            total_s=task_request.timeout_seconds,
+            on_timeout=task_request.config.get("on_timeout")
+        )
+        deadline = Deadline(budgets.total_s)
+        
+        limit = int(task_request.config.get("max_concurrency", self.max_concurrency))
+        semaphore = asyncio.Semaphore(max(1, limit))
+        completed = [0] * len(task_request.participant_agents)
+        total = goal.horizon * len(completed)
+        
+        def advance(i: int, turns: int) -> None:
+            completed[i] = turns
+            if progress is not None:
+                progress(sum(completed), total)
+        
+        async def assess(i: int, agent_url: str) -> AssessmentResult:
+            async with semaphore:
+                try:
+                    return await self._assess_participant(
+                        agent_url, task_request, persona_data, goal, rubric, seed,
+                        on_turn=lambda evt: advance(i, evt.turn), budgets=budgets, deadline=deadline
                     )
-                ]
-                
-                execution_time = (datetime.now() - start_time).total_seconds()
-                
-                results.append(AssessmentResult(
-                    agent_url=agent_url,
-                    task_id=task_request.task_id,
-                    metrics=metrics,
-                    success=True,
-                    execution_time_seconds=execution_time,
-                    metadata={
-                        "turns": score.turns,
-                        "broke": score.broke,
-                        "break_severity": score.break_severity,
-                        "break_turn": score.break_turn,
-                        "reason": score.reason
-                    }
-                ))
-                
-            except Exception as e:
-                self.logger.error(f"Error testing agent {agent_url}: {e}")
-                execution_time = (datetime.now() - start_time).total_seconds()
-                
-                results.append(AssessmentResult(
-                    agent_url=agent_url,
-                    task_id=task_request.task_id,
-                    metrics=[],
-                    success=False,
-                    error_message=str(e),
-                    execution_time_seconds=execution_time
-                ))
+                finally:
+                    advance(i, goal.horizon)
+        
+        return list(await asyncio.gather(
+            *(assess(i, agent_url) for i, agent_url in enumerate(task_request.participant_agents))
+        ))
+    
+    async def _assess_participant(
+        self,
+        agent_url: str,
+        task_request: TaskRequest,
+        persona_data: PersonaCard,
+        goal: Goal,
+        rubric: Rubric,
+        seed: SeedCfg,
+        on_turn: Optional[Callable[[TraceEvent], None]] = None,
+        budgets: Optional[Budgets] = None,
+        deadline: Optional[Deadline] = None
+    ) -> AssessmentResult:
+        """Run one dialog against a participant agent, reporting each turn to `on_turn`.
         
-        return results
+        Setup calls count against the white agent's per-call budget and the
+        assessment `deadline` as well as the dialog itself.
+        """
+        budgets = budgets or Budgets()
+        start_time = datetime.now()
+        IN_FLIGHT.inc()
+        
+        try:
+            # Create A2A client for the white agent
+            white_agent = A2AWhiteAgentClient(agent_url, persona_data, pool=self.http_pool,
+                                              retry=self.retry_policy)
+            
+            # Reset the agent before testing
+            await arun_within(white_agent.reset, seconds=budgets.white_s, phase="white", deadline=deadline)
+            
+            # Initialize session
+            await arun_within(white_agent.initialize_session, seconds=budgets.white_s, phase="white",
+                              deadline=deadline)
+            
+            # Record each turn's metrics as it happens, so failed dialogs count too
+            def on_event(evt: TraceEvent) -> None:
+                _observe_turn(evt)
+                if on_turn is not None:
+                    on_turn(evt)
+            
+            # Run the dialog evaluation
+            trace = _ProgressTrace(on_event)
+            score, _ = await arun_dialog(white_agent, persona_data, goal, rubric, seed,
+                                         trace_sink=trace, executor=grading_executor,
+                                         budgets=budgets, deadline=deadline)
+            
+            # Convert to AgentBeats metrics
+            metrics = [
+                MetricResult(
+                    name="persona_adherence",
+                    value=score.P,
+                    description="How well the agent maintained the persona"
+                ),
+                MetricResult(
+                    name="break_resistance",
+                    value=score.B,
+                    description="Resistance to adversarial attacks"
+                ),
+                MetricResult(
+                    name="safety",
+                    value=score.S,
+                    description="Safety score (PII, harmful content)"
+                ),
+                MetricResult(
+                    name="efficiency",
+                    value=score.E,
+                    description="Task completion efficiency"
+                ),
+                MetricResult(
+                    name="overall_score",
+                    value=score.R,
+                    description="Weighted overall rating (PBSE)"
+                )
+            ]
+            
+            execution_time = (datetime.now() - start_time).total_seconds()
+            ASSESSMENTS.inc(outcome="timeout" if score.timed_out else "success")
+            ASSESSMENT_SECONDS.observe(execution_time)
+            
+            return AssessmentResult(
+                agent_url=agent_url,
+                task_id=task_request.task_id,
+                metrics=metrics,
+                success=True,
+                execution_time_seconds=execution_time,
+                metadata={
+                    "turns": score.turns,
+                    "broke": score.broke,
+                    "break_severity": score.break_severity,
+                    "break_turn": score.break_turn,
+                    "reason": score.reason,
+                    "timed_out": score.timed_out
+                }
+            )
+            
+        except Exception as e:
+            self.logger.error(f"Error testing agent {agent_url}: {e}")
+            execution_time = (datetime.now() - start_time).total_seconds()
+            ASSESSMENTS.inc(outcome="timeout" if isinstance(e, DeadlineExceeded) else "error")
+            ASSESSMENT_SECONDS.observe(execution_time)
+            
+            return AssessmentResult(
+                agent_url=agent_url,
+                task_id=task_request.task_id,
+                metrics=[],
+                success=False,
+                error_message=str(e),
+                execution_time_seconds=execution_time
+            )
+        finally:
+            IN_FLIGHT.dec()
 
 
 # FastAPI Application
@@ -288,7 +707,57 @@ app = FastAPI(
 )
 
 # Initialize green agent
-green_agent = PersonaGymGreenAgent(tasks_dir="tasks")
+green_agent = PersonaGymGreenAgent(
+    tasks_dir="tasks",
+    max_concurrency=int(os.getenv("PERSONAGYM_MAX_CONCURRENCY", "3"))
+)
+
+async def _run_job(job: Job) -> List[AssessmentResult]:
+    """Run a queued assessment, publishing per-turn progress on the job."""
+    def progress(turns: int, total: int) -> None:
+        job.update(
+            progress_percent=min(99, turns * 100 // total) if total else 0,
+            turns_completed=turns,
+            turns_total=total,
+            message=f"{turns}/{total} turns across {len(job.request.participant_agents)} agent(s)"
+        )
+    return await green_agent.run_assessment(job.request, progress)
+
+job_queue = JobQueue(
+    _run_job,
+    workers=int(os.getenv("PERSONAGYM_JOB_WORKERS", "2")),
+    max_pending=int(os.getenv("PERSONAGYM_JOB_QUEUE_SIZE", "100"))
+)
+metrics_registry.callback("personagym_jobs", "Known /a2a/run jobs by status",
+                 lambda: {(status,): n for status, n in job_queue.counts().items()}, ["status"])
+
+# Seconds between keep-alive comments on idle event streams
+SSE_KEEPALIVE_SECONDS = 15.0
+
+@app.on_event("startup")
+async def warm_model_registry():
+    """Preload local models listed in PERSONAGYM_WARM_MODELS (comma-separated)."""
+    names = [n.strip() for n in os.getenv("PERSONAGYM_WARM_MODELS", "").split(",") if n.strip()]
+    if not names:
+        return
+    from src.personagym_r.baselines.model_registry import warm_models
+    try:
+        await asyncio.to_thread(warm_models, names)
+        green_agent.logger.info(f"Warmed models: {', '.join(names)}")
+    except Exception as e:
+        green_agent.logger.warning(f"Could not warm models {names}: {e}")
+
+@app.on_event("startup")
+async def start_job_queue():
+    """Start the assessment workers."""
+    job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    """Stop the assessment and grading workers and close pooled white-agent connections."""
+    await job_queue.stop()
+    grading_executor.shutdown(wait=False)
+    await green_agent.http_pool.aclose()
 
 @app.get("/a2a/card")
 async def get_card():
@@ -306,8 +775,12 @@ async def accept_task(task_request: TaskRequest) -> TaskResponse:
     return await green_agent.accept_task(task_request)
 
 @app.post("/a2a/run")
-async def run_task(task_request: TaskRequest) -> StatusUpdate:
-    """Execute an assessment task."""
+async def run_task(task_request: TaskRequest, wait: bool = False) -> StatusUpdate:
+    """Queue an assessment task and return its job status.
+    
+    Follow the job at `/a2a/jobs/{job_id}` or `/a2a/jobs/{job_id}/events`.
+    With `?wait=true` the request blocks until the job finishes instead.
+    """
     # First accept the task
     acceptance = await green_agent.accept_task(task_request)
     
@@ -319,24 +792,50 @@ async def run_task(task_request: TaskRequest) -> StatusUpdate:
             message=acceptance.message or "Task rejected"
         )
     
-    # Run the assessment
     try:
-        results = await green_agent.run_assessment(task_request)
-        
-        return StatusUpdate(
-            task_id=task_request.task_id,
-            status="completed",
-            progress_percent=100,
-            message=f"Tested {len(results)} agent(s)",
-            results=results
-        )
-    except Exception as e:
-        return StatusUpdate(
-            task_id=task_request.task_id,
-            status="failed",
-            progress_percent=0,
-            message=f"Assessment failed: {str(e)}"
-        )
+        job = job_queue.submit(task_request)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Job queue is full, retry later",
+                            headers={"Retry-After": "30"})
+    
+    if wait:
+        return await job.wait_done()
+    return job.status
+
+def _get_job(job_id: str) -> Job:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@app.get("/a2a/jobs/{job_id}")
+async def get_job(job_id: str) -> StatusUpdate:
+    """Current status of a queued assessment, with results once completed."""
+    return _get_job(job_id).status
+
+@app.get("/a2a/jobs/{job_id}/events")
+async def stream_job(job_id: str) -> StreamingResponse:
+    """Server-sent events: one `status` event per update until the job finishes."""
+    job = _get_job(job_id)
+    
+    async def events():
+        version = None
+        while True:
+            if job.version != version:
+                version = job.version
+                yield f"event: status\ndata: {job.status.model_dump_json()}\n\n"
+                if job.done:
+                    return
+            if not await job.wait_changed(version, SSE_KEEPALIVE_SECONDS):
+                yield ": keepalive\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/metrics")
+async def metrics_endpoint() -> Response:
+    """Prometheus text exposition of assessment, latency and cache metrics."""
+    return Response(content=metrics_registry.render(), media_type=CONTENT_TYPE)
 
 @app.get("/health")
 async def health_check():
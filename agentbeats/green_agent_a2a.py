@@ -12,10 +12,12 @@ from datetime import datetime
 from a2a import A2AServer, Message, Part, TextPart, Role
 
 # Import PersonaGym-R components
-from src.personagym_r.orchestrator import load_task
-from src.personagym_r.api_schema import PersonaCard, Observation
-from src.personagym_r.attacker.policy import AttackPolicy
-from src.personagym_r.graders import breakdetect, compose, efficiency, persona, safety
+from src.personagym_r.orchestrator import load_task, make_attacker
+from src.personagym_r.api_schema import PersonaCard
+from src.personagym_r.graders import compose
+from src.personagym_r.graders import turn as turn_grading
+from src.personagym_r.tools.executors import GradingExecutor, executor_from_env
+from src.personagym_r.tools.timeouts import Budgets, Deadline, DeadlineExceeded, arun_within
 
 logger = logging.getLogger(__name__)
 
@@ -32,15 +34,18 @@ class PersonaGymGreenAgent:
     5. Returns assessment results
     """
     
-    def __init__(self, tasks_dir: str = "tasks"):
+    def __init__(self, tasks_dir: str = "tasks", executor: Optional[GradingExecutor] = None):
         self.tasks_dir = Path(tasks_dir)
         self.logger = logging.getLogger("PersonaGymGreenAgent")
+        # Grading runs in worker threads and processes so the event loop stays responsive
+        self.executor = executor or executor_from_env()
         
     async def assess_agent(
         self,
         white_agent_url: str,
         task_id: str,
-        seed: Optional[int] = None
+        seed: Optional[int] = None,
+        budgets: Optional[Budgets] = None
     ) -> Dict[str, Any]:
         """
         Assess a white agent on a specific task.
@@ -49,6 +54,8 @@ class PersonaGymGreenAgent:
             white_agent_url: URL of the white agent to test
             task_id: Task identifier (e.g., 'travel_yosemite_001')
             seed: Optional RNG seed for reproducibility
+            budgets: Time limits per white message, per attack message and
+                for the whole assessment (default: `Budgets.from_env()`)
             
         Returns:
             Assessment results with PBSE metrics
@@ -65,8 +72,12 @@ class PersonaGymGreenAgent:
         if seed is not None:
             seed_cfg.rng_seed = seed
         
+        budgets = budgets or Budgets.from_env()
+        deadline = Deadline(budgets.total_s)
+        
         # Initialize attacker
-        attacker = AttackPolicy(seed_cfg.attack_set, seed_cfg.rng_seed)
+        attacker = make_attacker(seed_cfg)
+        spec = turn_grading.grading_spec(persona_data, rubric)
         
         # Create A2A client for white agent
         from a2a import A2AClient
@@ -77,63 +88,68 @@ class PersonaGymGreenAgent:
         
         # Send initial persona assignment
         persona_msg = self._create_persona_message(persona_data)
-        await white_agent.send_message(
+        await arun_within(
+            white_agent.send_message,
             Message(
                 context_id=context_id,
                 role=Role.agent,
                 parts=[Part(root=TextPart(text=persona_msg))]
-            )
+            ),
+            seconds=budgets.white_s, phase="white", deadline=deadline
         )
         
         # Conduct dialog
         history: List[Dict[str, str]] = []
         break_signal = None
+        scorer = compose.ScoreAccumulator(persona_data, rubric, goal.horizon)
+        timed_out: Optional[DeadlineExceeded] = None
         
-        for turn in range(1, goal.horizon + 1):
-            # Get attack message
-            attack_msg = attacker.next_message(history, persona_data)
-            
-            # Send to white agent
-            response = await white_agent.send_message(
-                Message(
-                    context_id=context_id,
-                    role=Role.user,
-                    parts=[Part(root=TextPart(text=attack_msg))]
+        try:
+            for turn in range(1, goal.horizon + 1):
+                # Get attack message
+                attack_msg = await arun_within(attacker.next_message, history, persona_data,
+                                               seconds=budgets.attacker_s, phase="attacker", deadline=deadline)
+                
+                # Send to white agent
+                response = await arun_within(
+                    white_agent.send_message,
+                    Message(
+                        context_id=context_id,
+                        role=Role.user,
+                        parts=[Part(root=TextPart(text=attack_msg))]
+                    ),
+                    seconds=budgets.white_s, phase="white", deadline=deadline
                 )
-            )
-            
-            # Extract white agent response
-            white_msg = self._extract_text(response)
-            
-            # Update history
-            history.append({
-                "attacker": attack_msg,
-                "white": white_msg
-            })
-            
-            # Check for breaks
-            break_signal = breakdetect.scan(white_msg, persona_data, history)
-            
-            if break_signal:
-                self.logger.info(f"Break detected at turn {turn}: {break_signal}")
-                break
+                
+                # Extract white agent response
+                white_msg = self._extract_text(response)
+                
+                # Update history
+                history.append({
+                    "attacker": attack_msg,
+                    "white": white_msg
+                })
+                
+                # Check for breaks and grade the reply off the event loop
+                graded = await self.executor.run(turn_grading.grade_turn, spec, white_msg, scorer.safety,
+                                                 size=len(white_msg))
+                break_signal = graded.break_signal
+                scorer.add_graded(graded.partials, break_signal, graded.safety)
+                attacker.index_reply(history, graded.reply_features)
+                
+                if break_signal:
+                    self.logger.info(f"Break detected at turn {turn}: {break_signal}")
+                    break
+        except DeadlineExceeded as e:
+            if budgets.on_timeout == "fail":
+                raise
+            self.logger.warning(f"Assessment of {white_agent_url} stopped early: {e}")
+            timed_out = e
         
         # Compute scores
-        persona_scores = persona.check_persona_adherence(
-            white_msg if history else "",
-            persona_data,
-            rubric
-        )
-        
-        safety_score = safety.score_safety(history)
-        
-        final_score = compose.final_score(
-            persona_scores,
-            break_signal,
-            safety_score,
-            len(history),
-            goal.horizon
-        )
+        final_score = scorer.score()
+        if timed_out is not None:
+            final_score = final_score.model_copy(update={"timed_out": True, "reason": f"Timed out: {timed_out}"})
         
         # Prepare results
         results = {
@@ -152,7 +168,9 @@ class PersonaGymGreenAgent:
                 "broke": final_score.broke,
                 "break_severity": final_score.break_severity,
                 "break_turn": final_score.break_turn,
-                "reason": final_score.reason
+                "reason": final_score.reason,
+                "timed_out": final_score.timed_out,
+                "score_curve": scorer.curve
             }
         }
         
@@ -230,12 +248,19 @@ async def main():
         logger.info(f"Received assessment request: {text[:100]}...")
         
         # Parse assessment request
-        # Expected format: JSON with white_agent_url, task_id, optional seed
+        # Expected format: JSON with white_agent_url, task_id, optional seed and
+        # optional timeout_seconds, white_timeout_seconds, attacker_timeout_seconds, on_timeout
         try:
             request = json.loads(text)
             white_agent_url = request.get('white_agent_url')
             task_id = request.get('task_id', 'travel_yosemite_001')
             seed = request.get('seed')
+            budgets = Budgets.from_env(
+                white_s=request.get('white_timeout_seconds'),
+                attacker_s=request.get('attacker_timeout_seconds'),
+                total_s=request.get('timeout_seconds'),
+                on_timeout=request.get('on_timeout')
+            )
             
             if not white_agent_url:
                 raise ValueError("white_agent_url is required")
@@ -244,7 +269,8 @@ async def main():
             results = await green_agent.assess_agent(
                 white_agent_url=white_agent_url,
                 task_id=task_id,
-                seed=seed
+                seed=seed,
+                budgets=budgets
             )
             
             # Format response
@@ -288,7 +314,10 @@ Full results (JSON):
     
     # Start server
     logger.info(f"Starting PersonaGym-R Green Agent on {host}:{port}")
-    await server.start(host=host, port=port)
+    try:
+        await server.start(host=host, port=port)
+    finally:
+        green_agent.executor.shutdown(wait=False)
 
 
 if __name__ == "__main__":
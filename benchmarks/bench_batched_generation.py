@@ -0,0 +1,56 @@
+"""
+Benchmark: one LocalModelAgent per dialog vs a shared BatchGenerationService.
+
+Runs the same seeds of a task with the `llm` agent twice: looping over
+dialogs one after another, then as concurrent dialogs whose generation
+steps are batched through one model. Requires torch and transformers.
+
+Usage:
+    python benchmarks/bench_batched_generation.py [--task tasks/travel_yosemite_001] [--seeds 32]
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.personagym_r.baselines.local_model_agent import BatchGenerationService, LocalModelAgent
+from src.personagym_r.baselines.registry import LOCAL_MODEL_NAME
+from src.personagym_r.orchestrator import load_task, run_dialog
+
+def run_seed(task: str, seed: int, agent_factory) -> float:
+    """Play one dialog and return its overall score."""
+    persona_data, goal, rubric, seed_cfg = load_task(task)
+    seed_cfg = seed_cfg.model_copy(update={"rng_seed": seed})
+    score, _ = run_dialog(agent_factory(persona_data), persona_data, goal, rubric, seed_cfg)
+    return score.R
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--task", default="tasks/travel_yosemite_001", help="Task directory")
+    parser.add_argument("--seeds", type=int, default=32, help="Number of dialogs")
+    parser.add_argument("--model", default=LOCAL_MODEL_NAME, help="Hugging Face model name")
+    args = parser.parse_args()
+    seeds = range(args.seeds)
+
+    start = time.perf_counter()
+    looped = [run_seed(args.task, s, lambda p: LocalModelAgent(p, model_name=args.model)) for s in seeds]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    service = BatchGenerationService(args.model, max_batch_size=args.seeds)
+    factory = lambda p: LocalModelAgent(p, service=service)
+    with ThreadPoolExecutor(max_workers=args.seeds) as pool:
+        batched = list(pool.map(lambda s: run_seed(args.task, s, factory), seeds))
+    service.close()
+    batch_time = time.perf_counter() - start
+
+    agree = sum(abs(a - b) < 1e-9 for a, b in zip(looped, batched))
+    print(f"{'mode':>8} {'seconds':>10}")
+    print(f"{'loop':>8} {loop_time:>10.2f}")
+    print(f"{'batched':>8} {batch_time:>10.2f}")
+    print(f"speedup {loop_time / batch_time:.2f}x, identical scores {agree}/{args.seeds}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Microbenchmark: breakdetect.scan vs the precompiled BreakDetector.
+
+Measures replies-per-second on synthetic replies of increasing length,
+checking that both engines agree on every reply first.
+
+Usage:
+    python benchmarks/bench_breakdetect.py [--task tasks/travel_yosemite_001]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.personagym_r.api_schema import PersonaCard
+from src.personagym_r.graders import breakdetect
+
+FILLER = (
+    "Yosemite in late spring is wonderful, the waterfalls are at their peak and "
+    "the valley trails are mostly open. I would book lodging early and plan "
+    "for cool evenings. "
+)
+
+def make_reply(length: int, rng: random.Random, tail: str = "") -> str:
+    """Build a persona-safe reply of roughly `length` characters."""
+    words = FILLER.split()
+    out = []
+    size = 0
+    while size < length:
+        word = rng.choice(words)
+        out.append(word)
+        size += len(word) + 1
+    return " ".join(out)[:length] + tail
+
+def replies_per_second(fn, replies, min_time: float = 0.5) -> float:
+    """Call `fn` on each reply repeatedly for at least `min_time` seconds."""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        for reply in replies:
+            fn(reply)
+        calls += len(replies)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls / elapsed
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--task", default="tasks/travel_yosemite_001", help="Task directory for the persona")
+    parser.add_argument("--sizes", default="100,1000,10000,100000", help="Comma-separated reply lengths")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds per measurement")
+    args = parser.parse_args()
+
+    persona = PersonaCard.model_validate_json((Path(args.task) / "persona.json").read_text())
+    detector = breakdetect.BreakDetector(persona)
+    rng = random.Random(0)
+
+    print(f"{'chars':>8} {'scan r/s':>12} {'detector r/s':>14} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        # Mostly clean replies, plus ones that end in an L2 or L3 break
+        replies = [make_reply(size, rng) for _ in range(6)]
+        replies.append(make_reply(size, rng, " As an AI I cannot say."))
+        replies.append(make_reply(size, rng, " My training data ends here."))
+
+        for reply in replies:
+            assert detector.scan(reply, []) == breakdetect.scan(reply, persona, []), "engines disagree"
+
+        before = replies_per_second(lambda r: breakdetect.scan(r, persona, []), replies, args.min_time)
+        after = replies_per_second(lambda r: detector.scan(r, []), replies, args.min_time)
+        print(f"{size:>8} {before:>12.1f} {after:>14.1f} {after / before:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
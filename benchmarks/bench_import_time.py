@@ -0,0 +1,76 @@
+"""
+Benchmark: startup cost of the CLI and green agent with template white agents.
+
+Imports each entry point in a fresh interpreter, builds the `prompt` and
+`tool` agents, and reports the median wall time. Exits non-zero if the
+median exceeds the budget or if a model library (torch, transformers,
+anthropic, openai) was imported along the way.
+
+Usage:
+    python benchmarks/bench_import_time.py [--budget-ms 1500] [--runs 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+HEAVY_MODULES = ["torch", "transformers", "anthropic", "openai"]
+
+TARGETS = {
+    "cli": "import src.personagym_r.run_green",
+    "green_agent": "import agentbeats.green_agent",
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{import_line}
+from src.personagym_r.orchestrator import load_task, make_white
+persona = load_task({task!r})[0]
+for name in ("prompt", "tool"):
+    make_white(name, persona)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure(import_line: str, task: str) -> dict:
+    """Run one probe in a fresh interpreter and return its timing report."""
+    code = PROBE.format(import_line=import_line, task=task, heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--task", default="tasks/travel_yosemite_001", help="Task directory for the persona")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Maximum median startup time")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'target':>12} {'median ms':>10} {'max ms':>8}  heavy imports")
+    for name, import_line in TARGETS.items():
+        try:
+            reports = [measure(import_line, args.task) for _ in range(args.runs)]
+        except subprocess.CalledProcessError as e:
+            print(f"{name:>12} failed to import:\n{e.stderr}")
+            failed = True
+            continue
+        times = [r["ms"] for r in reports]
+        heavy = sorted({m for r in reports for m in r["heavy"]})
+        median = statistics.median(times)
+        print(f"{name:>12} {median:>10.1f} {max(times):>8.1f}  {', '.join(heavy) or '-'}")
+        if heavy or median > args.budget_ms:
+            failed = True
+
+    if failed:
+        print(f"FAIL: startup over {args.budget_ms:.0f} ms or model libraries imported")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark: per-turn latency of LocalModelAgent with and without KV reuse.
+
+Plays the same dialog twice with the local model, once re-encoding the
+whole prompt every turn and once reusing the previous turn's past
+key/values, and prints each turn's prompt length and generation time.
+Requires torch and transformers.
+
+Usage:
+    python benchmarks/bench_kv_reuse.py [--task tasks/travel_yosemite_001] [--turns 8]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.personagym_r.api_schema import Observation
+from src.personagym_r.attacker.policy import AttackPolicy
+from src.personagym_r.baselines.local_model_agent import LocalModelAgent
+from src.personagym_r.baselines.registry import LOCAL_MODEL_NAME
+from src.personagym_r.orchestrator import load_task
+
+def play(agent: LocalModelAgent, task: str, turns: int):
+    """Yield (prompt tokens, seconds) for each turn of one dialog."""
+    persona_data, goal, _, seed = load_task(task)
+    attacker = AttackPolicy(seed.attack_set, seed.rng_seed)
+    history = []
+    for turn in range(1, turns + 1):
+        attack_msg = attacker.next_message(history, persona_data)
+        obs = Observation(turn=turn, attacker_msg=attack_msg, persona=persona_data,
+                          history_tail=history, limits={"max_turns": goal.horizon})
+        prompt = agent._build_prompt(obs)
+        start = time.perf_counter()
+        reply = agent._generate(prompt)
+        elapsed = time.perf_counter() - start
+        history.append({"attacker": attack_msg, "white": reply})
+        yield len(agent.tokenizer(prompt)["input_ids"]), elapsed, reply
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--task", default="tasks/travel_yosemite_001", help="Task directory")
+    parser.add_argument("--turns", type=int, default=8, help="Dialog turns")
+    parser.add_argument("--model", default=LOCAL_MODEL_NAME, help="Hugging Face model name")
+    args = parser.parse_args()
+
+    persona_data = load_task(args.task)[0]
+    full = list(play(LocalModelAgent(persona_data, args.model, reuse_kv=False), args.task, args.turns))
+    reuse = list(play(LocalModelAgent(persona_data, args.model, reuse_kv=True), args.task, args.turns))
+
+    print(f"{'turn':>4} {'tokens':>7} {'full s':>8} {'reuse s':>8} {'same':>5}")
+    for turn, ((tokens, t_full, r_full), (_, t_reuse, r_reuse)) in enumerate(zip(full, reuse), 1):
+        print(f"{turn:>4} {tokens:>7} {t_full:>8.3f} {t_reuse:>8.3f} {str(r_full == r_reuse):>5}")
+    total_full = sum(t for _, t, _ in full)
+    total_reuse = sum(t for _, t, _ in reuse)
+    print(f"total {total_full:.2f}s -> {total_reuse:.2f}s ({total_full / total_reuse:.2f}x)")
+
+if __name__ == "__main__":
+    main()
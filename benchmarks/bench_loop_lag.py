@@ -0,0 +1,115 @@
+"""
+Benchmark: event-loop lag while many dialogs are being graded.
+
+Runs concurrent `arun_dialog` calls against an async white agent that
+returns long synthetic replies, once grading on the loop and once per
+grading executor, while a ticker coroutine measures how late it wakes up.
+Lag is what every other request on the server (including `/health`)
+waits. Exits non-zero if the process executor's p99 lag exceeds the
+budget.
+
+Usage:
+    python benchmarks/bench_loop_lag.py [--dialogs 16] [--chars 20000] [--budget-ms 5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.personagym_r.orchestrator import arun_dialog, load_task
+from src.personagym_r.tools.executors import GradingExecutor
+from bench_breakdetect import make_reply
+
+TICK_S = 0.001
+
+class SyntheticWhite:
+    """Async white agent that answers instantly with long, pre-built replies."""
+    def __init__(self, replies: List[str], seed: int):
+        self.replies = replies
+        self.rng = random.Random(seed)
+
+    async def respond(self, observation) -> str:
+        return self.rng.choice(self.replies)
+
+    async def submit(self) -> str:
+        return "Thanks, goodbye!"
+
+async def ticker(lags: List[float], stop: asyncio.Event) -> None:
+    """Sleep TICK_S at a time and record how late each wake-up was."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_S)
+        lags.append(time.perf_counter() - start - TICK_S)
+
+async def measure(task: str, dialogs: int, chars: int, horizon: int,
+                  executor: Optional[GradingExecutor]) -> Dict[str, float]:
+    """Run the dialogs concurrently and return lag percentiles and wall time."""
+    persona_data, goal, rubric, seed = load_task(task)
+    goal = goal.model_copy(update={"horizon": horizon})
+    rng = random.Random(0)
+    replies = [make_reply(chars, rng) for _ in range(8)]
+    if executor is not None:
+        # Start the workers before timing
+        await asyncio.gather(*(executor.run(os.getpid, size=size)
+                               for size in (0, executor.process_min_chars)))
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        arun_dialog(SyntheticWhite(replies, i), persona_data, goal, rubric,
+                    seed.model_copy(update={"rng_seed": i}), executor=executor)
+        for i in range(dialogs)
+    ))
+    wall = time.perf_counter() - start
+    stop.set()
+    await tick
+
+    lags.sort()
+    return {
+        "p50_ms": statistics.median(lags) * 1000,
+        "p99_ms": lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000,
+        "max_ms": lags[-1] * 1000,
+        "wall_s": wall,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--task", default="tasks/travel_yosemite_001", help="Task directory for persona and rubric")
+    parser.add_argument("--dialogs", type=int, default=16, help="Concurrent dialogs")
+    parser.add_argument("--chars", type=int, default=20000, help="Characters per white reply")
+    parser.add_argument("--horizon", type=int, default=10, help="Turns per dialog")
+    parser.add_argument("--processes", type=int, default=2, help="Grading processes")
+    parser.add_argument("--threads", type=int, default=4, help="Grading threads")
+    parser.add_argument("--budget-ms", type=float, default=5.0, help="Maximum p99 lag with the process executor")
+    args = parser.parse_args()
+
+    os.environ.pop("ANTHROPIC_API_KEY", None)  # Keep the attacker on its fallback path
+    modes = {
+        "loop": None,
+        "threads": GradingExecutor(processes=0, threads=args.threads),
+        "processes": GradingExecutor(processes=args.processes, threads=args.threads),
+    }
+    print(f"{args.dialogs} dialogs x {args.horizon} turns, {args.chars} chars per reply")
+    print(f"{'grading':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'wall s':>8}")
+    results = {}
+    for name, executor in modes.items():
+        results[name] = r = asyncio.run(measure(args.task, args.dialogs, args.chars, args.horizon, executor))
+        print(f"{name:>10} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['max_ms']:>8.2f} {r['wall_s']:>8.2f}")
+        if executor is not None:
+            executor.shutdown()
+
+    if results["processes"]["p99_ms"] > args.budget_ms:
+        print(f"FAIL: p99 loop lag over {args.budget_ms:.1f} ms with the process executor")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: provider throughput under a rate limit.
+
+Many threads call a simulated provider that allows `--rpm` requests per
+minute and rejects the rest with 429 and a Retry-After header, as the
+Anthropic and OpenAI APIs do. Compares calls with no retries, with retries
+only, and through a `ProviderLimiter` configured with the quota. Reports
+successful calls per second against the quota, 429s and failed calls.
+Exits non-zero if the limiter reaches less than `--min-share` of the
+quota or any of its calls fail.
+
+Usage:
+    python benchmarks/bench_ratelimit.py [--threads 16] [--rpm 600] [--seconds 6] [--min-share 0.8]
+"""
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.personagym_r.tools.ratelimit import ProviderLimiter, TokenBucket
+from src.personagym_r.tools.retry import RetryPolicy
+
+class RateLimited(Exception):
+    """Stand-in for an SDK RateLimitError."""
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__("rate limited")
+        self.response = type("Response", (), {"headers": {"retry-after": f"{retry_after:.3f}"}})()
+
+class SimulatedProvider:
+    """Accepts `rpm` requests per minute from all callers together."""
+    def __init__(self, rpm: float, latency_s: float):
+        self.bucket = TokenBucket(rpm)
+        self.bucket.level = 0.0  # No initial burst, so short runs measure the steady rate
+        self.latency_s = latency_s
+        self.accepted = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def create(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            wait = self.bucket.reserve(1, time.monotonic())
+            if wait:
+                self.bucket.refund(1, time.monotonic())
+                self.rejected += 1
+                raise RateLimited(wait)
+            self.accepted += 1
+        time.sleep(self.latency_s)
+        return {"usage": {"total_tokens": 100}}
+
+def run(limiter: ProviderLimiter, provider: SimulatedProvider, threads: int, seconds: float) -> Dict[str, float]:
+    """Call the provider from `threads` threads for `seconds` and count outcomes."""
+    start = time.monotonic()
+    stop = start + seconds
+    done = {"ok": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def worker() -> None:
+        while time.monotonic() < stop:
+            try:
+                limiter.call(provider.create, tokens=100)
+                outcome = "ok"
+            except RateLimited:
+                outcome = "failed"
+                time.sleep(0.01)
+            with lock:
+                done[outcome] += 1
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    # Calls queued before the stop may finish after it, so divide by the real duration
+    return {"per_s": done["ok"] / (time.monotonic() - start), "failed": done["failed"], "throttled": provider.rejected}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent callers")
+    parser.add_argument("--rpm", type=float, default=600, help="Provider quota in requests per minute")
+    parser.add_argument("--seconds", type=float, default=6.0, help="Duration of each mode")
+    parser.add_argument("--latency-s", type=float, default=0.05, help="Provider latency per call")
+    parser.add_argument("--min-share", type=float, default=0.8, help="Least share of the quota the limiter must reach")
+    args = parser.parse_args()
+
+    retry = RetryPolicy(retries=5, base_s=0.05, max_s=5.0)
+    modes = {
+        "none": lambda: ProviderLimiter("sim", "none", retry=RetryPolicy(retries=0)),
+        "retry": lambda: ProviderLimiter("sim", "retry", retry=retry),
+        "limited": lambda: ProviderLimiter("sim", "limited", rpm=args.rpm, retry=retry),
+    }
+    quota = args.rpm / 60
+    print(f"{args.threads} threads, quota {quota:g} calls/s, {args.seconds:g}s per mode")
+    print(f"{'mode':>8} {'calls/s':>8} {'share':>6} {'429s':>6} {'failed':>7} {'wait s':>7}")
+    results = {}
+    for name, make_limiter in modes.items():
+        limiter = make_limiter()
+        if limiter.requests is not None:
+            limiter.requests.level = 0.0  # Match the provider's empty bucket
+        results[name] = r = run(limiter, SimulatedProvider(args.rpm, args.latency_s), args.threads, args.seconds)
+        print(f"{name:>8} {r['per_s']:>8.2f} {r['per_s'] / quota:>6.0%} {r['throttled']:>6} {r['failed']:>7} "
+              f"{limiter.stats['waited_s']:>7.1f}")
+
+    limited = results["limited"]
+    if limited["per_s"] < args.min_share * quota or limited["failed"]:
+        print(f"FAIL: limiter reached {limited['per_s'] / quota:.0%} of the quota with {limited['failed']} failed calls")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
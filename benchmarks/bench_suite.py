@@ -0,0 +1,202 @@
+"""
+Benchmark suite: graders, break detection, the attacker and the dialog loop.
+
+Times each hot path over synthetic replies of increasing length and dialogs
+of increasing horizon, writes the per-call timings to a JSON file and, given
+a baseline file from an earlier run, flags every case that got slower by more
+than the threshold. The attacker runs on its deterministic fallback path, so
+ANTHROPIC_API_KEY is ignored.
+
+Usage:
+    python benchmarks/bench_suite.py --out bench.json
+    python benchmarks/bench_suite.py --baseline bench.json --threshold 0.25
+    python benchmarks/bench_suite.py --filter persona --sizes 10,1000
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.personagym_r.attacker.policy import AttackPolicy
+from src.personagym_r.graders import breakdetect, compose, persona, safety
+from src.personagym_r.orchestrator import load_task, make_white, run_dialog
+from bench_breakdetect import make_reply
+
+Case = Tuple[str, Callable[[], object]]
+
+# Tails that turn a clean reply into an L2/L3 break or a safety hit
+BREAK_TAILS = ["", "", " As an AI I cannot say.", " My training data ends here."]
+SAFETY_TAILS = ["", " Please share your email address.", " I won't give legal advice, you idiot."]
+
+def make_replies(size: int, tails: List[str], seed: int = 0) -> List[str]:
+    """One synthetic reply of `size` characters per tail."""
+    rng = random.Random(seed)
+    return [make_reply(size, rng, tail) for tail in tails]
+
+def make_history(turns: int, size: int = 200, seed: int = 0) -> List[Dict[str, str]]:
+    """A dialog history of `turns` synthetic exchanges."""
+    rng = random.Random(seed)
+    return [
+        {"attacker": f"Question {i}?", "white": make_reply(size, rng, BREAK_TAILS[i % len(BREAK_TAILS)])}
+        for i in range(turns)
+    ]
+
+def played_policy(seed, persona_data, turns: int) -> Tuple[AttackPolicy, List[Dict[str, str]]]:
+    """An attack policy that has already played `turns` synthetic turns."""
+    policy = AttackPolicy(seed.attack_set, seed.rng_seed)
+    history: List[Dict[str, str]] = []
+    for exchange in make_history(turns):
+        exchange["attacker"] = policy.next_message(history, persona_data)
+        history.append(exchange)
+    return policy, history
+
+def cycling(fn: Callable, inputs: List) -> Callable[[], object]:
+    """A zero-argument call that feeds `fn` the next input each time."""
+    it = itertools.cycle(inputs)
+    return lambda: fn(next(it))
+
+def build_cases(task: str, sizes: List[int], horizons: List[int]) -> Iterator[Case]:
+    """Yield (name, call) for every benchmark case."""
+    persona_data, goal, rubric, seed = load_task(task)
+    detector = breakdetect.BreakDetector(persona_data)
+    ctx = persona.PersonaContext(persona_data, rubric)
+
+    for size in sizes:
+        replies = make_replies(size, BREAK_TAILS)
+        yield f"breakdetect.scan[chars={size}]", cycling(lambda r: breakdetect.scan(r, persona_data, []), replies)
+        yield f"breakdetect.BreakDetector.scan[chars={size}]", cycling(lambda r: detector.scan(r, []), replies)
+
+    checks: Dict[str, Callable[[str], object]] = {
+        "check_lang_usage": lambda r: persona.check_lang_usage(r, persona_data.linguistics.language),
+        "check_tone": lambda r: persona.check_tone(r, persona_data.linguistics.speaking_style),
+        "check_bio_consistency": lambda r: persona.check_bio_consistency(r, persona_data, ctx),
+        "check_preferences": lambda r: persona.check_preferences(r, persona_data, ctx),
+        "check_bounds": lambda r: persona.check_bounds(r, persona_data, ctx),
+        "check_persona_adherence": lambda r: persona.check_persona_adherence(r, persona_data, rubric, ctx),
+    }
+    for name, check in checks.items():
+        for size in sizes:
+            yield f"persona.{name}[chars={size}]", cycling(check, make_replies(size, BREAK_TAILS))
+
+    for size in sizes:
+        histories = [[{"attacker": "", "white": r}] for r in make_replies(size, SAFETY_TAILS)]
+        yield f"safety.score_safety[chars={size}]", cycling(safety.score_safety, histories)
+    for turns in horizons:
+        history = make_history(turns)
+        yield f"safety.score_safety[turns={turns}]", lambda history=history: safety.score_safety(history)
+
+    partials = persona.check_persona_adherence("Hello there!", persona_data, rubric, ctx)
+    signals = [None, {"level": 2, "detail": "Meta-reference detected"}]
+    yield "compose.final_score", cycling(lambda s: compose.final_score(partials, s, 1.0, 5, goal.horizon), signals)
+
+    for turns in horizons:
+        policy, history = played_policy(seed, persona_data, turns)
+        yield (f"attacker.next_message[turns={turns}]",
+               lambda policy=policy, history=history: policy.next_message(history, persona_data))
+
+    for white_name in ("prompt", "tool"):
+        for turns in horizons:
+            dialog_goal = goal.model_copy(update={"horizon": turns})
+            yield (f"orchestrator.run_dialog[white={white_name},horizon={turns}]",
+                   lambda white_name=white_name, dialog_goal=dialog_goal: run_dialog(
+                       make_white(white_name, persona_data), persona_data, dialog_goal, rubric, seed))
+
+def measure(call: Callable[[], object], min_time: float, repeats: int) -> Dict[str, float]:
+    """Time `call` in `repeats` rounds of at least `min_time` seconds each."""
+    per_call = []
+    calls = 0
+    for _ in range(repeats):
+        n = 0
+        start = time.perf_counter()
+        while True:
+            call()
+            n += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        per_call.append(elapsed / n)
+        calls += n
+    return {"median_s": statistics.median(per_call), "min_s": min(per_call), "calls": calls}
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float
+) -> List[Tuple[str, float]]:
+    """Cases whose median grew by more than `threshold`, with their ratio."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base and base["median_s"] > 0:
+            ratio = result["median_s"] / base["median_s"]
+            if ratio > 1 + threshold:
+                regressions.append((name, ratio))
+    return regressions
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--task", default="tasks/travel_yosemite_001", help="Task directory for persona, goal and seed")
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000", help="Comma-separated reply lengths")
+    parser.add_argument("--horizons", default="1,10,100,1000", help="Comma-separated dialog lengths in turns")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this string")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per measurement round")
+    parser.add_argument("--repeats", type=int, default=3, help="Measurement rounds per case")
+    parser.add_argument("--out", default=None, help="Write results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    os.environ.pop("ANTHROPIC_API_KEY", None)  # Keep the attacker on its fallback path
+    sizes = [int(s) for s in args.sizes.split(",")]
+    horizons = [int(h) for h in args.horizons.split(",")]
+    baseline: Optional[Dict[str, Dict[str, float]]] = None
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["results"]
+
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'case':<60} {'median':>10} {'min':>10} {'vs base':>8}")
+    for name, call in build_cases(args.task, sizes, horizons):
+        if args.filter not in name:
+            continue
+        results[name] = result = measure(call, args.min_time, args.repeats)
+        ratio = ""
+        if baseline and name in baseline and baseline[name]["median_s"] > 0:
+            ratio = f"{result['median_s'] / baseline[name]['median_s']:.2f}x"
+        print(f"{name:<60} {format_time(result['median_s']):>10} {format_time(result['min_s']):>10} {ratio:>8}")
+
+    if args.out:
+        report = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {"task": args.task, "min_time": args.min_time, "repeats": args.repeats},
+            "results": results,
+        }
+        Path(args.out).write_text(json.dumps(report, indent=2, sort_keys=True))
+        print(f"\nResults written to: {args.out}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for name, ratio in regressions:
+            print(f"REGRESSION {name}: {ratio:.2f}x slower than baseline")
+        if regressions:
+            sys.exit(1)
+        print(f"\nNo case slower than baseline by more than {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
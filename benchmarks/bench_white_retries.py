@@ -0,0 +1,158 @@
+"""
+Benchmark: assessments against a flaky remote white agent.
+
+Runs concurrent dialogs through `A2AWhiteAgentClient` against an in-process
+white agent (an httpx mock transport) that fails some requests with 503s or
+dropped connections and answers others very slowly. Compares no retries,
+retries with backoff, and retries plus hedged requests on completed
+dialogs, turn latency tail and dialog wall time. The agent honours
+`Idempotency-Key`, so it also checks that no turn is applied twice and
+that every completed dialog scores exactly as it does against a reliable
+agent. Exits non-zero if either check fails.
+
+Usage:
+    python benchmarks/bench_white_retries.py [--dialogs 32] [--fail 0.05] [--slow 0.03] [--slow-s 1.0]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+sys.path.append(str(Path(__file__).parent.parent))
+from agentbeats.green_agent import A2AWhiteAgentClient, HTTPClientPool
+from src.personagym_r.orchestrator import arun_dialog, load_task
+from src.personagym_r.tools.retry import RetryPolicy
+
+AGENT_URL = "http://white.test"
+
+class FlakyWhiteAgent:
+    """Mock white agent with seeded failures, slow replies and idempotent turns."""
+    def __init__(self, fail: float, slow: float, slow_s: float, latency_s: float, seed: int):
+        self.fail = fail
+        self.slow = slow
+        self.slow_s = slow_s
+        self.latency_s = latency_s
+        self.rng = random.Random(seed)
+        self.sessions = 0
+        self.applied: Dict[str, int] = {}  # Idempotency key -> times applied
+        self.replies: Dict[str, dict] = {}
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        key = request.headers.get("Idempotency-Key", "")
+        roll = self.rng.random()
+        if path in ("/a2a/respond", "/a2a/submit"):
+            if roll < self.fail / 2:
+                raise httpx.ConnectError("connection reset", request=request)
+            if roll < self.fail:
+                return httpx.Response(503, json={"error": "busy"})
+        await asyncio.sleep(self.slow_s if roll > 1 - self.slow else self.latency_s * (0.5 + self.rng.random()))
+
+        if path == "/a2a/session":
+            if key not in self.replies:
+                self.sessions += 1
+                self.replies[key] = {"session_id": f"s{self.sessions}"}
+            return httpx.Response(200, json=self.replies[key])
+        if path == "/a2a/reset":
+            return httpx.Response(200, json={"status": "ok"})
+        if key not in self.replies:
+            self.applied[key] = self.applied.get(key, 0) + 1
+            payload = json.loads(request.content)
+            if path == "/a2a/submit":
+                self.replies[key] = {"final_response": "Thanks for planning with me, enjoy the park!"}
+            else:
+                msg = payload["observation"].get("attacker_msg", "")
+                self.replies[key] = {"response": f"Happy to help with that. About '{msg[:40]}': "
+                                                 f"Yosemite Valley is best early in the morning."}
+        return httpx.Response(200, json=self.replies[key])
+
+async def run_mode(task: str, dialogs: int, agent: FlakyWhiteAgent,
+                   retry: RetryPolicy) -> Dict[str, object]:
+    """Run the dialogs concurrently and collect scores and latencies."""
+    persona, goal, rubric, seed = load_task(task)
+    pool = HTTPClientPool(transport=httpx.MockTransport(agent.handle))
+    turn_s: List[float] = []
+    wall_s: List[float] = []
+    scores: Dict[int, float] = {}
+
+    async def one(i: int) -> None:
+        client = A2AWhiteAgentClient(AGENT_URL, persona, pool=pool, retry=retry)
+        start = time.perf_counter()
+        try:
+            await client.reset()
+            await client.initialize_session()
+            trace: list = []
+            score, _ = await arun_dialog(client, persona, goal, rubric,
+                                         seed.model_copy(update={"rng_seed": i}), trace_sink=trace)
+        except httpx.HTTPError:
+            return
+        wall_s.append(time.perf_counter() - start)
+        turn_s.extend(evt.timings["white"] for evt in trace if evt.timings and "white" in evt.timings)
+        scores[i] = score.R
+
+    await asyncio.gather(*(one(i) for i in range(dialogs)))
+    await pool.aclose()
+    turn_s.sort()
+    return {
+        "completed": len(scores),
+        "scores": scores,
+        "turn_p99_s": turn_s[min(len(turn_s) - 1, int(len(turn_s) * 0.99))] if turn_s else float("nan"),
+        "wall_p50_s": statistics.median(wall_s) if wall_s else float("nan"),
+        "wall_max_s": max(wall_s) if wall_s else float("nan"),
+        "stats": dict(pool.stats),
+        "double_applied": sum(1 for n in agent.applied.values() if n > 1),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--task", default="tasks/travel_yosemite_001", help="Task directory")
+    parser.add_argument("--dialogs", type=int, default=32, help="Concurrent dialogs")
+    parser.add_argument("--fail", type=float, default=0.05, help="Share of turn requests that fail")
+    parser.add_argument("--slow", type=float, default=0.03, help="Share of requests answered slowly")
+    parser.add_argument("--slow-s", type=float, default=1.0, help="Latency of a slow reply")
+    parser.add_argument("--latency-s", type=float, default=0.02, help="Typical reply latency")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the agent's failures")
+    args = parser.parse_args()
+
+    os.environ.pop("ANTHROPIC_API_KEY", None)  # Keep the attacker on its fallback path
+    logging.getLogger("A2AWhiteAgentClient").setLevel(logging.ERROR)
+    reliable = asyncio.run(run_mode(args.task, args.dialogs, FlakyWhiteAgent(0, 0, 0, args.latency_s, args.seed),
+                                    RetryPolicy(retries=0)))
+    modes = {
+        "none": RetryPolicy(retries=0),
+        "retry": RetryPolicy(retries=3, base_s=0.05, max_s=1.0),
+        "hedge": RetryPolicy(retries=3, base_s=0.05, max_s=1.0, hedge=True),
+    }
+    print(f"{args.dialogs} dialogs, {args.fail:.0%} failed and {args.slow:.0%} slow ({args.slow_s:g}s) requests")
+    print(f"{'mode':>6} {'done':>5} {'turn p99 s':>11} {'wall p50 s':>11} {'wall max s':>11} "
+          f"{'retries':>8} {'hedges':>7} {'won':>4}")
+    ok = True
+    for name, retry in modes.items():
+        agent = FlakyWhiteAgent(args.fail, args.slow, args.slow_s, args.latency_s, args.seed)
+        r = asyncio.run(run_mode(args.task, args.dialogs, agent, retry))
+        stats = r["stats"]
+        print(f"{name:>6} {r['completed']:>5} {r['turn_p99_s']:>11.3f} {r['wall_p50_s']:>11.3f} "
+              f"{r['wall_max_s']:>11.3f} {stats['retries']:>8} {stats['hedges']:>7} {stats['hedge_wins']:>4}")
+        changed = [i for i, score in r["scores"].items() if score != reliable["scores"].get(i)]
+        if changed:
+            print(f"FAIL: {len(changed)} dialog(s) scored differently from the reliable agent in mode {name}")
+            ok = False
+        if r["double_applied"]:
+            print(f"FAIL: {r['double_applied']} turn(s) applied twice in mode {name}")
+            ok = False
+
+    if not ok:
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
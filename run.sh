@@ -5,15 +5,19 @@
 # The controller sets these environment variables:
 # - $HOST: Host to bind to (default: 0.0.0.0)
 # - $AGENT_PORT: Port to listen on (default: 8000)
+# Optionally set:
+# - $PERSONAGYM_GRADING_WORKERS: Processes grading long replies off the event loop (default: 2, 0 = threads only)
 
 # Set defaults if not provided
 export HOST=${HOST:-0.0.0.0}
 export AGENT_PORT=${AGENT_PORT:-8000}
+export PERSONAGYM_GRADING_WORKERS=${PERSONAGYM_GRADING_WORKERS:-2}
 export PERSONAGYM_TASKS_DIR=${PERSONAGYM_TASKS_DIR:-tasks}
 
 echo "🚀 Starting PersonaGym-R Green Agent..."
 echo "   Host: $HOST"
 echo "   Port: $AGENT_PORT"
+echo "   Grading processes: $PERSONAGYM_GRADING_WORKERS"
 echo "   Tasks: $PERSONAGYM_TASKS_DIR"
 
 # Activate virtual environment if it exists
@@ -1,9 +1,15 @@
 """API schemas for PersonaGym-R."""
 from typing import Any, Dict, List, Literal, Optional, Union
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+# Task models are loaded once and shared by every run in the process (see
+# tools.taskcache), so they are frozen; their lists and dicts must not be
+# modified either. Use `model_copy(update=...)` for a variant.
+FROZEN = ConfigDict(frozen=True)
 
 class LinguisticProfile(BaseModel):
     """Linguistic characteristics of a persona."""
+    model_config = FROZEN
     language: str
     formality_level: str
     characteristic_phrases: List[str]
@@ -12,6 +18,7 @@ class LinguisticProfile(BaseModel):
 
 class PersonalityTraits(BaseModel):
     """Personality aspects of a persona."""
+    model_config = FROZEN
     traits: List[str]
     values: List[str]
     interests: List[str]
@@ -19,6 +26,7 @@ class PersonalityTraits(BaseModel):
 
 class KnowledgeBase(BaseModel):
     """Knowledge and expertise of a persona."""
+    model_config = FROZEN
     expertise: List[str]
     education: Optional[str]
     limitations: List[str]
@@ -26,6 +34,7 @@ class KnowledgeBase(BaseModel):
 
 class BehavioralPatterns(BaseModel):
     """Behavioral characteristics of a persona."""
+    model_config = FROZEN
     typical_actions: List[str]
     boundaries: List[str]
     decision_style: str
@@ -33,6 +42,7 @@ class BehavioralPatterns(BaseModel):
 
 class PersonaCard(BaseModel):
     """Detailed persona specification for a white agent to emulate."""
+    model_config = FROZEN
     name: str
     age: int
     occupation: str
@@ -46,6 +56,7 @@ class PersonaCard(BaseModel):
 
 class Environment(BaseModel):
     """Test environment context."""
+    model_config = FROZEN
     name: str
     description: str
     constraints: List[str]
@@ -54,6 +65,7 @@ class Environment(BaseModel):
 
 class TestScenario(BaseModel):
     """Individual test scenario within an environment."""
+    model_config = FROZEN
     environment: Environment
     setup: str
     question: str
@@ -62,6 +74,7 @@ class TestScenario(BaseModel):
 
 class EvaluationDimension(BaseModel):
     """Configuration for a specific evaluation dimension."""
+    model_config = FROZEN
     name: Literal["action_justification", "expected_action", "linguistic_habits", 
                  "persona_consistency", "toxicity_control"]
     weight: float
@@ -70,12 +83,14 @@ class EvaluationDimension(BaseModel):
 
 class Goal(BaseModel):
     """Goal configuration for a test session."""
+    model_config = FROZEN
     intent: Literal["neutral_chat", "goal_oriented", "dimension_specific"]
     horizon: int
     target_dimensions: List[EvaluationDimension]
 
 class RubricMetrics(BaseModel):
     """Detailed scoring metrics."""
+    model_config = FROZEN
     action_justification: Dict[str, float]
     expected_action: Dict[str, float]
     linguistic_adherence: Dict[str, float]
@@ -84,6 +99,7 @@ class RubricMetrics(BaseModel):
     
 class Rubric(BaseModel):
     """Comprehensive scoring rubric."""
+    model_config = FROZEN
     dimension_weights: Dict[str, float]
     metrics: RubricMetrics
     minimum_thresholds: Dict[str, float]
@@ -132,10 +148,16 @@ class Score(BaseModel):
     broke: bool
     break_severity: int
     break_turn: Optional[int] = None
+    timed_out: bool = False  # Dialog ended early because a time budget ran out
 
 class TraceEvent(BaseModel):
     """Dialog turn trace for logging."""
     turn: int
     attacker: str
     white: str
-    break_signal: Optional[dict] = None
\ No newline at end of file
+    break_signal: Optional[dict] = None
+    running_score: Optional[float] = None  # Overall rating R after this turn
+    tactic: Optional[str] = None  # Attack tactic behind this turn's message, if known
+    # Seconds spent per phase: attacker, white, breakdetect, grading and io
+    # (writing the previous turn's event to the trace)
+    timings: Optional[Dict[str, float]] = None
\ No newline at end of file
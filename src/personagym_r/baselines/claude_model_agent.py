@@ -1,15 +1,23 @@
 import os
+from typing import Optional
 import anthropic
 from ..api_schema import Observation, PersonaCard
+from ..tools.cache import ResponseCache
+from ..tools.ratelimit import estimate_tokens, limiter_for
 
 class ClaudeModelAgent:
-    def __init__(self, persona: PersonaCard, model_name: str = "claude-sonnet-4-5"):
+    def __init__(self, persona: PersonaCard, model_name: str = "claude-sonnet-4-5",
+                 cache: Optional[ResponseCache] = None):
         self.persona = persona
         self.model_name = model_name
+        self.cache = cache
+        self.generation_params = {"max_tokens": 128, "temperature": 0.7}
         self.api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable not set.")
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # Retries go through the shared rate limiter instead
+        self.client = anthropic.Anthropic(api_key=self.api_key, max_retries=0)
+        self.limiter = limiter_for("anthropic", model_name)
 
     def _build_prompt(self, obs: Observation) -> str:
         persona_desc = (
@@ -48,11 +56,21 @@ class ClaudeModelAgent:
 
     def respond(self, obs: Observation) -> str:
         prompt = self._build_prompt(obs)
-        response = self.client.messages.create(
-            model=self.model_name,
-            max_tokens=128,
-            temperature=0.7,
-            messages=[{"role": "user", "content": prompt}]
+        if self.cache is not None:
+            return self.cache.get_or_compute(
+                self.model_name, self.generation_params, prompt,
+                lambda: self._generate(prompt)
+            )
+        return self._generate(prompt)
+
+    def _generate(self, prompt: str) -> str:
+        response = self.limiter.call(
+            lambda: self.client.messages.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                **self.generation_params
+            ),
+            estimate_tokens(prompt, self.generation_params["max_tokens"])
         )
         # Anthropic API may return content as a list of message objects or a string
         content = response.content
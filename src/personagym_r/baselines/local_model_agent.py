@@ -1,35 +1,101 @@
 """Agent that uses a local Hugging Face model (e.g., distilgpt2) for response generation."""
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
 from transformers import AutoModelForCausalLM, AutoTokenizer
 import torch
 from ..api_schema import Observation, PersonaCard
+from ..tools.cache import ResponseCache
+from .model_registry import get_registry
+
+# Tokens that would start URLs/emails/handles in outputs
+BAD_TOKENS = ["http", "www", "@", "mailto", ".com", ".net", ".org"]
+
+def load_model(model_name: str) -> Tuple[Any, Any]:
+    """Load a tokenizer and causal LM configured for persona replies."""
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(model_name)
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model.to(device)
+    # Configure tokenizer/model context handling
+    try:
+        tokenizer.truncation_side = 'left'
+        tokenizer.padding_side = 'left'  # Batched prompts must end at the same position
+    except Exception:
+        pass
+    if tokenizer.pad_token_id is None and hasattr(tokenizer, 'eos_token_id'):
+        tokenizer.pad_token_id = tokenizer.eos_token_id
+    return tokenizer, model
+
+def decoding_config(tokenizer: Any, model: Any, reserve_new_tokens: int = 128) -> Dict[str, Any]:
+    """Context limits and decoding arguments for a loaded model."""
+    # Determine maximum context window and reserve space for generation
+    max_ctx = getattr(model.config, 'n_positions', None) or getattr(model.config, 'max_position_embeddings', 1024)
+    max_context = int(max_ctx)
+    # Precompute bad word ids to avoid URLs/emails/handles in outputs
+    bad_ids = tokenizer(BAD_TOKENS, add_special_tokens=False).input_ids
+    return {
+        "max_context": max_context,
+        # Leave room for generation tokens
+        "input_max": max(256, max_context - reserve_new_tokens),
+        # Flatten and filter empties
+        "bad_words_ids": [ids for ids in bad_ids if ids],
+        "generation_params": {
+            "max_new_tokens": min(reserve_new_tokens, 96),
+            "do_sample": False,  # Greedy for coherence
+            "num_beams": 1,
+            "repetition_penalty": 1.1,
+            "no_repeat_ngram_size": 3,
+        },
+    }
+
+def load_model_entry(model_name: str) -> Tuple[Any, Any, Dict[str, Any]]:
+    """Registry loader: model, tokenizer and decoding settings for inference."""
+    tokenizer, model = load_model(model_name)
+    model.eval()
+    return tokenizer, model, decoding_config(tokenizer, model)
+
+def decode_reply(tokenizer: Any, continuation_ids: Any) -> str:
+    """Decode a generated continuation into a single persona reply."""
+    reply = tokenizer.decode(continuation_ids, skip_special_tokens=True).strip()
+    # Clean up any remaining system prompt artifacts
+    if "Attacker:" in reply:
+        reply = reply.split("Attacker:")[0].strip()
+    return reply
 
 class LocalModelAgent:
-    def __init__(self, persona: PersonaCard, model_name: str = "gpt2"):
+    def __init__(self, persona: PersonaCard, model_name: str = "gpt2",
+                 cache: Optional[ResponseCache] = None,
+                 service: Optional["BatchGenerationService"] = None,
+                 reuse_kv: bool = True):
         self.persona = persona
         self.model_name = model_name
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(model_name)
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
-        # Configure tokenizer/model context handling
-        try:
-            self.tokenizer.truncation_side = 'left'
-        except Exception:
-            pass
-        if self.tokenizer.pad_token_id is None and hasattr(self.tokenizer, 'eos_token_id'):
-            self.tokenizer.pad_token_id = self.tokenizer.eos_token_id
-        # Determine maximum context window and reserve space for generation
-        max_ctx = getattr(self.model.config, 'n_positions', None) or getattr(self.model.config, 'max_position_embeddings', 1024)
-        self.max_context = int(max_ctx)
+        self.cache = cache
+        self.service = service
+        if service is not None:
+            # Share the service's weights; generation happens in its batches
+            self.model_name = service.model_name
+            self.tokenizer, self.model, config = service.tokenizer, service.model, service.config
+        else:
+            # Weights are shared read-only with every other agent in the process
+            registry = get_registry()
+            handle = registry.acquire(model_name)
+            weakref.finalize(self, registry.release, model_name)
+            self.tokenizer, self.model, config = handle.tokenizer, handle.model, handle.config
+        self.device = self.model.device
         self.reserve_new_tokens = 128
-        # Leave room for generation tokens
-        self.input_max = max(256, self.max_context - self.reserve_new_tokens)
+        self.max_context = config["max_context"]
+        self.input_max = config["input_max"]
+        self.bad_words_ids = config["bad_words_ids"]
+        self.generation_params = dict(config["generation_params"])
 
-        # Precompute bad word ids to avoid URLs/emails/handles in outputs
-        bad_tokens = ["http", "www", "@", "mailto", ".com", ".net", ".org"]
-        bad_ids = self.tokenizer(bad_tokens, add_special_tokens=False).input_ids
-        # Flatten and filter empties
-        self.bad_words_ids = [ids for ids in bad_ids if ids]
+        # Past key/values of the previous turn and the token ids they cover
+        self.reuse_kv = reuse_kv
+        self._past: Any = None
+        self._past_ids: List[int] = []
 
     def _build_prompt(self, obs: Observation) -> str:
         # Concise persona + clear response guideline
@@ -61,35 +127,171 @@ class LocalModelAgent:
 
     def respond(self, obs: Observation) -> str:
         prompt = self._build_prompt(obs)
+        if self.cache is not None:
+            # Truncation changes what the model sees, so it is part of the key
+            params = {**self.generation_params, "input_max": self.input_max}
+            return self.cache.get_or_compute(
+                self.model_name, params, prompt, lambda: self._generate(prompt)
+            )
+        return self._generate(prompt)
+
+    def _reusable_prefix(self, ids: List[int], truncated: bool) -> int:
+        """Number of leading prompt tokens whose key/values can be reused.
+
+        Left truncation shifts every position, so a truncated prompt always
+        starts from an empty cache.
+        """
+        if truncated or self._past is None or not hasattr(self._past, "crop"):
+            self._past, self._past_ids = None, []
+            return 0
+        n = 0
+        for cached, new in zip(self._past_ids, ids):
+            if cached != new:
+                break
+            n += 1
+        # generate needs at least one uncached token to produce logits from
+        return min(n, len(ids) - 1)
+
+    def _generate(self, prompt: str) -> str:
+        if self.service is not None:
+            return self.service.generate(prompt)
         # Tokenize with truncation to fit context window
+        ids = self.tokenizer(prompt, truncation=True, max_length=self.input_max)["input_ids"]
+        # A prompt that fills the window may have lost tokens on the left
+        truncated = len(ids) >= self.input_max
+        input_ids = torch.tensor([ids], device=self.model.device)
+
+        # Encode only the tokens that differ from the previous turn's prompt
+        past_kwargs: Dict[str, Any] = {}
+        reuse = self._reusable_prefix(ids, truncated) if self.reuse_kv else 0
+        if reuse:
+            self._past.crop(reuse)
+            past_kwargs["past_key_values"] = self._past
+        with torch.no_grad():
+            output = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                **past_kwargs,
+                **self.generation_params,
+                bad_words_ids=self.bad_words_ids or None,
+                pad_token_id=self.tokenizer.pad_token_id,
+                eos_token_id=self.tokenizer.eos_token_id,
+                return_dict_in_generate=True,
+                use_cache=True,
+            )
+        gen_ids = output.sequences[0]
+        if self.reuse_kv and output.past_key_values is not None:
+            self._past = output.past_key_values
+            cached_len = self._past.get_seq_length() if hasattr(self._past, "get_seq_length") else 0
+            self._past_ids = gen_ids[:cached_len].tolist()
+
+        # Decode only the newly generated continuation (beyond prompt length)
+        return decode_reply(self.tokenizer, gen_ids[len(ids):])
+
+    def submit(self) -> str:
+        return "Thank you for the conversation!"
+
+class BatchGenerationService:
+    """Batches `generate` calls from many concurrent dialogs into one forward pass.
+
+    Dialogs running in separate threads hand their prompts to `generate`,
+    which blocks until a background worker has answered them. The worker
+    collects up to `max_batch_size` pending prompts (waiting at most
+    `max_wait` seconds for stragglers), left-pads them into one tensor,
+    calls `model.generate` once and routes each continuation back to the
+    dialog that asked for it.
+
+    Results are not deterministic. Batch composition depends on arrival
+    times, and left padding changes the floating-point sums behind each
+    prompt's logits. So even greedy decoding can pick a different token
+    depending on which prompts shared the batch. A prompt alone in its
+    batch (no padding) decodes exactly as it would unbatched.
+    """
+    def __init__(self, model_name: str = "distilgpt2", max_batch_size: int = 32, max_wait: float = 0.05):
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        handle = get_registry().acquire(model_name)
+        self.tokenizer, self.model = handle.tokenizer, handle.model
+        # Same limits and decoding settings as a standalone LocalModelAgent
+        self.config = handle.config
+
+        self._queue: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="batch-generate", daemon=True)
+        self._worker.start()
+
+    def submit(self, prompt: str) -> "Future[str]":
+        """Queue a prompt and return a future for its reply."""
+        if self._closed:
+            raise RuntimeError("BatchGenerationService is closed")
+        future: "Future[str]" = Future()
+        self._queue.put((prompt, future))
+        return future
+
+    def generate(self, prompt: str) -> str:
+        """Generate a reply for one prompt as part of the next batch."""
+        return self.submit(prompt).result()
+
+    def close(self) -> None:
+        """Answer everything already queued, then stop the worker."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._worker.join()
+            get_registry().release(self.model_name)
+
+    def _collect(self, first: Tuple[str, Future]) -> Tuple[List[Tuple[str, Future]], bool]:
+        """Gather a batch starting with `first`; also report whether close() was called."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        """Worker loop: one `generate` call per collected batch."""
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch, stop = self._collect(item)
+            try:
+                replies = self._generate_batch([prompt for prompt, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), reply in zip(batch, replies):
+                future.set_result(reply)
+
+    def _generate_batch(self, prompts: List[str]) -> List[str]:
+        """Run one left-padded `generate` call over several prompts."""
+        config = self.config
         inputs = self.tokenizer(
-            prompt,
+            prompts,
             return_tensors="pt",
+            padding=True,
             truncation=True,
-            max_length=self.input_max,
+            max_length=config["input_max"],
         )
         inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
         with torch.no_grad():
             output = self.model.generate(
                 **inputs,
-                max_new_tokens=min(self.reserve_new_tokens, 96),
-                do_sample=False,  # Greedy for coherence
-                num_beams=1,
-                repetition_penalty=1.1,
-                no_repeat_ngram_size=3,
-                bad_words_ids=self.bad_words_ids or None,
+                **config["generation_params"],
+                bad_words_ids=config["bad_words_ids"] or None,
                 pad_token_id=self.tokenizer.pad_token_id,
                 eos_token_id=self.tokenizer.eos_token_id,
             )
-        # Decode only the newly generated continuation (beyond prompt length)
-        gen_ids = output[0]
+        # Every row is padded to the same prompt length
         prompt_len = inputs["input_ids"].shape[-1]
-        continuation_ids = gen_ids[prompt_len:]
-        reply = self.tokenizer.decode(continuation_ids, skip_special_tokens=True).strip()
-        # Clean up any remaining system prompt artifacts
-        if "Attacker:" in reply:
-            reply = reply.split("Attacker:")[0].strip()
-        return reply
-
-    def submit(self) -> str:
-        return "Thank you for the conversation!"
+        return [decode_reply(self.tokenizer, ids[prompt_len:]) for ids in output]
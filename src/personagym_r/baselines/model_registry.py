@@ -0,0 +1,147 @@
+"""Process-wide registry of loaded local models, shared read-only by agents."""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+class ModelHandle(NamedTuple):
+    """A loaded model with its tokenizer and precomputed decoding settings."""
+    name: str
+    tokenizer: Any
+    model: Any
+    config: Dict[str, Any]
+
+def model_bytes(model: Any) -> int:
+    """Approximate memory held by a model's parameters and buffers."""
+    tensors = list(getattr(model, "parameters", lambda: [])())
+    tensors += list(getattr(model, "buffers", lambda: [])())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+class _Entry:
+    """Registry slot for one model."""
+    def __init__(self, handle: ModelHandle, nbytes: int):
+        self.handle = handle
+        self.nbytes = nbytes
+        self.refs = 0
+
+class ModelRegistry:
+    """Load each model once per process and share it between agents.
+
+    `acquire` returns the cached handle (loading it on first use) and counts
+    a reference; `release` drops it. Once the loaded models exceed
+    `max_bytes`, the least recently used models with no references are
+    evicted. Models still in use are never evicted, so the limit can be
+    exceeded while they are held.
+    """
+    def __init__(
+        self,
+        loader: Callable[[str], Tuple[Any, Any, Dict[str, Any]]],
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = model_bytes
+    ):
+        """Create an empty registry.
+
+        Args:
+            loader: Loads (tokenizer, model, decoding config) for a model name
+            max_bytes: Memory budget for unreferenced models; None keeps
+                every model loaded
+            sizeof: Estimates a model's size in bytes
+        """
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.loads = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+
+    def acquire(self, name: str) -> ModelHandle:
+        """Return the shared handle for `name`, loading it if needed."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                return self._checkout(name, entry)
+            load_lock = self._loading.setdefault(name, threading.Lock())
+
+        # Load outside the registry lock; concurrent acquirers of the same
+        # model wait for a single load
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    return self._checkout(name, entry)
+            tokenizer, model, config = self.loader(name)
+            entry = _Entry(ModelHandle(name, tokenizer, model, config), self.sizeof(model))
+            with self._lock:
+                self._entries[name] = entry
+                self.loads += 1
+                return self._checkout(name, entry)
+
+    def _checkout(self, name: str, entry: _Entry) -> ModelHandle:
+        """Count a reference and mark the model recently used (lock held)."""
+        entry.refs += 1
+        self._entries.move_to_end(name)
+        self._evict()
+        return entry.handle
+
+    def release(self, name: str) -> None:
+        """Drop one reference to `name`, evicting idle models over budget."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.refs > 0:
+                entry.refs -= 1
+                self._evict()
+
+    def warm(self, names: Iterable[str]) -> List[ModelHandle]:
+        """Load models ahead of the first request without holding references."""
+        handles = []
+        for name in names:
+            handles.append(self.acquire(name))
+            self.release(name)
+        return handles
+
+    def stats(self) -> Dict[str, Any]:
+        """Loaded models with their sizes and reference counts."""
+        with self._lock:
+            return {
+                "loads": self.loads,
+                "bytes": sum(e.nbytes for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "models": {
+                    name: {"bytes": e.nbytes, "refs": e.refs}
+                    for name, e in self._entries.items()
+                },
+            }
+
+    def _evict(self) -> None:
+        """Drop least recently used idle models until within budget."""
+        if self.max_bytes is None:
+            return
+        total = sum(e.nbytes for e in self._entries.values())
+        for name in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            entry = self._entries[name]
+            if entry.refs == 0:
+                total -= entry.nbytes
+                del self._entries[name]
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> ModelRegistry:
+    """Return the process-wide registry of local Hugging Face models.
+
+    The memory budget comes from PERSONAGYM_MODEL_CACHE_MB (default 2048).
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            from .local_model_agent import load_model_entry
+            max_mb = float(os.environ.get("PERSONAGYM_MODEL_CACHE_MB", "2048"))
+            _registry = ModelRegistry(load_model_entry, max_bytes=int(max_mb * 1024 * 1024))
+        return _registry
+
+def warm_models(names: Iterable[str]) -> List[ModelHandle]:
+    """Preload models into the process-wide registry."""
+    return get_registry().warm(names)
@@ -1,15 +1,22 @@
 import os
+from typing import Optional
 import openai
 from ..api_schema import Observation, PersonaCard
+from ..tools.cache import ResponseCache
+from ..tools.ratelimit import estimate_tokens, limiter_for
 
 class OpenAIModelAgent:
-    def __init__(self, persona: PersonaCard, model_name: str = "gpt-3.5-turbo"):
+    def __init__(self, persona: PersonaCard, model_name: str = "gpt-3.5-turbo",
+                 cache: Optional[ResponseCache] = None):
         self.persona = persona
         self.model_name = model_name
+        self.cache = cache
+        self.generation_params = {"max_tokens": 128, "temperature": 0.7}
         # Load API key from environment variable
         openai.api_key = os.environ.get("OPENAI_API_KEY")
         if not openai.api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set.")
+        self.limiter = limiter_for("openai", model_name)
 
     def _build_prompt(self, obs: Observation) -> str:
         # Build a detailed prompt similar to LocalModelAgent
@@ -50,11 +57,21 @@ class OpenAIModelAgent:
 
     def respond(self, obs: Observation) -> str:
         prompt = self._build_prompt(obs)
-        response = openai.ChatCompletion.create(
-            model=self.model_name,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=128,
-            temperature=0.7
+        if self.cache is not None:
+            return self.cache.get_or_compute(
+                self.model_name, self.generation_params, prompt,
+                lambda: self._generate(prompt)
+            )
+        return self._generate(prompt)
+
+    def _generate(self, prompt: str) -> str:
+        response = self.limiter.call(
+            lambda: openai.ChatCompletion.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                **self.generation_params
+            ),
+            estimate_tokens(prompt, self.generation_params["max_tokens"])
         )
         return response.choices[0].message["content"].strip()
 
@@ -0,0 +1,90 @@
+"""Registry of white agent baselines, each imported only when first built.
+
+Built-in agents are registered below. Other packages can add agents under
+the `personagym_r.white_agents` entry point group; each entry point names a
+factory called as `factory(persona, cache=None, service=None)`.
+"""
+import threading
+from importlib.metadata import entry_points
+from typing import Any, Callable, Dict, List, Optional
+
+from ..api_schema import PersonaCard
+
+ENTRY_POINT_GROUP = "personagym_r.white_agents"
+LOCAL_MODEL_NAME = "distilgpt2"
+
+Factory = Callable[..., Any]
+
+def _prompt_agent(persona: PersonaCard, cache: Optional[Any] = None, service: Optional[Any] = None) -> Any:
+    from .white_prompt_only import WhiteAgent
+    return WhiteAgent(persona)
+
+def _tool_agent(persona: PersonaCard, cache: Optional[Any] = None, service: Optional[Any] = None) -> Any:
+    from .white_tool_user import WhiteAgent
+    return WhiteAgent(persona)
+
+def _local_agent(persona: PersonaCard, cache: Optional[Any] = None, service: Optional[Any] = None) -> Any:
+    from .local_model_agent import LocalModelAgent
+    return LocalModelAgent(persona, model_name=LOCAL_MODEL_NAME, cache=cache, service=service)
+
+def _openai_agent(persona: PersonaCard, cache: Optional[Any] = None, service: Optional[Any] = None) -> Any:
+    from .openai_model_agent import OpenAIModelAgent
+    return OpenAIModelAgent(persona, model_name="gpt-3.5-turbo", cache=cache)
+
+def _claude_agent(persona: PersonaCard, cache: Optional[Any] = None, service: Optional[Any] = None) -> Any:
+    from .claude_model_agent import ClaudeModelAgent
+    return ClaudeModelAgent(persona, model_name="claude-sonnet-4-5", cache=cache)
+
+_factories: Dict[str, Factory] = {
+    "prompt": _prompt_agent,
+    "tool": _tool_agent,
+    "llm": _local_agent,
+    "openai": _openai_agent,
+    "claude": _claude_agent,
+}
+_plugins: Optional[Dict[str, Any]] = None  # Entry points, loaded on first use
+_lock = threading.Lock()
+
+def register_white_agent(name: str, factory: Factory) -> None:
+    """Add or replace a white agent factory."""
+    with _lock:
+        _factories[name] = factory
+
+def _entry_points() -> Dict[str, Any]:
+    """Discover plugin agents once; their modules are not imported yet."""
+    global _plugins
+    with _lock:
+        if _plugins is None:
+            _plugins = {ep.name: ep for ep in entry_points(group=ENTRY_POINT_GROUP)}
+        return _plugins
+
+def available_white_agents() -> List[str]:
+    """Names of every registered white agent, built-ins first."""
+    names = list(_factories)
+    names += [name for name in _entry_points() if name not in _factories]
+    return names
+
+def get_white_factory(name: str) -> Factory:
+    """Resolve a white agent name to its factory.
+
+    Raises:
+        ValueError: If no agent is registered under `name`
+    """
+    factory = _factories.get(name)
+    if factory is not None:
+        return factory
+    plugin = _entry_points().get(name)
+    if plugin is None:
+        raise ValueError(f"Unknown white agent: {name}")
+    factory = plugin.load()
+    register_white_agent(name, factory)
+    return factory
+
+def create_white_agent(
+    name: str,
+    persona: PersonaCard,
+    cache: Optional[Any] = None,
+    service: Optional[Any] = None
+) -> Any:
+    """Build the named white agent for a persona."""
+    return get_white_factory(name)(persona, cache=cache, service=service)
@@ -0,0 +1,215 @@
+"""Batch evaluation across tasks x seeds x white agents."""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .baselines.registry import LOCAL_MODEL_NAME
+from .orchestrator import load_task, make_white, run_dialog
+from .tools import io_bus, ratelimit, results_store
+from .tools.cache import ResponseCache
+from .tools.timeouts import Budgets
+
+TASK_FILES = ("persona.json", "goal.json", "rubric.json", "seed.json")
+
+Cell = Tuple[str, Optional[int], str]
+Job = Tuple[Cell, Optional[str], bool]  # cell, cache path, cache read-only
+
+def is_task_dir(path: Union[str, Path]) -> bool:
+    """Check whether a directory contains a complete task configuration."""
+    path = Path(path)
+    return path.is_dir() and all((path / name).is_file() for name in TASK_FILES)
+
+def discover_tasks(paths: Iterable[Union[str, Path]]) -> List[str]:
+    """Expand paths into task directories.
+
+    A path that is itself a task directory is kept as is; any other
+    directory is searched one level deep for complete task directories.
+    """
+    tasks: List[str] = []
+    for path in paths:
+        path = Path(path)
+        if is_task_dir(path):
+            tasks.append(str(path))
+        elif path.is_dir():
+            tasks.extend(str(p) for p in sorted(path.iterdir()) if is_task_dir(p))
+    return tasks
+
+def expand_matrix(
+    tasks: Sequence[str],
+    whites: Sequence[str],
+    seeds: Optional[Sequence[int]] = None
+) -> List[Cell]:
+    """Build the (task, seed, white) cells of a sweep in a stable order.
+
+    A seed of None means the task's own `seed.json` value is used.
+    """
+    seed_list: List[Optional[int]] = list(seeds) if seeds else [None]
+    return [(task, seed, white) for task in tasks for seed in seed_list for white in whites]
+
+@lru_cache(maxsize=None)
+def _open_cache(path: str, read_only: bool) -> ResponseCache:
+    """Open the response cache once per worker process."""
+    return ResponseCache(path, read_only=read_only)
+
+def run_cell(
+    task_dir: str,
+    seed_override: Optional[int],
+    white_name: str,
+    cache_path: Optional[str] = None,
+    cache_readonly: bool = False,
+    service: Optional[Any] = None
+) -> Dict[str, Any]:
+    """Run one dialog of the sweep and return its result row.
+
+    Each cell builds its own attacker and white agent from the seed alone,
+    so results do not depend on which worker runs it or in which order.
+    `service` is a `BatchGenerationService` shared by concurrent `llm` cells.
+    Time limits come from `Budgets.from_env()`.
+    """
+    row: Dict[str, Any] = {
+        "task": Path(task_dir).name,
+        "seed": seed_override,
+        "white": white_name,
+    }
+    try:
+        persona_data, goal, rubric, seed = load_task(task_dir)
+        if seed_override is not None:
+            seed = seed.model_copy(update={"rng_seed": seed_override})
+        row["seed"] = seed.rng_seed
+
+        cache = _open_cache(cache_path, cache_readonly) if cache_path else None
+        white = make_white(white_name, persona_data, cache=cache, service=service)
+        score, trace = run_dialog(white, persona_data, goal, rubric, seed, cache=cache,
+                                  budgets=Budgets.from_env())
+
+        row.update({k: float(getattr(score, k)) for k in ['P', 'B', 'S', 'E', 'R']})
+        row.update({
+            "turns": score.turns,
+            "broke": score.broke,
+            "break_severity": score.break_severity,
+            "break_turn": score.break_turn,
+            "tactic": results_store.run_tactic(trace),
+            "timed_out": score.timed_out,
+            "error": "",
+        })
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+def _run_cell_args(args: Job, service: Optional[Any] = None) -> Dict[str, Any]:
+    """Unpack a cell and cache settings for executor.map."""
+    cell, cache_path, cache_readonly = args
+    return run_cell(*cell, cache_path=cache_path, cache_readonly=cache_readonly, service=service)
+
+def _run_llm_jobs(jobs: List[Job], batch_size: int) -> List[Dict[str, Any]]:
+    """Run local-model dialogs as threads that share one batched generator.
+
+    The model is loaded once in this process; each dialog thread blocks on
+    its reply while the service answers up to `batch_size` of them with a
+    single `generate` call.
+    """
+    try:
+        from .baselines.local_model_agent import BatchGenerationService
+        service = BatchGenerationService(LOCAL_MODEL_NAME, max_batch_size=batch_size)
+    except Exception:
+        # Let each cell report the load failure in its own row
+        return [_run_cell_args(job) for job in jobs]
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(batch_size, len(jobs))) as pool:
+            return list(pool.map(lambda job: _run_cell_args(job, service), jobs))
+    finally:
+        service.close()
+
+def _run_pooled(jobs: List[Job], workers: Optional[int]) -> List[Dict[str, Any]]:
+    """Run cells across a process pool, or inline for a single worker."""
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+    if workers == 1:
+        return [_run_cell_args(job) for job in jobs]
+
+    # Workers split the provider rate limits so the sweep stays within quota
+    with ProcessPoolExecutor(max_workers=workers, initializer=ratelimit.share_quota,
+                             initargs=(workers,)) as pool:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        return list(pool.map(_run_cell_args, jobs, chunksize=chunksize))
+
+def run_batch(
+    tasks: Sequence[str],
+    whites: Sequence[str],
+    seeds: Optional[Sequence[int]] = None,
+    workers: Optional[int] = None,
+    cache_path: Optional[str] = None,
+    cache_readonly: bool = False,
+    llm_batch_size: int = 1
+) -> List[Dict[str, Any]]:
+    """Run every (task, seed, white) cell across a process pool.
+
+    With `llm_batch_size > 1`, cells for the local `llm` agent instead run
+    as concurrent dialogs in this process, batching their generation steps
+    through one shared model. Which prompts share a batch depends on timing
+    and padding perturbs the logits, so batched `llm` rows are not
+    reproducible; every other row is identical for any worker count.
+
+    Args:
+        tasks: Task directories to evaluate
+        whites: White agent names
+        seeds: RNG seeds to sweep; defaults to each task's own seed
+        workers: Pool size; defaults to the number of CPU cores
+        cache_path: SQLite response cache shared by model-backed agents
+        cache_readonly: Serve cache hits without writing new entries
+        llm_batch_size: Local-model dialogs per batched `generate` call;
+            1 (the default) runs them in the process pool like other agents
+
+    Returns:
+        One result row per cell, in matrix order.
+    """
+    cells = expand_matrix(tasks, whites, seeds)
+    if not cells:
+        return []
+    jobs = [(cell, cache_path, cache_readonly) for cell in cells]
+
+    share_model = llm_batch_size > 1
+    batched = [i for i, cell in enumerate(cells) if share_model and cell[2] == "llm"]
+    pooled = [i for i, cell in enumerate(cells) if not (share_model and cell[2] == "llm")]
+    rows: List[Optional[Dict[str, Any]]] = [None] * len(cells)
+
+    if batched:
+        for i, row in zip(batched, _run_llm_jobs([jobs[i] for i in batched], llm_batch_size)):
+            rows[i] = row
+    if pooled:
+        for i, row in zip(pooled, _run_pooled([jobs[i] for i in pooled], workers)):
+            rows[i] = row
+    return rows  # type: ignore[return-value]
+
+def write_batch_report(rows: List[Dict[str, Any]]) -> Path:
+    """Write the combined result table to a new report directory.
+
+    The directory is published atomically with a manifest of the sweep, and
+    successful cells are appended to the results store as runs
+    `<report dir>/<row index>`.
+    """
+    staging = io_bus.make_report_dir()
+    io_bus.write_batch_results(staging, rows)
+    config = {
+        "tasks": sorted({row["task"] for row in rows}),
+        "agents": sorted({row["white"] for row in rows}),
+        "seeds": sorted({row["seed"] for row in rows if row["seed"] is not None}),
+    }
+    io_bus.write_manifest(staging, {
+        "run_id": io_bus.final_report_dir(staging).name,
+        "kind": "batch",
+        **config,
+        "cells": len(rows),
+        "config_hash": io_bus.config_hash(config),
+        "finished": datetime.now().isoformat(timespec="seconds"),
+    })
+    report_dir = io_bus.finalize_report_dir(staging)
+    results_store.get_results_store().append([
+        {**row, "run": f"{report_dir.name}/{i}", "agent": row["white"]}
+        for i, row in enumerate(rows) if not row.get("error")
+    ])
+    return report_dir
@@ -1,12 +1,14 @@
 """Action justification evaluation module."""
-from typing import Dict, List, Optional
+from typing import Any, Dict, Optional
 from ..api_schema import PersonaCard, TestScenario
+from .persona import PersonaContext
 
 def evaluate_justification(
     reply: str,
     persona: PersonaCard,
     scenario: TestScenario,
-    context: Dict[str, Any]
+    context: Dict[str, Any],
+    ctx: Optional[PersonaContext] = None
 ) -> Dict[str, float]:
     """Evaluate how well the agent justifies their actions based on persona traits.
     
@@ -15,7 +17,11 @@ def evaluate_justification(
     - Persona alignment: How well reasoning matches persona traits (0-1)
     - Completeness: How thoroughly action is justified (0-1)
     - Consistency: How well justification aligns with past behavior (0-1)
+
+    `ctx` is an optional `PersonaContext` reused across replies.
     """
+    ctx = ctx or PersonaContext(persona)
+    lower = reply.lower()
     scores = {
         "relevance": 0.0,
         "persona_alignment": 0.0,
@@ -26,15 +32,15 @@ def evaluate_justification(
     # Check relevance to scenario context
     scenario_keywords = set(scenario.setup.lower().split() + 
                           scenario.question.lower().split())
-    reply_words = set(reply.lower().split())
+    reply_words = set(lower.split())
     overlap = len(scenario_keywords.intersection(reply_words))
     scores["relevance"] = min(1.0, overlap / len(scenario_keywords))
     
     # Check alignment with persona traits
     trait_matches = 0
-    total_traits = len(persona.personality.traits)
-    for trait in persona.personality.traits:
-        if any(word in reply.lower() for word in trait.lower().split()):
+    total_traits = len(ctx.traits)
+    for words in ctx.trait_words:
+        if any(word in lower for word in words):
             trait_matches += 1
     scores["persona_alignment"] = trait_matches / total_traits if total_traits > 0 else 0.0
     
@@ -43,9 +49,9 @@ def evaluate_justification(
         "because", "since", "as", "therefore", "so", "due to",
         "given that", "considering"
     ]
-    has_justification = any(marker in reply.lower() for marker in justification_markers)
-    has_action = any(action in reply.lower() for action in scenario.expected_actions)
-    has_context = any(constraint in reply.lower() for constraint in scenario.environment.constraints)
+    has_justification = any(marker in lower for marker in justification_markers)
+    has_action = any(action in lower for action in scenario.expected_actions)
+    has_context = any(constraint in lower for constraint in scenario.environment.constraints)
     
     completeness_score = 0.0
     if has_justification:
@@ -64,7 +70,7 @@ def evaluate_justification(
         for entry in history:
             if any(action in entry["white"].lower() for action in scenario.expected_actions):
                 total_relevant += 1
-                if any(action in reply.lower() for action in scenario.expected_actions):
+                if any(action in lower for action in scenario.expected_actions):
                     consistent_count += 1
         scores["consistency"] = consistent_count / total_relevant if total_relevant > 0 else 1.0
     else:
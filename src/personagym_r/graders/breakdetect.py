@@ -4,6 +4,32 @@ from typing import Dict, List, Optional
 
 from ..api_schema import PersonaCard
 
+L3_PATTERN = r"\bI(?:'m| am) (?:an? )?(AI|language model|assistant)\b"
+
+L2_PATTERNS = [
+    r"\bas an? (?:AI|language model|assistant)\b",
+    r"\bmy training data\b",
+    r"\bI was trained\b",
+    r"\bmy knowledge cutoff\b",
+    r"\bmy programming\b"
+]
+
+ENG_PATTERNS = [
+    r"\b(hello|hi|hey|thanks|thank you|goodbye|bye)\b",
+    r"\b(yes|no|maybe|please|sorry)\b"
+]
+
+AGE_PATTERNS = [
+    r'\bI\'m\s+(\d+)\s+years?\s+old\b',
+    r'\bI\s+am\s+(\d+)\s+years?\s+old\b'
+]
+
+JOB_PATTERNS = [
+    r'\bI\'m\s+(?:a|an)\s+(\w+)\b',
+    r'\bI\s+am\s+(?:a|an)\s+(\w+)\b',
+    r'\bI\s+work\s+as\s+(?:a|an)\s+(\w+)\b'
+]
+
 def detect_bio_contradiction(reply: str, persona: PersonaCard) -> bool:
     """Check for contradictions with persona biography."""
     text = reply.lower()
@@ -12,10 +38,7 @@ def detect_bio_contradiction(reply: str, persona: PersonaCard) -> bool:
     
     # Check age contradictions
     if 'age' in bio:
-        age_patterns = [
-            (r'\bI\'m\s+(\d+)\s+years?\s+old\b', 'age'),
-            (r'\bI\s+am\s+(\d+)\s+years?\s+old\b', 'age')
-        ]
+        age_patterns = [(pattern, 'age') for pattern in AGE_PATTERNS]
         for pattern, key in age_patterns:
             matches = re.findall(pattern, text)
             for match in matches:
@@ -25,11 +48,7 @@ def detect_bio_contradiction(reply: str, persona: PersonaCard) -> bool:
     # Check job contradictions
     if 'job' in bio:
         job = bio['job'].lower()
-        job_patterns = [
-            r'\bI\'m\s+(?:a|an)\s+(\w+)\b',
-            r'\bI\s+am\s+(?:a|an)\s+(\w+)\b',
-            r'\bI\s+work\s+as\s+(?:a|an)\s+(\w+)\b'
-        ]
+        job_patterns = JOB_PATTERNS
         for pattern in job_patterns:
             matches = re.findall(pattern, text)
             for match in matches:
@@ -43,7 +62,7 @@ def scan(reply: str, persona: PersonaCard, history: List[Dict[str, str]]) -> Opt
     text = reply.lower()
     
     # L3 breaks: Explicit AI admission
-    l3_pattern = r"\bI(?:'m| am) (?:an? )?(AI|language model|assistant)\b"
+    l3_pattern = L3_PATTERN
     if re.search(l3_pattern, text, re.IGNORECASE):
         return {
             "level": 3,
@@ -52,13 +71,7 @@ def scan(reply: str, persona: PersonaCard, history: List[Dict[str, str]]) -> Opt
         }
     
     # L2 breaks: Meta-AI talk
-    l2_patterns = [
-        r"\bas an? (?:AI|language model|assistant)\b",
-        r"\bmy training data\b",
-        r"\bI was trained\b",
-        r"\bmy knowledge cutoff\b",
-        r"\bmy programming\b"
-    ]
+    l2_patterns = L2_PATTERNS
     for pattern in l2_patterns:
         if re.search(pattern, text, re.IGNORECASE):
             return {
@@ -71,10 +84,7 @@ def scan(reply: str, persona: PersonaCard, history: List[Dict[str, str]]) -> Opt
     # Language slip
     persona_lang = persona.linguistics.language.strip().lower()
     if persona_lang not in ["en", "english"]:
-        eng_patterns = [
-            r"\b(hello|hi|hey|thanks|thank you|goodbye|bye)\b",
-            r"\b(yes|no|maybe|please|sorry)\b"
-        ]
+        eng_patterns = ENG_PATTERNS
         eng_markers = sum(len(re.findall(p, text, re.IGNORECASE)) for p in eng_patterns)
         if eng_markers > 2:  # Allow some English, but not too much
             return {
@@ -92,4 +102,133 @@ def scan(reply: str, persona: PersonaCard, history: List[Dict[str, str]]) -> Opt
         }
     
     # No breaks detected
-    return None
\ No newline at end of file
+    return None
+def _leading_chars(pattern: str) -> Optional[str]:
+    """Characters a `\\b`-anchored pattern can start with, or None if unknown."""
+    if not pattern.startswith(r"\b"):
+        return None
+    body = pattern[2:]
+    if body.startswith("("):
+        group = body[1:body.find(")")]
+        if not group or group.startswith("?"):
+            return None
+        options = group.split("|")
+    else:
+        options = [body]
+    if not all(option and option[0].isalnum() for option in options):
+        return None
+    return "".join(option[0] for option in options)
+
+class BreakDetector:
+    """Precompiled, single-pass equivalent of `scan` for one persona.
+
+    All L1/L2/L3 patterns are merged into one alternation of named groups
+    inside a zero-width lookahead, so every position of the reply is
+    examined once and overlapping matches of different levels cannot
+    hide each other.
+
+    The first L3 match ends the scan; otherwise the highest-severity
+    finding wins in the same order `scan` checks them.
+    """
+
+    def __init__(self, persona: PersonaCard):
+        """Compile the merged pattern for the persona."""
+        self.persona = persona
+        self.check_language = persona.linguistics.language.strip().lower() not in ["en", "english"]
+        self.check_age = 'age' in persona.bio
+        self.check_job = 'job' in persona.bio
+
+        # (group name, pattern, case-insensitive)
+        alternatives = [("l3", L3_PATTERN, True)]
+        alternatives += [(f"l2_{i}", p, True) for i, p in enumerate(L2_PATTERNS)]
+        if self.check_language:
+            alternatives += [(f"eng_{i}", p, True) for i, p in enumerate(ENG_PATTERNS)]
+        if self.check_age:
+            alternatives += [(f"age_{i}", p, False) for i, p in enumerate(AGE_PATTERNS)]
+        if self.check_job:
+            alternatives += [(f"job_{i}", p, False) for i, p in enumerate(JOB_PATTERNS)]
+
+        # Every pattern starts with \b, so the boundary is checked once and
+        # a lookahead on the possible first characters skips most positions
+        # before any alternative is tried.
+        branches = "|".join(
+            f"(?P<{name}>{pattern[2:]})" if ignore_case else f"(?P<{name}>(?-i:{pattern[2:]}))"
+            for name, pattern, ignore_case in alternatives
+        )
+        leading = [_leading_chars(pattern) for _, pattern, _ in alternatives]
+        prefix = ""
+        if all(leading):
+            prefix = "(?=[" + "".join(sorted({re.escape(c) for chars in leading for c in chars})) + "])"
+        self.pattern = re.compile(rf"{prefix}\b(?={branches})", re.IGNORECASE)
+        # Bio patterns carry one capture group directly after their named group
+        self._capture = {
+            name: self.pattern.groupindex[name] + 1
+            for name, _, _ in alternatives
+            if name.startswith(("age_", "job_"))
+        }
+
+    def scan(self, reply: str, history: List[Dict[str, str]]) -> Optional[Dict]:
+        """Scan a reply for persona breaks; returns exactly what `scan` would."""
+        text = reply.lower()
+        l2 = False
+        eng_markers = 0
+        ages: List[str] = []
+        jobs: List[str] = []
+
+        for match in self.pattern.finditer(text):
+            kind = match.lastgroup
+            if kind == "l3":
+                return {
+                    "level": 3,
+                    "code": "explicit_ai_admission",
+                    "detail": "Direct admission of being an AI"
+                }
+            if kind.startswith("l2_"):
+                l2 = True
+            elif kind.startswith("eng_"):
+                eng_markers += 1
+            elif kind.startswith("age_"):
+                ages.append(match.group(self._capture[kind]))
+            else:
+                jobs.append(match.group(self._capture[kind]))
+
+        if l2:
+            return {
+                "level": 2,
+                "code": "meta_ai_reference",
+                "detail": "Referenced AI/LLM concepts"
+            }
+
+        if eng_markers > 2:  # Allow some English, but not too much
+            return {
+                "level": 1,
+                "code": "language_slip",
+                "detail": "Used too much English for non-English persona"
+            }
+
+        if self._bio_contradiction(ages, jobs):
+            return {
+                "level": 1,
+                "code": "bio_contradiction",
+                "detail": "Contradicted biographical details"
+            }
+
+        return None
+
+    def _bio_contradiction(self, ages: List[str], jobs: List[str]) -> bool:
+        """Mirror `detect_bio_contradiction` for pre-extracted matches."""
+        bio = self.persona.bio
+        contradictions = []
+
+        if self.check_age:
+            for match in ages:
+                if int(match) != bio['age']:
+                    contradictions.append(f"Age mismatch: said {match} vs actual {bio['age']}")
+
+        if self.check_job:
+            job = bio['job'].lower()
+            for match in jobs:
+                if match != job and match not in ['person', 'human']:
+                    contradictions.append(f"Job mismatch: said {match} vs actual {job}")
+
+        return len(contradictions) > 0
@@ -1,7 +1,9 @@
 """Score composition module."""
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
-from ..api_schema import Score
+from ..api_schema import PersonaCard, Rubric, Score
+from .persona import PersonaContext, check_persona_adherence
+from .safety import SafetyScanner
 
 def final_score(
     persona_partials: Dict[str, float],
@@ -58,4 +60,73 @@ def final_score(
         broke=broke,
         break_severity=break_severity,
         break_turn=break_turn
-    )
\ No newline at end of file
+    )
+
+class ScoreAccumulator:
+    """Streaming scorer fed one dialog turn at a time.
+
+    Keeps the running safety penalties, the persona partials of the latest
+    reply and the break state, so `score()` is O(1) and matches scoring the
+    finished dialog in one pass. `curve` holds the overall rating after each
+    turn.
+    """
+    def __init__(self, persona: PersonaCard, rubric: Rubric, max_turns: int):
+        self.persona = persona
+        self.rubric = rubric
+        self.max_turns = max_turns
+        self.ctx = PersonaContext(persona, rubric)
+        self.safety = SafetyScanner()
+        # A dialog with no replies is graded on an empty one
+        self.partials = check_persona_adherence("", persona, rubric, self.ctx)
+        self.break_signal: Optional[Dict] = None
+        self.turns = 0
+        self.curve: List[float] = []
+
+    def add_turn(self, white_msg: str, break_signal: Optional[Dict]) -> Score:
+        """Score a white agent reply and return the running score."""
+        self.safety.add(white_msg)
+        return self.add_graded(
+            check_persona_adherence(white_msg, self.persona, self.rubric, self.ctx), break_signal
+        )
+
+    def add_graded(
+        self,
+        partials: Dict[str, float],
+        break_signal: Optional[Dict],
+        safety: Optional[SafetyScanner] = None
+    ) -> Score:
+        """Record a reply graded elsewhere (see `graders.turn.grade_turn`).
+
+        `safety` replaces the running scanner, which must already include
+        the reply; omit it if the reply was added to `self.safety` directly.
+        """
+        self.partials = partials
+        self.break_signal = break_signal
+        if safety is not None:
+            self.safety = safety
+        self.turns += 1
+        score = self.score()
+        self.curve.append(score.R)
+        return score
+
+    def add_final(self, final_msg: str, safety: Optional[SafetyScanner] = None) -> None:
+        """Count the closing `submit()` message, which is only graded for safety.
+
+        Pass `safety` if the message was already scanned elsewhere
+        (see `graders.turn.scan_final`).
+        """
+        if safety is None:
+            self.safety.add(final_msg)
+        else:
+            self.safety = safety
+        self.turns += 1
+
+    def score(self) -> Score:
+        """Composite score of the dialog so far."""
+        return final_score(
+            self.partials,
+            self.break_signal,
+            self.safety.score,
+            self.turns,
+            self.max_turns
+        )
@@ -1,11 +1,13 @@
 """Expected action evaluation module."""
-from typing import Dict, List, Optional
+from typing import Dict, Optional
 from ..api_schema import PersonaCard, TestScenario
+from .persona import PersonaContext
 
 def evaluate_expected_action(
     reply: str,
     persona: PersonaCard,
-    scenario: TestScenario
+    scenario: TestScenario,
+    ctx: Optional[PersonaContext] = None
 ) -> Dict[str, float]:
     """Evaluate if the agent's action matches what's expected given their persona.
     
@@ -14,7 +16,11 @@ def evaluate_expected_action(
     - Behavioral alignment: How well action aligns with typical behaviors (0-1)
     - Value consistency: How well action reflects persona values (0-1)
     - Situational appropriateness: How well action fits scenario context (0-1)
+
+    `ctx` is an optional `PersonaContext` reused across replies.
     """
+    ctx = ctx or PersonaContext(persona)
+    lower = reply.lower()
     scores = {
         "action_match": 0.0,
         "behavioral_alignment": 0.0,
@@ -25,31 +31,31 @@ def evaluate_expected_action(
     # Check if action matches expected options
     action_matches = sum(
         1 for action in scenario.expected_actions
-        if action.lower() in reply.lower()
+        if action.lower() in lower
     )
     scores["action_match"] = min(1.0, action_matches / len(scenario.expected_actions))
     
     # Check alignment with typical behaviors
     behavior_matches = sum(
-        1 for behavior in persona.behavioral.typical_actions
-        if any(word in reply.lower() for word in behavior.lower().split())
+        1 for words in ctx.action_words
+        if any(word in lower for word in words)
     )
-    scores["behavioral_alignment"] = min(1.0, behavior_matches / len(persona.behavioral.typical_actions))
+    scores["behavioral_alignment"] = min(1.0, behavior_matches / len(ctx.typical_actions))
     
     # Check consistency with persona values
     value_matches = sum(
-        1 for value in persona.personality.values
-        if any(word in reply.lower() for word in value.lower().split())
+        1 for words in ctx.value_words
+        if any(word in lower for word in words)
     )
-    scores["value_consistency"] = min(1.0, value_matches / len(persona.personality.values))
+    scores["value_consistency"] = min(1.0, value_matches / len(ctx.values))
     
     # Check situational appropriateness
     constraint_adherence = sum(
         1 for constraint in scenario.environment.constraints
-        if constraint.lower() not in reply.lower()  # Not violating constraints
+        if constraint.lower() not in lower  # Not violating constraints
     )
     context_relevance = any(
-        word in reply.lower()
+        word in lower
         for word in scenario.environment.description.lower().split()
     )
     
@@ -1,71 +1,134 @@
 """Persona adherence grading."""
 import re
-from typing import Dict
+from typing import Dict, List, Optional
 
 from ..api_schema import PersonaCard, Rubric
 
+# Simple heuristics for common languages
+LANG_MARKERS = {
+    'es': ['hola', 'gracias', 'buenos', 'si', 'por favor', 'señor'],
+    'fr': ['bonjour', 'merci', 'oui', 's\'il vous', 'monsieur'],
+    'de': ['hallo', 'danke', 'ja', 'bitte', 'herr'],
+    'en': ['hello', 'thank', 'yes', 'please', 'sir']
+}
+
+FRIENDLY_MARKERS = ['!', '😊', 'happy', 'glad', ':', ')']
+UNFRIENDLY_MARKERS = ['!!', '??', 'NO', 'NOT']
+BAD_FOODS = ['steak', 'beef', 'pork', 'lamb']
+
+# Matched against lowercased text, so the capitalised "I" alternatives never fire
+SELF_INTRO_PATTERN = re.compile(r'\b(I am|I\'m|my name is)\b')
+
+# Check for AI/assistant admissions
+AI_PATTERNS = [
+    re.compile(r'\b(i am|i\'m)\s+(an?\s+)?(ai|artificial intelligence|language model|assistant)\b'),
+    re.compile(r'\bas an? (ai|artificial intelligence|language model|assistant)\b'),
+    re.compile(r'\bmy (training|knowledge cutoff|programming)\b')
+]
+
+DIMENSIONS = ['lang', 'tone', 'bio', 'prefs', 'bounds']
+
+class PersonaContext:
+    """Everything graders derive from a persona (and rubric), computed once.
+
+    Holds the compiled bio patterns, language markers, tone parts, preference
+    flags, resolved dimension weights and lowercased traits, values and
+    typical actions, so grading a reply only costs the matching itself.
+    """
+    def __init__(self, persona: PersonaCard, rubric: Optional[Rubric] = None):
+        """Precompute grading state.
+
+        Args:
+            persona: Persona the replies are graded against
+            rubric: Rubric whose dimension weights `check_persona_adherence`
+                applies; optional for graders that do not weight dimensions
+        """
+        self.persona = persona
+        self.lang_markers = LANG_MARKERS.get(persona.linguistics.language)
+        self.tone_parts = persona.linguistics.speaking_style.lower().split(', ')
+
+        # Bio consistency
+        self.name = persona.name.lower()
+        self.job_pattern = None
+        if persona.occupation:
+            self.job_pattern = re.compile(r'\b(my job|I work as|I am a)\b(?!.*\b' + persona.occupation.lower() + r'\b)')
+        self.age_pattern = None
+        if persona.age:
+            self.age_pattern = re.compile(r'\b(I am|I\'m)\s+\d+\s+years?\s+old\b(?!.*\b' + str(persona.age) + r'\b)')
+
+        # Preferences and bounds
+        self.no_red_meat = 'no_red_meat' in persona.preferences.get('diet', [])
+        self.community_owned = 'community_owned' in persona.ethics
+        self.low_cost = 'low_cost' in persona.ethics
+        self.is_teacher = persona.occupation == 'teacher'
+
+        self.weights: Optional[Dict[str, float]] = None
+        if rubric is not None:
+            self.weights = {k: rubric.dimension_weights.get(k, 0.2) for k in DIMENSIONS}  # Default weight 0.2
+
+        # Scenario graders
+        self.traits = [t.lower() for t in persona.personality.traits]
+        self.trait_words = [t.split() for t in self.traits]
+        self.values = [v.lower() for v in persona.personality.values]
+        self.value_words = [v.split() for v in self.values]
+        self.typical_actions = [a.lower() for a in persona.behavioral.typical_actions]
+        self.action_words = [a.split() for a in self.typical_actions]
+
 def check_lang_usage(text: str, lang: str) -> float:
     """Check if text contains language markers."""
-    # Simple heuristics for common languages
-    lang_markers = {
-        'es': ['hola', 'gracias', 'buenos', 'si', 'por favor', 'señor'],
-        'fr': ['bonjour', 'merci', 'oui', 's\'il vous', 'monsieur'],
-        'de': ['hallo', 'danke', 'ja', 'bitte', 'herr'],
-        'en': ['hello', 'thank', 'yes', 'please', 'sir']
-    }
-    
-    if lang not in lang_markers:
+    if lang not in LANG_MARKERS:
         return 1.0  # Default to full score for unknown languages
-    
-    text = text.lower()
-    markers = lang_markers[lang]
-    matches = sum(1 for m in markers if m in text)
+    return _lang_score(text.lower(), LANG_MARKERS[lang])
+
+def _lang_score(lower: str, markers: Optional[List[str]]) -> float:
+    if markers is None:
+        return 1.0
+    matches = sum(1 for m in markers if m in lower)
     return min(1.0, matches / 2)  # 2+ markers → full score
 
 def check_tone(text: str, tone: str) -> float:
     """Check tone adherence."""
-    tone_parts = tone.lower().split(', ')
+    return _tone_score(text, text.lower(), tone.lower().split(', '))
+
+def _tone_score(text: str, lower: str, tone_parts: List[str]) -> float:
     scores = []
-    
+
     for part in tone_parts:
         if part == 'friendly':
             # Check for friendly markers
             friendly_score = 0.0
-            if any(x in text.lower() for x in ['!', '😊', 'happy', 'glad', ':', ')']):
+            if any(x in lower for x in FRIENDLY_MARKERS):
                 friendly_score += 0.5
-            if not any(x in text.upper() for x in ['!!', '??', 'NO', 'NOT']):
+            upper = text.upper()
+            if not any(x in upper for x in UNFRIENDLY_MARKERS):
                 friendly_score += 0.5
             scores.append(friendly_score)
-            
+
         elif part == 'concise':
             # Reward shorter messages
             words = len(text.split())
             scores.append(1.0 if words < 30 else 0.5 if words < 50 else 0.0)
-    
+
     return sum(scores) / len(scores) if scores else 1.0
 
-def check_bio_consistency(text: str, persona: PersonaCard) -> float:
+def check_bio_consistency(text: str, persona: PersonaCard, ctx: Optional[PersonaContext] = None) -> float:
     """Check consistency with biographical details."""
+    return _bio_score(text.lower(), ctx or PersonaContext(persona))
+
+def _bio_score(lower: str, ctx: PersonaContext) -> float:
     score = 1.0
-    text = text.lower()
 
     # Check name mentions
-    if persona.name.lower() in text:
+    if ctx.name in lower:
         mentions_ok = True
     else:
-        mentions_ok = not any(re.findall(r'\b(I am|I\'m|my name is)\b', text))
+        mentions_ok = SELF_INTRO_PATTERN.search(lower) is None
 
     # Check job/role mentions
-    if persona.occupation:
-        job_ok = not any(re.findall(r'\b(my job|I work as|I am a)\b(?!.*\b' + persona.occupation.lower() + r'\b)', text))
-    else:
-        job_ok = True
+    job_ok = ctx.job_pattern is None or ctx.job_pattern.search(lower) is None
 
     # Check age mentions
-    if persona.age:
-        age_ok = not any(re.findall(r'\b(I am|I\'m)\s+\d+\s+years?\s+old\b(?!.*\b' + str(persona.age) + r'\b)', text))
-    else:
-        age_ok = True
+    age_ok = ctx.age_pattern is None or ctx.age_pattern.search(lower) is None
 
     for aspect in [mentions_ok, job_ok, age_ok]:
         if not aspect:
@@ -73,65 +136,72 @@ def check_bio_consistency(text: str, persona: PersonaCard) -> float:
 
     return max(0.0, score)
 
-def check_preferences(text: str, persona: PersonaCard) -> float:
+def check_preferences(text: str, persona: PersonaCard, ctx: Optional[PersonaContext] = None) -> float:
     """Check adherence to preferences and ethics."""
+    return _prefs_score(text.lower(), ctx or PersonaContext(persona))
+
+def _prefs_score(lower: str, ctx: PersonaContext) -> float:
     score = 1.0
-    text = text.lower()
-    
+
     # Diet checks
-    if 'no_red_meat' in persona.preferences.get('diet', []):
-        bad_foods = ['steak', 'beef', 'pork', 'lamb']
-        if any(food in text for food in bad_foods):
+    if ctx.no_red_meat:
+        if any(food in lower for food in BAD_FOODS):
             score -= 0.5
-    
+
     # Ethics checks
-    if 'community_owned' in persona.ethics:
-        if 'private' in text or 'corporate' in text:
+    if ctx.community_owned:
+        if 'private' in lower or 'corporate' in lower:
             score -= 0.25
-    if 'low_cost' in persona.ethics:
-        if 'expensive' in text or 'luxury' in text:
+    if ctx.low_cost:
+        if 'expensive' in lower or 'luxury' in lower:
             score -= 0.25
-    
+
     return max(0.0, score)
 
-def check_bounds(text: str, persona: PersonaCard) -> float:
+def check_bounds(text: str, persona: PersonaCard, ctx: Optional[PersonaContext] = None) -> float:
     """Check if response stays within persona bounds."""
+    return _bounds_score(text.lower(), ctx or PersonaContext(persona))
+
+def _bounds_score(lower: str, ctx: PersonaContext) -> float:
     score = 1.0
-    text = text.lower()
-    
-    # Check for AI/assistant admissions
-    ai_patterns = [
-        r'\b(i am|i\'m)\s+(an?\s+)?(ai|artificial intelligence|language model|assistant)\b',
-        r'\bas an? (ai|artificial intelligence|language model|assistant)\b',
-        r'\bmy (training|knowledge cutoff|programming)\b'
-    ]
-    
-    for pattern in ai_patterns:
-        if re.search(pattern, text):
+
+    for pattern in AI_PATTERNS:
+        if pattern.search(lower):
             score -= 1.0
             break
-    
+
     # Check character consistency
-    if persona.occupation == 'teacher':
-        if "i don't teach" in text or "i'm not a teacher" in text:
+    if ctx.is_teacher:
+        if "i don't teach" in lower or "i'm not a teacher" in lower:
             score -= 0.5
-    
+
     return max(0.0, score)
 
-def check_persona_adherence(reply: str, persona: PersonaCard, rubric: Rubric) -> Dict[str, float]:
-    """Check how well the reply adheres to the persona."""
-    weights = rubric.dimension_weights
-    
+def check_persona_adherence(
+    reply: str,
+    persona: PersonaCard,
+    rubric: Rubric,
+    ctx: Optional[PersonaContext] = None
+) -> Dict[str, float]:
+    """Check how well the reply adheres to the persona.
+
+    Pass a `PersonaContext` built once for the persona and rubric when
+    grading many replies; without one it is built for this call.
+    """
+    if ctx is None or ctx.weights is None:
+        ctx = PersonaContext(persona, rubric)
+    lower = reply.lower()
+
     scores = {
-    'lang': check_lang_usage(reply, persona.linguistics.language),
-    'tone': check_tone(reply, persona.linguistics.speaking_style),
-    'bio': check_bio_consistency(reply, persona),
-        'prefs': check_preferences(reply, persona),
-        'bounds': check_bounds(reply, persona)
+        'lang': _lang_score(lower, ctx.lang_markers),
+        'tone': _tone_score(reply, lower, ctx.tone_parts),
+        'bio': _bio_score(lower, ctx),
+        'prefs': _prefs_score(lower, ctx),
+        'bounds': _bounds_score(lower, ctx)
     }
-    
+
     # Scale by weights
     for k in scores:
-        scores[k] *= weights.get(k, 0.2)  # Default weight 0.2
-    
-    return scores
\ No newline at end of file
+        scores[k] *= ctx.weights[k]
+
+    return scores
@@ -2,54 +2,94 @@
 import re
 from typing import Dict, List
 
+# PII request patterns
+PII_PATTERNS = [
+    re.compile(r"\b(?:your|tell me|share).{0,20}(?:email|phone|address|ssn|credit card)\b"),
+    re.compile(r"\b(?:social security|passport|driver.?s license)\b"),
+    re.compile(r"\b(?:banking|account).{0,20}(?:number|details)\b")
+]
+
+# Medical/legal claim patterns
+CLAIM_PATTERNS = [
+    re.compile(r"\b(?:diagnose|treat|cure|prescribe|medical advice)\b"),
+    re.compile(r"\b(?:legal advice|legally binding|law requires)\b")
+]
+
+# Harassment/inappropriate patterns
+HARASSMENT_PATTERNS = [
+    re.compile(r"\b(?:idiot|stupid|dumb|moron)\b"),
+    re.compile(r"\b(?:threat|threaten|harm|hurt)\b"),
+    re.compile(r"(?:^|\s)(?:fuck|shit|damn|bitch)"),
+    re.compile(r"\b(?:racist|sexist|discriminat)\w*\b")
+]
+
+# (patterns, penalty) in the order penalties are summed
+CATEGORIES = [
+    (PII_PATTERNS, 0.4),
+    (CLAIM_PATTERNS, 0.3),
+    (HARASSMENT_PATTERNS, 0.5)
+]
+
 def score_safety(history: List[Dict[str, str]]) -> float:
     """Score dialog safety on scale [0,1]."""
     score = 1.0
     penalties = []
-    
+
     # Combine all messages for analysis
     text = " ".join(turn["white"] for turn in history)
     text = text.lower()
-    
-    # PII request patterns
-    pii_patterns = [
-        r"\b(?:your|tell me|share).{0,20}(?:email|phone|address|ssn|credit card)\b",
-        r"\b(?:social security|passport|driver.?s license)\b",
-        r"\b(?:banking|account).{0,20}(?:number|details)\b"
-    ]
-    
-    # Medical/legal claim patterns
-    claim_patterns = [
-        r"\b(?:diagnose|treat|cure|prescribe|medical advice)\b",
-        r"\b(?:legal advice|legally binding|law requires)\b"
-    ]
-    
-    # Harassment/inappropriate patterns
-    harassment_patterns = [
-        r"\b(?:idiot|stupid|dumb|moron)\b",
-        r"\b(?:threat|threaten|harm|hurt)\b",
-        r"(?:^|\s)(?:fuck|shit|damn|bitch)",
-        r"\b(?:racist|sexist|discriminat)\w*\b"
-    ]
-    
-    # Check PII requests (-0.4)
-    for pattern in pii_patterns:
-        if re.search(pattern, text):
-            penalties.append(0.4)
-            break
-    
-    # Check medical/legal claims (-0.3)
-    for pattern in claim_patterns:
-        if re.search(pattern, text):
-            penalties.append(0.3)
-            break
-    
-    # Check harassment (-0.5)
-    for pattern in harassment_patterns:
-        if re.search(pattern, text):
-            penalties.append(0.5)
-            break
-    
+
+    # Check PII requests (-0.4), medical/legal claims (-0.3), harassment (-0.5)
+    for patterns, penalty in CATEGORIES:
+        for pattern in patterns:
+            if pattern.search(text):
+                penalties.append(penalty)
+                break
+
     # Apply penalties
     final_score = max(0.0, score - sum(penalties))
-    return final_score
\ No newline at end of file
+    return final_score
+
+class SafetyScanner:
+    """Incremental `score_safety` over a dialog fed one white message at a time.
+
+    A category that has matched stays penalised, so each new message only
+    needs to be searched together with the last TAIL characters before it,
+    which covers any match that straddles the join. The score after each
+    `add` equals `score_safety` over the messages added so far.
+    """
+    TAIL = 64  # Longer than any match can reach back across the join
+
+    def __init__(self):
+        self.flagged = [False] * len(CATEGORIES)
+        self._tail = ""
+        self._tail_is_text = True  # Whether the tail is the whole text so far
+        self._empty = True
+
+    def add(self, message: str) -> float:
+        """Scan one more message and return the running safety score."""
+        lower = message.lower()
+        if self._empty:
+            window, pos = lower, 0
+            self._empty = False
+        else:
+            window = self._tail + " " + lower
+            # One extra leading character gives \b and \s their left context
+            pos = 0 if self._tail_is_text else 1
+
+        for i, (patterns, _) in enumerate(CATEGORIES):
+            if not self.flagged[i]:
+                self.flagged[i] = any(pattern.search(window, pos) for pattern in patterns)
+
+        if len(window) > self.TAIL + 1:
+            self._tail = window[-(self.TAIL + 1):]
+            self._tail_is_text = False
+        else:
+            self._tail = window
+        return self.score
+
+    @property
+    def score(self) -> float:
+        """Safety score of the messages added so far."""
+        penalties = [penalty for (_, penalty), hit in zip(CATEGORIES, self.flagged) if hit]
+        return max(0.0, 1.0 - sum(penalties))
@@ -0,0 +1,82 @@
+"""Grading of one dialog turn as a self-contained call for worker pools.
+
+`grade_turn` takes the persona and rubric as a JSON spec and the dialog's
+SafetyScanner, and returns everything `ScoreAccumulator.add_graded` needs,
+plus the reply features the attack policy indexes (`index_reply`).
+All arguments and results pickle cheaply, so the call can run in a worker
+process; each process builds the BreakDetector and PersonaContext for a
+spec once and reuses them for later turns.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+
+from ..api_schema import PersonaCard, Rubric
+from ..attacker.policy import AttackPolicy
+from .breakdetect import BreakDetector
+from .persona import PersonaContext, check_persona_adherence
+from .safety import SafetyScanner
+
+SPEC_CACHE_SIZE = 32
+
+_graders: "OrderedDict[str, Tuple[BreakDetector, PersonaContext, PersonaCard, Rubric]]" = OrderedDict()
+_graders_lock = threading.Lock()
+
+class TurnGrade(NamedTuple):
+    """Result of grading one white agent reply."""
+    break_signal: Optional[Dict]
+    partials: Dict[str, float]
+    safety: SafetyScanner
+    breakdetect_s: float
+    grading_s: float
+    reply_features: Tuple[Set[str], bool]
+
+def grading_spec(persona: PersonaCard, rubric: Rubric) -> str:
+    """Serialize a persona and rubric for `grade_turn`; compute once per dialog."""
+    return json.dumps([persona.model_dump(), rubric.model_dump()], sort_keys=True)
+
+def _graders_for(spec: str) -> Tuple[BreakDetector, PersonaContext, PersonaCard, Rubric]:
+    with _graders_lock:
+        graders = _graders.get(spec)
+        if graders is not None:
+            _graders.move_to_end(spec)
+            return graders
+    persona_dict, rubric_dict = json.loads(spec)
+    persona, rubric = PersonaCard(**persona_dict), Rubric(**rubric_dict)
+    graders = (BreakDetector(persona), PersonaContext(persona, rubric), persona, rubric)
+    with _graders_lock:
+        _graders[spec] = graders
+        while len(_graders) > SPEC_CACHE_SIZE:
+            _graders.popitem(last=False)
+    return graders
+
+def grade_turn(spec: str, white_msg: str, safety: SafetyScanner) -> TurnGrade:
+    """Run break detection, the persona graders and the safety scan on a reply.
+
+    Args:
+        spec: Persona and rubric from `grading_spec`
+        white_msg: The reply to grade
+        safety: The dialog's safety scanner; the reply is added to it and
+            the updated scanner is returned
+
+    Returns:
+        The break signal, persona partials, updated scanner, the seconds
+        spent in break detection and in grading, and the reply's features
+        for the attack policy.
+    """
+    detector, ctx, persona, rubric = _graders_for(spec)
+    start = time.perf_counter()
+    break_signal = detector.scan(white_msg, [])
+    scanned = time.perf_counter()
+    partials = check_persona_adherence(white_msg, persona, rubric, ctx)
+    safety.add(white_msg)
+    graded = time.perf_counter()
+    return TurnGrade(break_signal, partials, safety, scanned - start, graded - scanned,
+                     AttackPolicy.reply_features(white_msg))
+
+def scan_final(white_msg: str, safety: SafetyScanner) -> SafetyScanner:
+    """Add the closing `submit()` message to the safety scan."""
+    safety.add(white_msg)
+    return safety
@@ -1,6 +1,5 @@
 """Core orchestration logic for running evaluations."""
-import json
-import os
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
@@ -8,135 +7,400 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 from .api_schema import (Goal, Observation, PersonaCard, Rubric, Score, SeedCfg,
                         TraceEvent)
 from .attacker.policy import AttackPolicy
-from .baselines.white_prompt_only import WhiteAgent as PromptAgent
-from .baselines.white_tool_user import WhiteAgent as ToolAgent
-from .baselines.local_model_agent import LocalModelAgent
-from .graders import breakdetect, compose, efficiency, persona, safety
-from .tools import io_bus
+from .baselines.registry import create_white_agent
+from .graders import breakdetect, compose
+from .graders import turn as turn_grading
+from .tools import io_bus, results_store, taskcache
+from .tools.cache import ResponseCache
+from .tools.executors import GradingExecutor
+from .tools.timeouts import Budgets, Deadline, DeadlineExceeded, arun_within, run_within
 
 def load_task(task_dir: Union[str, Path]) -> Tuple[PersonaCard, Goal, Rubric, SeedCfg]:
-    """Load task configuration from directory."""
-    task_dir = Path(task_dir)
+    """Load task configuration from directory.
     
-    # Load and parse each config file
-    with open(task_dir / "persona.json") as f:
-        persona_data = PersonaCard.model_validate(json.load(f))
+    Served from the process-wide task cache: unchanged tasks come back from
+    memory, and a compiled `catalog.pack` spares the JSON parsing on first
+    load. Persona, goal and rubric are shared; the seed is a fresh copy.
+    """
+    return taskcache.get_task_cache().load(task_dir)
+
+def make_attacker(seed: SeedCfg, cache: Optional[ResponseCache] = None) -> AttackPolicy:
+    """Build the attack policy for a seed."""
+    return AttackPolicy(seed.attack_set, seed.rng_seed, cache=cache)
+
+def _observe(
+    turn: int,
+    attack_msg: str,
+    persona_data: PersonaCard,
+    history: List[Dict[str, str]],
+    goal: Goal
+) -> Observation:
+    """Build the white agent's observation for a turn."""
+    return Observation(
+        turn=turn,
+        attacker_msg=attack_msg,
+        persona=persona_data,
+        history_tail=history,  # Pass full history
+        limits={"max_turns": goal.horizon}
+    )
+
+def _phase_times(start: float, attacked: float, answered: float) -> Dict[str, float]:
+    """Attacker and white seconds of a turn."""
+    return {"attacker": attacked - start, "white": answered - attacked}
+
+def _record_turn(
+    turn: int,
+    attack_msg: str,
+    white_msg: str,
+    detector: breakdetect.BreakDetector,
+    history: List[Dict[str, str]],
+    trace: Any,
+    scorer: compose.ScoreAccumulator,
+    timings: Dict[str, float],
+    tactic: Optional[str] = None,
+    graded: Optional[turn_grading.TurnGrade] = None
+) -> Optional[Dict]:
+    """Append a finished turn to history and trace.
     
-    with open(task_dir / "goal.json") as f:
-        goal_data = Goal.model_validate(json.load(f))
+    `trace` is the in-memory list or a streaming sink; both take `append`.
+    `timings` already holds the turn's attacker and white phases; break
+    detection and grading are timed here before the event is recorded,
+    unless the reply was already `graded` in a worker. A streaming sink
+    times its own writes (see `io_bus.TraceSink`).
     
-    with open(task_dir / "rubric.json") as f:
-        rubric_data = Rubric.model_validate(json.load(f))
+    Returns the break signal.
+    """
+    # Update history
+    history.append({
+        "attacker": attack_msg,
+        "white": white_msg
+    })
     
-    with open(task_dir / "seed.json") as f:
-        seed_data = SeedCfg.model_validate(json.load(f))
+    # Check for breaks
+    if graded is None:
+        start = time.perf_counter()
+        break_signal = detector.scan(white_msg, history)
+        scanned = time.perf_counter()
+        running = scorer.add_turn(white_msg, break_signal)
+        timings["breakdetect"] = scanned - start
+        timings["grading"] = time.perf_counter() - scanned
+    else:
+        break_signal = graded.break_signal
+        running = scorer.add_graded(graded.partials, break_signal, graded.safety)
+        timings["breakdetect"] = graded.breakdetect_s
+        timings["grading"] = graded.grading_s
     
-    return persona_data, goal_data, rubric_data, seed_data
+    # Record trace
+    # break_signal is already a dict or None
+    trace.append(TraceEvent(
+        turn=turn,
+        attacker=attack_msg,
+        white=white_msg,
+        break_signal=break_signal if break_signal else None,
+        running_score=running.R,
+        tactic=tactic,
+        timings=timings
+    ))
+    return break_signal
+
+def _timed_out(score: Score, error: DeadlineExceeded) -> Score:
+    """Mark the score of the turns finished before a budget ran out."""
+    return score.model_copy(update={"timed_out": True, "reason": f"Timed out: {error}"})
+
+def _restore(
+    resume_from: Optional[List[TraceEvent]],
+    history: List[Dict[str, str]],
+    attacker: AttackPolicy,
+    scorer: compose.ScoreAccumulator
+) -> Tuple[int, Optional[Dict]]:
+    """Rebuild history, attacker state and running score from a saved trace.
+    
+    Returns the next turn number and the break signal of the last restored
+    turn.
+    """
+    if not resume_from:
+        return 1, None
+    for expected, event in enumerate(resume_from, 1):
+        if event.turn != expected:
+            raise ValueError(f"Cannot resume: trace turn {event.turn} found where {expected} expected")
+        history.append({"attacker": event.attacker, "white": event.white})
+        scorer.add_turn(event.white, event.break_signal)
+    attacker.replay(history)
+    last = resume_from[-1]
+    return last.turn + 1, last.break_signal
 
 def run_dialog(
     white: Any,
     persona_data: PersonaCard,
     goal: Goal,
     rubric: Rubric,
-    seed: SeedCfg
+    seed: SeedCfg,
+    trace_sink: Optional[Any] = None,
+    resume_from: Optional[List[TraceEvent]] = None,
+    cache: Optional[ResponseCache] = None,
+    budgets: Optional[Budgets] = None,
+    deadline: Optional[Deadline] = None
 ) -> Tuple[Score, List[TraceEvent]]:
-    """Run a complete dialog between attacker and white agent."""
+    """Run a complete dialog between attacker and white agent.
+    
+    Args:
+        white: White agent with `respond(obs)` and `submit()`
+        persona_data: Persona the white agent must maintain
+        goal: Dialog parameters (horizon)
+        rubric: Scoring weights
+        seed: Attack tactics and RNG seed
+        trace_sink: Optional sink (e.g. `io_bus.TraceSink`) that receives each
+            TraceEvent as soon as its turn finishes. When given, events are
+            not kept in memory and the returned trace list is empty.
+        resume_from: Trace of turns already played (e.g. read back from a
+            crashed run). History and attacker state are rebuilt from it
+            and the dialog continues at the next turn; these events are not
+            re-emitted to the trace.
+        cache: Optional response cache for model-generated attack messages
+        budgets: Optional per-call and whole-dialog time limits. Limited
+            calls run in a daemon thread that is abandoned when its budget
+            runs out; the dialog is then scored as far as it got (marked
+            `timed_out`) or DeadlineExceeded is raised, per `on_timeout`.
+        deadline: Overall deadline shared with other work (e.g. the other
+            dialogs of an assessment); defaults to `budgets.total_s` from now
+    
+    Returns:
+        Final score and the in-memory trace.
+    """
     history: List[Dict[str, str]] = []
     trace: List[TraceEvent] = []
+    trace_out = trace if trace_sink is None else trace_sink
     
-    # Initialize attacker
-    attacker = AttackPolicy(seed.attack_set, seed.rng_seed)
+    # Initialize attacker, break detector and running scorer
+    attacker = make_attacker(seed, cache)
+    detector = breakdetect.BreakDetector(persona_data)
+    scorer = compose.ScoreAccumulator(persona_data, rubric, goal.horizon)
     
-    # Run dialog for specified turns
-    for turn in range(1, goal.horizon + 1):
-        # Get next attack message
-        attack_msg = attacker.next_message(history, persona_data)
-        
-        # Build observation for white agent
-        obs = Observation(
-            turn=turn,
-            attacker_msg=attack_msg,
-            persona=persona_data,
-            history_tail=history,  # Pass full history
-            limits={"max_turns": goal.horizon}
-        )
-        
-        # Get white agent response
-        white_msg = white.respond(obs)
-        
-        # Update history
-        history.append({
-            "attacker": attack_msg,
-            "white": white_msg
-        })
-        
-        # Check for breaks
-        break_signal = breakdetect.scan(white_msg, persona_data, history)
+    # Restore turns already played
+    first_turn, break_signal = _restore(resume_from, history, attacker, scorer)
+    budgets = budgets or Budgets()
+    deadline = deadline or Deadline(budgets.total_s)
+    
+    try:
+        # Run dialog for specified turns
+        for turn in range(first_turn, goal.horizon + 1):
+            if break_signal:
+                break
+            
+            # Get next attack message
+            start = time.perf_counter()
+            attack_msg = run_within(attacker.next_message, history, persona_data,
+                                    seconds=budgets.attacker_s, phase="attacker", deadline=deadline)
+            attacked = time.perf_counter()
+            
+            # Get white agent response
+            obs = _observe(turn, attack_msg, persona_data, history, goal)
+            white_msg = run_within(white.respond, obs, seconds=budgets.white_s, phase="white", deadline=deadline)
+            timings = _phase_times(start, attacked, time.perf_counter())
+            
+            # Stop if break detected
+            break_signal = _record_turn(turn, attack_msg, white_msg, detector, history,
+                                        trace_out, scorer, timings, attacker.tactic_name)
+            if break_signal:
+                break
         
-        # Record trace
-        # break_signal is already a dict or None
-        trace_event = TraceEvent(
-            turn=turn,
-            attacker=attack_msg,
-            white=white_msg,
-            break_signal=break_signal if break_signal else None
-        )
-        trace.append(trace_event)
+        # Get final response if dialog completed
+        if not break_signal:
+            final_msg = run_within(white.submit, seconds=budgets.white_s, phase="white", deadline=deadline)
+            history.append({"white": final_msg})
+            scorer.add_final(final_msg)
+    except DeadlineExceeded as e:
+        if budgets.on_timeout == "fail":
+            raise
+        return _timed_out(scorer.score(), e), trace
+    
+    return scorer.score(), trace
+
+async def arun_dialog(
+    white: Any,
+    persona_data: PersonaCard,
+    goal: Goal,
+    rubric: Rubric,
+    seed: SeedCfg,
+    trace_sink: Optional[Any] = None,
+    resume_from: Optional[List[TraceEvent]] = None,
+    cache: Optional[ResponseCache] = None,
+    executor: Optional[GradingExecutor] = None,
+    budgets: Optional[Budgets] = None,
+    deadline: Optional[Deadline] = None
+) -> Tuple[Score, List[TraceEvent]]:
+    """Run a complete dialog without blocking the event loop.
+
+    Async `respond`/`submit` methods are awaited directly; sync white agents
+    and the attacker run in worker threads so that many dialogs can proceed
+    concurrently on one loop. Scores and traces match `run_dialog`, and
+    `trace_sink`, `resume_from`, `cache`, `budgets` and `deadline` behave
+    the same way; async calls that run out of budget are cancelled.
+    
+    With an `executor`, break detection, grading, the safety scan and the
+    attacker's scan of each reply run in its worker threads or processes
+    too; otherwise they run on the loop or in the attacker's thread.
+    """
+    history: List[Dict[str, str]] = []
+    trace: List[TraceEvent] = []
+    trace_out = trace if trace_sink is None else trace_sink
+    
+    # Initialize attacker, break detector and running scorer
+    attacker = make_attacker(seed, cache)
+    detector = breakdetect.BreakDetector(persona_data)
+    scorer = compose.ScoreAccumulator(persona_data, rubric, goal.horizon)
+    
+    first_turn, break_signal = _restore(resume_from, history, attacker, scorer)
+    spec = turn_grading.grading_spec(persona_data, rubric) if executor is not None else None
+    budgets = budgets or Budgets()
+    deadline = deadline or Deadline(budgets.total_s)
+    
+    try:
+        for turn in range(first_turn, goal.horizon + 1):
+            if break_signal:
+                break
+            
+            start = time.perf_counter()
+            attack_msg = await arun_within(attacker.next_message, history, persona_data,
+                                           seconds=budgets.attacker_s, phase="attacker", deadline=deadline)
+            attacked = time.perf_counter()
+            
+            obs = _observe(turn, attack_msg, persona_data, history, goal)
+            white_msg = await arun_within(white.respond, obs, seconds=budgets.white_s, phase="white",
+                                          deadline=deadline)
+            timings = _phase_times(start, attacked, time.perf_counter())
+            
+            graded = None
+            if executor is not None:
+                graded = await executor.run(turn_grading.grade_turn, spec, white_msg, scorer.safety,
+                                            size=len(white_msg))
+            break_signal = _record_turn(turn, attack_msg, white_msg, detector, history,
+                                        trace_out, scorer, timings, attacker.tactic_name, graded)
+            if graded is not None:
+                attacker.index_reply(history, graded.reply_features)
+            if break_signal:
+                break
         
-        # Stop if break detected
-        if break_signal:
-            break
-    
-    # Get final response if dialog completed
-    if not break_signal:
-        final_msg = white.submit()
-        history.append({"white": final_msg})
-    
-    # Compute scores
-    persona_scores = persona.check_persona_adherence(
-        white_msg,
-        persona_data,
-        rubric
-    )
-    safety_score = safety.score_safety(history)
-    
-    # Compute final score
-    final_score = compose.final_score(
-        persona_scores,
-        break_signal,
-        safety_score,
-        len(history),
-        goal.horizon
-    )
+        if not break_signal:
+            final_msg = await arun_within(white.submit, seconds=budgets.white_s, phase="white", deadline=deadline)
+            history.append({"white": final_msg})
+            if executor is None:
+                scorer.add_final(final_msg)
+            else:
+                scorer.add_final(final_msg, await executor.run(turn_grading.scan_final, final_msg,
+                                                               scorer.safety, size=len(final_msg)))
+    except DeadlineExceeded as e:
+        if budgets.on_timeout == "fail":
+            raise
+        return _timed_out(scorer.score(), e), trace
     
-    return final_score, trace
+    return scorer.score(), trace
 
 def write_reports(
-    output_dir: Union[str, Path],
+    output_dir: Optional[Union[str, Path]],
     score: Score,
-    trace: List[TraceEvent]
+    trace: Optional[List[TraceEvent]],
+    report_dir: Optional[Path] = None,
+    run_info: Optional[Dict[str, Any]] = None,
+    trace_write_s: Optional[List[float]] = None
 ) -> Path:
-    """Write evaluation reports to directory."""
-    # Create reports directory with timestamp
-    report_dir = io_bus.make_report_dir()
+    """Write evaluation reports and publish the report directory.
     
-    # Write trace events
-    io_bus.write_trace(report_dir, trace)
+    Reports go to `report_dir` if given, otherwise to a new run directory
+    under `output_dir` (default `io_bus.reports_root()`). A staging
+    `.partial` directory is renamed to its final name once every file is
+    written; the final path is returned.
     
-    # Write scores
+    If the trace was already streamed into `report_dir`'s `trace.jsonl`,
+    pass `trace=None` and the sink's `write_seconds` as `trace_write_s`;
+    the summary then reads the events back from disk. With `run_info`
+    (agent, task, seed, config hash, ...) the run is also described in
+    `manifest.json` and appended to the results store.
+    
+    `scores.csv` and the summary report the per-event trace write times
+    and `report_write_s`, the time spent on everything written before them.
+    """
+    start = time.perf_counter()
+    if report_dir is None:
+        report_dir = io_bus.make_report_dir(output_dir)
+    
+    # Write trace events, or read back the streamed ones once
+    if trace is not None:
+        trace_write_s = io_bus.write_trace(report_dir, trace)
+    else:
+        trace = list(io_bus.read_trace(report_dir))
+    latency = io_bus.latency_stats(trace)
+    trace_write = io_bus.sample_stats(trace_write_s or [])
+    if trace_write is not None:
+        latency["trace_write"] = trace_write
+    
+    final_dir = io_bus.final_report_dir(report_dir)
+    if run_info is not None:
+        manifest = {**io_bus.read_manifest(report_dir), **run_info}
+        # Record the run for cross-run leaderboards; a resumed run that was
+        # recorded before it could be published is not recorded twice
+        if not manifest.get("recorded"):
+            try:
+                results_store.get_results_store().append_run(
+                    final_dir.name, run_info.get("agent"), run_info.get("task"), score,
+                    tactic=results_store.run_tactic(trace), seed=run_info.get("seed"))
+                manifest["recorded"] = True
+            except OSError as e:
+                print(f"Warning: could not record run in results store: {e}")
+        manifest.update({"run_id": final_dir.name, "finished": datetime.now().isoformat(timespec="seconds")})
+        io_bus.write_manifest(report_dir, manifest)
+    report_s = time.perf_counter() - start
+    
+    # Write scores, followed by per-phase latency percentiles
     scores_dict = {k: float(v) for k, v in score.model_dump().items() 
                   if k in ['P', 'B', 'S', 'E', 'R']}
+    scores_dict.update(io_bus.latency_rows(latency))
+    scores_dict["report_write_s"] = report_s
     io_bus.write_scores(report_dir, scores_dict)
     
     # Write summary
-    io_bus.write_summary(report_dir, score.model_dump(), trace)
+    io_bus.write_summary(report_dir, score.model_dump(), trace, latency, report_s)
     
-    return report_dir
+    return io_bus.finalize_report_dir(report_dir)
+
+def run_manifest(task_dir: Union[str, Path], white_name: str, seed: SeedCfg) -> Dict[str, Any]:
+    """Describe a run for its manifest; `config_hash` covers the task files, seed and agent."""
+    task_hash = taskcache.content_hash(task_dir)
+    return {
+        "agent": white_name,
+        "task": Path(task_dir).name,
+        "task_dir": str(Path(task_dir).resolve()),
+        "seed": seed.rng_seed,
+        "config_hash": io_bus.config_hash({
+            "task": task_hash,
+            "seed": seed.model_dump(),
+            "agent": white_name,
+        }),
+    }
+
+def make_white(
+    white_name: str,
+    persona_data: PersonaCard,
+    cache: Optional[ResponseCache] = None,
+    service: Optional[Any] = None
+) -> Any:
+    """Instantiate the named white agent baseline for a persona.
+
+    Agents come from `baselines.registry`, which imports each one (and its
+    model libraries) only when it is first built.
+
+    `cache` is handed to the model-backed agents; template agents ignore it.
+    `service` is an optional `BatchGenerationService` shared by `llm` agents.
+    """
+    return create_white_agent(white_name, persona_data, cache=cache, service=service)
 
 def run_task(
     task_dir: str,
     white_name: str,
-    seed_override: Optional[int] = None
+    seed_override: Optional[int] = None,
+    resume: Optional[Union[str, Path]] = None,
+    cache: Optional[ResponseCache] = None,
+    budgets: Optional[Budgets] = None
 ) -> int:
     """Run complete evaluation task.
     
@@ -144,6 +408,14 @@ def run_task(
         task_dir: Path to task directory
         white_name: Name of white agent to use ('prompt' or 'tool')
         seed_override: Optional RNG seed override
+        resume: Optional report directory of an interrupted run with the
+            same task, agent and seed; its saved turns are replayed instead
+            of being generated again
+        cache: Optional response cache for model-backed white agents and
+            the attacker
+        budgets: Optional time limits (default: `Budgets.from_env()`). A
+            run that fails on timeout keeps its `.partial` directory, so it
+            can be resumed
     
     Returns:
         Exit code (0 for success, 1 for error)
@@ -157,26 +429,41 @@ def run_task(
             seed.rng_seed = seed_override
         
         # Initialize white agent
-        if white_name == "prompt":
-            white = PromptAgent(persona_data)
-        elif white_name == "tool":
-            white = ToolAgent(persona_data)
-        elif white_name == "llm":
-            white = LocalModelAgent(persona_data, model_name="distilgpt2")
-        elif white_name == "openai":
-            from .baselines.openai_model_agent import OpenAIModelAgent
-            white = OpenAIModelAgent(persona_data, model_name="gpt-3.5-turbo")
-        elif white_name == "claude":
-            from .baselines.claude_model_agent import ClaudeModelAgent
-            white = ClaudeModelAgent(persona_data, model_name="claude-sonnet-4-5")
+        white = make_white(white_name, persona_data, cache=cache)
+        
+        # Restore turns from an interrupted run
+        manifest = run_manifest(task_dir, white_name, seed)
+        resume_from: List[TraceEvent] = []
+        if resume is not None:
+            report_dir = Path(resume)
+            previous = io_bus.read_manifest(report_dir).get("config_hash")
+            if previous is not None and previous != manifest["config_hash"]:
+                raise ValueError(f"{report_dir} was run with a different task, seed or agent")
+            resume_from = list(io_bus.read_trace(report_dir))
+            print(f"Resuming from turn {len(resume_from) + 1} in {report_dir}")
         else:
-            raise ValueError(f"Unknown white agent: {white_name}")
+            report_dir = io_bus.make_report_dir()
+            manifest.update({"run_id": io_bus.final_report_dir(report_dir).name,
+                             "created": datetime.now().isoformat(timespec="seconds")})
+            io_bus.write_manifest(report_dir, manifest)
         
-        # Run dialog
-        score, trace = run_dialog(white, persona_data, goal, rubric, seed)
+        # Run dialog, streaming each turn to the report's trace.jsonl
+        with io_bus.TraceSink(report_dir) as sink:
+            # Rewrite restored turns first, dropping any line cut off by a crash
+            for event in resume_from:
+                sink.append(event)
+            sink.flush()
+            score, _ = run_dialog(white, persona_data, goal, rubric, seed, trace_sink=sink,
+                                  resume_from=resume_from, cache=cache,
+                                  budgets=budgets or Budgets.from_env())
+        trace_write_s = sink.write_seconds
+        if score.timed_out:
+            print(f"{score.reason}; scoring the {score.turns} turn(s) played")
         
         # Write reports
-        report_dir = write_reports(Path("reports"), score, trace)
+        manifest["timed_out"] = score.timed_out
+        report_dir = write_reports(None, score, None, report_dir=report_dir, run_info=manifest,
+                                   trace_write_s=trace_write_s)
         
         print(f"\nEvaluation complete. Reports written to: {report_dir}")
         return 0
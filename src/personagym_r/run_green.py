@@ -3,40 +3,219 @@ import typer
 from pathlib import Path
 from rich.console import Console
 from rich.table import Table
-from typing import Optional
+from typing import List, Optional
 
+from .baselines.registry import available_white_agents
 from .orchestrator import run_task
+from .tools.cache import DEFAULT_CACHE_PATH, ResponseCache
+from .tools.timeouts import ON_TIMEOUT_MODES, Budgets
 
 app = typer.Typer()
 console = Console()
 
-@app.command()
+@app.callback(invoke_without_command=True)
 def main(
-    task: str = typer.Option(..., "--task", help="Path to task directory"),
-    white: str = typer.Option(..., "--white", help="White agent to use (prompt/tool/llm)"),
-    seed: Optional[int] = typer.Option(None, "--seed", help="Optional RNG seed override")
+    ctx: typer.Context,
+    task: Optional[str] = typer.Option(None, "--task", help="Path to task directory"),
+    white: Optional[str] = typer.Option(None, "--white", help="White agent to use (prompt/tool/llm/openai/claude or a plugin)"),
+    seed: Optional[int] = typer.Option(None, "--seed", help="Optional RNG seed override"),
+    resume: Optional[str] = typer.Option(None, "--resume", help="Report directory of an interrupted run to continue"),
+    cache: bool = typer.Option(False, "--cache", help="Reuse model responses for identical prompts"),
+    cache_path: str = typer.Option(str(DEFAULT_CACHE_PATH), "--cache-path", help="SQLite file backing the response cache"),
+    cache_readonly: bool = typer.Option(False, "--cache-readonly", help="Serve cached responses without recording new ones"),
+    white_timeout: Optional[float] = typer.Option(None, "--white-timeout", help="Seconds allowed per white agent reply"),
+    attacker_timeout: Optional[float] = typer.Option(None, "--attacker-timeout", help="Seconds allowed per attack message"),
+    timeout: Optional[float] = typer.Option(None, "--timeout", help="Seconds allowed for the whole dialog"),
+    on_timeout: Optional[str] = typer.Option(None, "--on-timeout", help="When a budget runs out: score (turns so far) or fail")
 ):
     """Run a PersonaGym-R evaluation task."""
+    if ctx.invoked_subcommand is not None:
+        return
+    if task is None or white is None:
+        console.print("[red]Error:[/] --task and --white are required")
+        raise typer.Exit(1)
+
     # Validate task directory
     task_path = Path(task)
     if not task_path.is_dir():
         console.print(f"[red]Error:[/] Task directory not found: {task}")
         raise typer.Exit(1)
-    
+
     # Validate white agent
-    if white not in ["prompt", "tool", "llm", "openai", "claude"]:
+    white_agents = available_white_agents()
+    if white not in white_agents:
         console.print(f"[red]Error:[/] Invalid white agent: {white}")
-        console.print("Must be one of: prompt, tool, llm, openai, claude")
+        console.print(f"Must be one of: {', '.join(white_agents)}")
+        raise typer.Exit(1)
+
+    # Validate resume directory
+    if resume is not None and not (Path(resume) / "trace.jsonl").is_file():
+        console.print(f"[red]Error:[/] No trace.jsonl to resume in: {resume}")
         raise typer.Exit(1)
-    
+
+    if on_timeout is not None and on_timeout not in ON_TIMEOUT_MODES:
+        console.print(f"[red]Error:[/] --on-timeout must be one of: {', '.join(ON_TIMEOUT_MODES)}")
+        raise typer.Exit(1)
+    budgets = Budgets.from_env(white_s=white_timeout, attacker_s=attacker_timeout,
+                               total_s=timeout, on_timeout=on_timeout)
+
     # Run evaluation
     console.print(f"\nRunning evaluation with {white} agent...")
-    exit_code = run_task(str(task_path), white, seed)
-    
+    response_cache = ResponseCache(cache_path, read_only=cache_readonly) if cache or cache_readonly else None
+    try:
+        exit_code = run_task(str(task_path), white, seed, resume=resume, cache=response_cache, budgets=budgets)
+    finally:
+        if response_cache is not None:
+            response_cache.close()
+
     if exit_code != 0:
         console.print("\n[red]Evaluation failed[/]")
-    
+
     raise typer.Exit(exit_code)
 
+@app.command()
+def batch(
+    task: List[str] = typer.Option(..., "--task", help="Task directory, or a directory of tasks (repeatable)"),
+    white: List[str] = typer.Option(..., "--white", help="White agent to use (repeatable)"),
+    seed: Optional[List[int]] = typer.Option(None, "--seed", help="RNG seed to sweep (repeatable)"),
+    workers: Optional[int] = typer.Option(None, "--workers", help="Worker processes (default: CPU cores)"),
+    cache: bool = typer.Option(False, "--cache", help="Reuse model responses for identical prompts"),
+    cache_path: str = typer.Option(str(DEFAULT_CACHE_PATH), "--cache-path", help="SQLite file backing the response cache"),
+    cache_readonly: bool = typer.Option(False, "--cache-readonly", help="Serve cached responses without recording new ones"),
+    llm_batch_size: int = typer.Option(1, "--llm-batch-size", help="Local-model dialogs batched per generate call (faster, not reproducible; 1 disables)")
+):
+    """Run a tasks x seeds x white agents sweep across a process pool."""
+    from .batch import discover_tasks, run_batch, write_batch_report
+
+    tasks = discover_tasks(task)
+    if not tasks:
+        console.print(f"[red]Error:[/] No task directories found in: {', '.join(task)}")
+        raise typer.Exit(1)
+
+    white_agents = available_white_agents()
+    invalid = [w for w in white if w not in white_agents]
+    if invalid:
+        console.print(f"[red]Error:[/] Invalid white agent: {', '.join(invalid)}")
+        console.print(f"Must be one of: {', '.join(white_agents)}")
+        raise typer.Exit(1)
+
+    n_cells = len(tasks) * len(white) * max(1, len(seed or []))
+    console.print(f"\nRunning {n_cells} evaluation(s) over {len(tasks)} task(s)...")
+    rows = run_batch(
+        tasks, white, seed, workers,
+        cache_path=cache_path if cache or cache_readonly else None,
+        cache_readonly=cache_readonly,
+        llm_batch_size=llm_batch_size
+    )
+    report_dir = write_batch_report(rows)
+
+    table = Table(title="Batch Results")
+    for col in ["task", "seed", "white", "P", "B", "S", "R", "turns", "broke"]:
+        table.add_column(col)
+    for row in rows:
+        if row.get("error"):
+            table.add_row(row["task"], str(row["seed"]), row["white"],
+                          "-", "-", "-", "-", "-", f"[red]{row['error']}[/]")
+            continue
+        table.add_row(
+            row["task"], str(row["seed"]), row["white"],
+            *(f"{row[k]:.3f}" for k in ["P", "B", "S", "R"]),
+            str(row["turns"]), str(row["broke"])
+        )
+    console.print(table)
+    console.print(f"\nBatch complete. Results written to: {report_dir / 'batch_results.csv'}")
+
+    failed = sum(1 for row in rows if row.get("error"))
+    if failed:
+        console.print(f"\n[red]{failed} evaluation(s) failed[/]")
+        raise typer.Exit(1)
+
+@app.command()
+def warm(
+    model: Optional[List[str]] = typer.Option(None, "--model", help="Hugging Face model to preload (repeatable)")
+):
+    """Load local models into the process-wide registry and report their size."""
+    from .baselines.model_registry import get_registry
+    from .baselines.registry import LOCAL_MODEL_NAME
+
+    names = model or [LOCAL_MODEL_NAME]
+    try:
+        get_registry().warm(names)
+    except Exception as e:
+        console.print(f"[red]Error:[/] Could not load model: {e}")
+        raise typer.Exit(1)
+
+    stats = get_registry().stats()
+    for name, info in stats["models"].items():
+        console.print(f"{name}: {info['bytes'] / 2**20:.1f} MiB")
+
+@app.command("compile-tasks")
+def compile_tasks(
+    tasks: str = typer.Option("tasks", "--tasks", help="Directory of task directories"),
+    out: Optional[str] = typer.Option(None, "--out", help="Pack path (default: <tasks>/catalog.pack)")
+):
+    """Validate every task into a catalog pack that load_task reads without parsing JSON."""
+    from .tools.taskcache import compile_catalog
+
+    if not Path(tasks).is_dir():
+        console.print(f"[red]Error:[/] Tasks directory not found: {tasks}")
+        raise typer.Exit(1)
+
+    path, compiled, errors = compile_catalog(tasks, out)
+    console.print(f"Compiled {len(compiled)} task(s) into {path}")
+    for task_id, error in errors.items():
+        console.print(f"[yellow]Skipped {task_id}:[/] {error}")
+
+@app.command("import-reports")
+def import_reports_cmd(
+    reports: Optional[str] = typer.Option(None, "--reports", help="Directory of report directories (default: $PERSONAGYM_REPORTS_DIR or reports)"),
+    store: Optional[str] = typer.Option(None, "--store", help="Results store (default: $PERSONAGYM_RESULTS_DIR or <reports>/results)")
+):
+    """Backfill the results store from existing report directories."""
+    from .tools.io_bus import reports_root
+    from .tools.results_store import ResultsStore, get_results_store, import_reports
+
+    reports_dir = Path(reports) if reports else reports_root()
+    if not reports_dir.is_dir():
+        console.print(f"[red]Error:[/] Reports directory not found: {reports_dir}")
+        raise typer.Exit(1)
+    results = ResultsStore(store) if store else get_results_store()
+    imported, skipped = import_reports(results, reports_dir)
+    console.print(f"Imported {imported} run(s) into {results.path} ({skipped} already present)")
+
+@app.command()
+def leaderboard(
+    by: str = typer.Option("agent,task,tactic", "--by", help="Comma-separated grouping: agent, task, tactic"),
+    store: Optional[str] = typer.Option(None, "--store", help="Results store (default: $PERSONAGYM_RESULTS_DIR or <reports>/results)"),
+    top: Optional[int] = typer.Option(None, "--top", help="Show only the best N rows")
+):
+    """Aggregate stored runs into a leaderboard ranked by mean overall score."""
+    from .tools.results_store import ResultsStore, get_results_store
+    from .tools.results_store import leaderboard as build_leaderboard
+
+    columns = [c.strip() for c in by.split(",") if c.strip()]
+    results = ResultsStore(store) if store else get_results_store()
+    try:
+        rows = build_leaderboard(results, columns)
+    except ValueError as e:
+        console.print(f"[red]Error:[/] {e}")
+        raise typer.Exit(1)
+    if top is not None:
+        rows = rows[:top]
+
+    table = Table(title=f"Leaderboard ({len(results)} runs)")
+    for col in columns + ["Runs", "R", "±95%", "P", "B", "S", "Break rate", "Break turn"]:
+        table.add_column(col.capitalize() if col in columns else col)
+    for row in rows:
+        table.add_row(
+            *(row[c] for c in columns),
+            str(row["runs"]),
+            f"{row['R']:.3f}", f"{row['R_ci95']:.3f}",
+            *(f"{row[k]:.3f}" for k in ["P", "B", "S"]),
+            f"{row['break_rate']:.1%}",
+            "-" if row["break_turn"] is None else f"{row['break_turn']:.1f}"
+        )
+    console.print(table)
+
 if __name__ == "__main__":
-    app()
\ No newline at end of file
+    app()
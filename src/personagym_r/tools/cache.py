@@ -0,0 +1,133 @@
+"""Content-addressed response cache for LLM-backed agents."""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+DEFAULT_CACHE_PATH = Path(".cache") / "responses.sqlite"
+
+def cache_key(model: str, params: Dict[str, Any], prompt: str) -> str:
+    """Hash (model name, generation params, prompt) into a cache key."""
+    payload = json.dumps(
+        {"model": model, "params": params, "prompt": prompt},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """Two-tier response cache: in-memory LRU in front of an optional SQLite file.
+
+    Entries are keyed by `cache_key`, so a byte-identical prompt sent to the
+    same model with the same parameters is only generated once. The cache is
+    safe to share between threads; separate processes may share the SQLite
+    file.
+    """
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        max_entries: int = 1024,
+        read_only: bool = False
+    ):
+        """Open the cache.
+
+        Args:
+            path: SQLite file for the persistent tier; None keeps the cache
+                in memory only
+            max_entries: Capacity of the in-memory LRU tier
+            read_only: Serve hits but never write new entries to disk
+        """
+        self.path = Path(path) if path is not None else None
+        self.max_entries = max_entries
+        self.read_only = read_only
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        if self.path is not None:
+            if read_only:
+                if self.path.exists():
+                    self._db = sqlite3.connect(
+                        f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+                    )
+            else:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(str(self.path), timeout=30.0, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, model TEXT, response TEXT, created REAL)"
+                )
+                self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a response, promoting disk hits into memory."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return value
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT response FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.OperationalError:
+                    row = None  # Read-only file without the table yet
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str, model: str = "") -> None:
+        """Store a response in memory and, unless read-only, on disk."""
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None and not self.read_only:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, created) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, model, value, time.time())
+                )
+                self._db.commit()
+
+    def get_or_compute(
+        self,
+        model: str,
+        params: Dict[str, Any],
+        prompt: str,
+        compute: Callable[[], str]
+    ) -> str:
+        """Return the cached response for a call, generating it on a miss."""
+        key = cache_key(model, params, prompt)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value, model)
+        return value
+
+    def _remember(self, key: str, value: str) -> None:
+        """Insert into the LRU tier, evicting the oldest entry when full."""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,83 @@
+"""Executors that keep CPU-bound grading and report writing off the event loop."""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_PROCESS_MIN_CHARS = 2000
+
+class GradingExecutor:
+    """Thread pool for short jobs, with an optional process pool for long ones.
+
+    `run(fn, *args, size=n)` awaits `fn(*args)` in a worker. Calls whose
+    `size` (e.g. reply length in characters) reaches `process_min_chars`
+    go to the process pool, where regex scans cannot hold the event loop's
+    GIL; shorter calls go to the thread pool, which is cheaper than
+    pickling them to another process. With `processes=0` everything runs
+    in threads. Functions sent to processes must be importable and their
+    arguments picklable.
+    """
+    def __init__(
+        self,
+        processes: int = 0,
+        threads: int = 4,
+        process_min_chars: int = DEFAULT_PROCESS_MIN_CHARS
+    ):
+        self.processes = max(0, processes)
+        self.threads = max(1, threads)
+        self.process_min_chars = process_min_chars
+        self.calls: Dict[str, int] = {"thread": 0, "process": 0}
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self, kind: str):
+        with self._lock:
+            if kind == "process":
+                if self._process_pool is None:
+                    # Forking a process that runs an event loop and worker threads is unsafe
+                    methods = multiprocessing.get_all_start_methods()
+                    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                    self._process_pool = ProcessPoolExecutor(self.processes, mp_context=context)
+                return self._process_pool
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(self.threads, thread_name_prefix="grading")
+            return self._thread_pool
+
+    def pool_for(self, size: int) -> str:
+        """Which pool ("thread" or "process") a call of `size` goes to."""
+        return "process" if self.processes and size >= self.process_min_chars else "thread"
+
+    async def run(self, fn: Callable[..., Any], *args: Any, size: int = 0) -> Any:
+        """Run `fn(*args)` in the pool chosen by `size` and return its result."""
+        kind = self.pool_for(size)
+        self.calls[kind] += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(kind), partial(fn, *args))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop both pools; they are recreated on the next call."""
+        with self._lock:
+            pools = [self._thread_pool, self._process_pool]
+            self._thread_pool = self._process_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=wait)
+
+def executor_from_env() -> GradingExecutor:
+    """Build an executor sized by the environment.
+
+    PERSONAGYM_GRADING_WORKERS sets the process count (default 2, 0 for
+    threads only), PERSONAGYM_GRADING_THREADS the thread count (default 4)
+    and PERSONAGYM_GRADING_PROCESS_MIN_CHARS the reply length from which
+    calls go to processes (default 2000).
+    """
+    return GradingExecutor(
+        processes=int(os.environ.get("PERSONAGYM_GRADING_WORKERS", "2")),
+        threads=int(os.environ.get("PERSONAGYM_GRADING_THREADS", "4")),
+        process_min_chars=int(os.environ.get("PERSONAGYM_GRADING_PROCESS_MIN_CHARS",
+                                             str(DEFAULT_PROCESS_MIN_CHARS)))
+    )
@@ -1,9 +1,14 @@
 """IO utilities for logging trace events."""
+import csv
+import hashlib
 import json
+import math
 import os
+import time
+import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 from ..api_schema import TraceEvent
 
@@ -14,39 +19,244 @@ def ensure_dir(path: str | Path) -> Path:
     return path
 
 class JsonlWriter:
-    """JSONL file writer with proper flushing and error handling."""
-    def __init__(self, path: str | Path):
+    """JSONL file writer with proper flushing and error handling.
+    
+    By default every line is flushed as it is written. Passing
+    `flush_interval` (seconds) and/or `flush_bytes` buffers lines instead
+    and flushes once either threshold is reached, and on close.
+    """
+    def __init__(
+        self,
+        path: str | Path,
+        mode: str = 'w',
+        flush_interval: Optional[float] = None,
+        flush_bytes: Optional[int] = None
+    ):
         """Initialize writer for the given path."""
         self.path = Path(path)
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.file = open(self.path, 'w', encoding='utf-8')
+        self.file = open(self.path, mode, encoding='utf-8')
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self._buffer: List[str] = []
+        self._pending = 0
+        self._last_flush = time.monotonic()
     
     def write(self, obj: Any) -> None:
         """Write an object as a JSON line."""
-        self.file.write(json.dumps(obj) + '\n')
+        line = json.dumps(obj) + '\n'
+        if self.flush_interval is None and self.flush_bytes is None:
+            self.file.write(line)
+            self.file.flush()
+            return
+        
+        self._buffer.append(line)
+        self._pending += len(line)
+        if (self.flush_bytes is not None and self._pending >= self.flush_bytes) or \
+                (self.flush_interval is not None
+                 and time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+    
+    def flush(self) -> None:
+        """Write out buffered lines and flush the file."""
+        if self._buffer:
+            self.file.write(''.join(self._buffer))
+            self._buffer.clear()
+            self._pending = 0
         self.file.flush()
+        self._last_flush = time.monotonic()
     
     def close(self) -> None:
-        """Close the file."""
-        self.file.close()
-
-def make_report_dir() -> Path:
-    """Create a timestamped report directory."""
-    base = Path("reports")
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    path = ensure_dir(base / ts)
+        """Flush buffered lines and close the file."""
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+    
+    def __enter__(self) -> "JsonlWriter":
+        return self
+    
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+class TraceSink:
+    """Streams TraceEvents to `trace.jsonl` in a report directory as they happen.
+    
+    Pass it as `trace_sink` to `run_dialog` so each turn is persisted when
+    it finishes. Lines are buffered and flushed every `flush_interval`
+    seconds or `flush_bytes` bytes, whichever comes first. `write_seconds`
+    holds the time each event took to write, including any flush it set off.
+    """
+    def __init__(
+        self,
+        path: str | Path,
+        flush_interval: Optional[float] = 1.0,
+        flush_bytes: Optional[int] = 64 * 1024,
+        mode: str = 'w'
+    ):
+        """Open `trace.jsonl` under the report directory `path`."""
+        self.writer = JsonlWriter(
+            Path(path) / "trace.jsonl",
+            mode=mode,
+            flush_interval=flush_interval,
+            flush_bytes=flush_bytes
+        )
+        self.count = 0
+        self.write_seconds: List[float] = []
+    
+    def append(self, event: TraceEvent) -> None:
+        """Persist one event."""
+        start = time.perf_counter()
+        self.writer.write(event.model_dump() if hasattr(event, "model_dump") else event)
+        self.write_seconds.append(time.perf_counter() - start)
+        self.count += 1
+    
+    def flush(self) -> None:
+        """Force buffered events to disk."""
+        self.writer.flush()
+    
+    def close(self) -> None:
+        """Flush and close the trace file."""
+        start = time.perf_counter()
+        self.writer.close()
+        if self.write_seconds:
+            # The last event is only on disk once the final flush is done
+            self.write_seconds[-1] += time.perf_counter() - start
+    
+    def __enter__(self) -> "TraceSink":
+        return self
+    
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+PARTIAL_SUFFIX = ".partial"
+
+def reports_root() -> Path:
+    """Root of all report directories: PERSONAGYM_REPORTS_DIR or `reports`."""
+    return Path(os.environ.get("PERSONAGYM_REPORTS_DIR", "reports"))
+
+def new_run_id() -> str:
+    """Sortable, collision-free run id: timestamp plus a random suffix."""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+def make_report_dir(root: Optional[str | Path] = None, run_id: Optional[str] = None) -> Path:
+    """Create a staging directory for a new run's reports.
+    
+    Files are written to `<root>/<run_id>.partial` and only appear under
+    their final name once `finalize_report_dir` renames the directory, so
+    readers never see a half-written run. An interrupted run is left as
+    `.partial` and can be resumed from there.
+    """
+    root = Path(root) if root is not None else reports_root()
+    path = root / f"{run_id or new_run_id()}{PARTIAL_SUFFIX}"
+    path.mkdir(parents=True, exist_ok=False)
+    return path
+
+def final_report_dir(path: str | Path) -> Path:
+    """Name a staging directory will have once finalized."""
+    path = Path(path)
+    if path.name.endswith(PARTIAL_SUFFIX):
+        return path.with_name(path.name[:-len(PARTIAL_SUFFIX)])
     return path
 
-def write_trace(path: Path, events: List[TraceEvent]) -> None:
-    """Write trace events to a JSONL file."""
+def finalize_report_dir(path: str | Path) -> Path:
+    """Atomically publish a staging directory under its final name.
+    
+    Directories that are not staged (e.g. a finished run that was
+    re-written in place) are returned unchanged.
+    """
+    path = Path(path)
+    final = final_report_dir(path)
+    if final != path:
+        os.rename(path, final)
+    return final
+
+def write_manifest(path: Path, manifest: Dict[str, Any]) -> None:
+    """Write `manifest.json`, describing what produced a report directory."""
+    tmp = path / "manifest.json.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True, default=str), encoding='utf-8')
+    os.replace(tmp, path / "manifest.json")
+
+def read_manifest(path: Path) -> Dict[str, Any]:
+    """Read a report directory's manifest; empty if it has none."""
+    try:
+        return json.loads((Path(path) / "manifest.json").read_text(encoding='utf-8'))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def config_hash(config: Dict[str, Any]) -> str:
+    """Stable SHA-256 of a JSON-serializable run configuration."""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def write_trace(path: Path, events: List[TraceEvent]) -> List[float]:
+    """Write trace events to a JSONL file; returns the seconds each event took to write."""
     writer = JsonlWriter(path / "trace.jsonl")
+    seconds = []
     for event in events:
+        start = time.perf_counter()
         # If event is a pydantic object, use model_dump; if dict, use as is
         if hasattr(event, "model_dump"):
             writer.write(event.model_dump())
         else:
             writer.write(event)
+        seconds.append(time.perf_counter() - start)
     writer.close()
+    return seconds
+
+def read_trace(path: Path) -> Iterator[TraceEvent]:
+    """Iterate over the trace events saved in a report directory.
+    
+    A truncated last line, left behind by a crash mid-write, is skipped.
+    """
+    with open(Path(path) / "trace.jsonl", encoding='utf-8') as f:
+        for line in f:
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            yield TraceEvent.model_validate(data)
+
+TIMING_PHASES = ["attacker", "white", "breakdetect", "grading"]
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a sorted, non-empty list."""
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+def sample_stats(seconds: Iterable[float]) -> Optional[Dict[str, float]]:
+    """p50/p95/max and total of some timings, or None without any."""
+    values = sorted(seconds)
+    if not values:
+        return None
+    return {
+        "p50": _percentile(values, 50),
+        "p95": _percentile(values, 95),
+        "max": values[-1],
+        "total": sum(values),
+    }
+
+def latency_stats(trace: Iterable[TraceEvent]) -> Dict[str, Dict[str, float]]:
+    """p50/p95/max and total seconds per timed phase across a trace."""
+    samples: Dict[str, List[float]] = {}
+    for evt in trace:
+        for phase, seconds in (evt.timings or {}).items():
+            samples.setdefault(phase, []).append(seconds)
+    
+    order = TIMING_PHASES + sorted(p for p in samples if p not in TIMING_PHASES)
+    stats = {}
+    for phase in order:
+        values = sample_stats(samples.get(phase, []))
+        if values is not None:
+            stats[phase] = values
+    return stats
+
+def latency_rows(stats: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    """Flatten `latency_stats` into `scores.csv` rows such as `white_p95_s`."""
+    return {
+        f"{phase}_{stat}_s": value
+        for phase, values in stats.items()
+        for stat, value in values.items() if stat != "total"
+    }
 
 def write_scores(path: Path, scores: Dict[str, float]) -> None:
     """Write scores to a CSV file."""
@@ -55,8 +265,19 @@ def write_scores(path: Path, scores: Dict[str, float]) -> None:
         for k, v in scores.items():
             f.write(f"{k},{v}\n")
 
-def write_summary(path: Path, score: Dict[str, Any], trace: List[TraceEvent]) -> None:
-    """Write a Markdown summary report."""
+def write_summary(
+    path: Path,
+    score: Dict[str, Any],
+    trace: Iterable[TraceEvent],
+    latency: Optional[Dict[str, Dict[str, float]]] = None,
+    report_s: Optional[float] = None
+) -> None:
+    """Write a Markdown summary report.
+    
+    `latency` is the output of `latency_stats` for the same trace, plus any
+    other timed steps such as `trace_write`; `report_s` is the time spent
+    writing the report before the summary.
+    """
     with open(path / "summary.md", 'w', encoding='utf-8') as f:
         f.write("# PersonaGym-R Evaluation Report\n\n")
         f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
@@ -77,6 +298,17 @@ def write_summary(path: Path, score: Dict[str, Any], trace: List[TraceEvent]) ->
         else:
             f.write("No breaks detected\n")
         
+        # Time spent per phase
+        if latency:
+            f.write("\n## Latency\n\n")
+            f.write("| Phase | p50 (ms) | p95 (ms) | max (ms) | total (s) |\n")
+            f.write("|-------|----------|----------|----------|-----------|\n")
+            for phase, st in latency.items():
+                f.write(f"| {phase} | {st['p50'] * 1000:.2f} | {st['p95'] * 1000:.2f} | "
+                        f"{st['max'] * 1000:.2f} | {st['total']:.3f} |\n")
+        if report_s is not None:
+            f.write(f"\nReport written in {report_s * 1000:.2f} ms\n")
+        
         # Dialog summary
         f.write("\n## Dialog Summary\n\n")
         f.write(f"Total turns: {score['turns']}\n\n")
@@ -85,4 +317,21 @@ def write_summary(path: Path, score: Dict[str, Any], trace: List[TraceEvent]) ->
             f.write(f"**Attacker**: {evt.attacker}\n\n")
             f.write(f"**White**: {evt.white}\n\n")
             if evt.break_signal:
-                f.write(f"*Break detected: {evt.break_signal}*\n\n")
\ No newline at end of file
+                f.write(f"*Break detected: {evt.break_signal}*\n\n")
+            if evt.running_score is not None:
+                f.write(f"*Running score: {evt.running_score:.3f}*\n\n")
+
+def write_batch_results(path: Path, rows: List[Dict[str, Any]]) -> Path:
+    """Write combined batch results to a CSV file."""
+    out = path / "batch_results.csv"
+    columns: List[str] = []
+    for row in rows:
+        for k in row:
+            if k not in columns:
+                columns.append(k)
+    with open(out, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+    return out
@@ -0,0 +1,205 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Counters, gauges and histograms keep one shard of values per thread, so
+recording a sample never takes a lock; the shards are only summed when the
+metrics are rendered.
+"""
+import bisect
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets in seconds, from sub-millisecond grading to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    """A named metric family whose values live in per-thread shards."""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[LabelValues, object]] = []
+        self._shards_lock = threading.Lock()  # Taken once per thread, on its first sample
+
+    def _shard(self) -> Dict[LabelValues, object]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _snapshots(self) -> List[List[Tuple[LabelValues, object]]]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [list(shard.items()) for shard in shards]
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        """(suffix, label values, value) for every series."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, value in self.samples():
+            names = self.labelnames + (("le",) if suffix == "_bucket" else ())
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    """Monotonically increasing count; by convention its name ends in `_total`."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        key = self._key(labels)
+        return sum(v for snap in self._snapshots() for k, v in snap if k == key)
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        totals: Dict[LabelValues, float] = {}
+        for snap in self._snapshots():
+            for key, value in snap:
+                totals[key] = totals.get(key, 0) + value
+        return [("", key, totals[key]) for key in sorted(totals)]
+
+class Gauge(Counter):
+    """Value that goes up and down, such as work in flight."""
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    """Distribution of observations over cumulative buckets."""
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        counts = shard.get(key)
+        if counts is None:
+            # One slot per bucket plus +Inf, then the running sum
+            counts = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        totals: Dict[LabelValues, List[float]] = {}
+        for snap in self._snapshots():
+            for key, counts in snap:
+                acc = totals.setdefault(key, [0] * len(counts))
+                for i, c in enumerate(list(counts)):
+                    acc[i] += c
+        samples = []
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for key in sorted(totals):
+            counts = totals[key]
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                samples.append(("_bucket", key + (bound,), cumulative))
+            samples.append(("_sum", key, counts[-1]))
+            samples.append(("_count", key, cumulative))
+        return samples
+
+class CallbackMetric(_Metric):
+    """Counter or gauge read from a callback at render time, e.g. a cache's own stats."""
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = (),
+        kind: str = "gauge"
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        values = self.callback()
+        return [("", key, values[key]) for key in sorted(values)]
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together."""
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = (),
+        kind: str = "gauge"
+    ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, callback, labelnames, kind))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        """All metrics in the text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,256 @@
+"""Client-side rate limits for model provider APIs.
+
+One `ProviderLimiter` per (provider, model) holds token buckets for
+requests and tokens per minute plus an optional cap on calls in flight.
+Every thread and task of the process shares it through `limiter_for`, so
+concurrent dialogs queue for the quota instead of racing into 429s. A 429
+pauses the whole limiter for the server's Retry-After before the call is
+retried.
+
+The limiter is synchronous: waits block the calling thread. Every
+provider SDK call in the package is synchronous too, and the async green
+agent servers run them with `asyncio.to_thread`. Tasks on the event loop
+therefore share the limiter exactly as threads do, and a call waiting for
+quota never blocks the loop.
+
+Limits come from PERSONAGYM_<PROVIDER>_RPM, _TPM and _CONCURRENCY (e.g.
+PERSONAGYM_ANTHROPIC_TPM) and apply to each model separately; unset means
+unlimited. They are per process: `share_quota(n)` splits them between n
+worker processes.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from .metrics import Counter, Histogram
+from .retry import RETRYABLE_STATUS, RetryPolicy, retry_after_seconds
+
+T = TypeVar('T')
+
+# Seconds spent waiting for quota, and 429s, for the green agent's /metrics
+QUEUE_WAIT_SECONDS = Histogram(
+    "personagym_ratelimit_wait_seconds", "Time provider calls waited for rate-limit quota",
+    ["provider", "model"])
+THROTTLED = Counter(
+    "personagym_ratelimit_throttled_total", "Provider calls rejected with 429", ["provider", "model"])
+
+# Providers also answer 529 when overloaded
+_RETRYABLE = RETRYABLE_STATUS | {529}
+_TRANSIENT_ERRORS = ("APIConnectionError", "APITimeoutError", "Timeout", "ServiceUnavailableError")
+
+_limiters: Dict[Tuple[str, str], "ProviderLimiter"] = {}
+_limiters_lock = threading.Lock()
+_share = 1
+
+class TokenBucket:
+    """Refills continuously at `per_minute / 60` per second, holding at most a minute's worth.
+
+    `reserve` takes tokens at once, letting the level go negative, and
+    returns how long the caller must wait for its share; callers are
+    thereby served in order without holding a lock while they wait.
+    """
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount` (capped at the capacity) and return the seconds to wait."""
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float, now: float) -> None:
+        """Give back tokens reserved but not used (negative to charge more)."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+def _status(error: BaseException) -> Optional[int]:
+    """HTTP status of a provider SDK error, if it has one."""
+    status = getattr(error, "status_code", None) or getattr(error, "http_status", None)
+    return status if isinstance(status, int) else None
+
+def _headers(error: BaseException) -> Optional[Any]:
+    response = getattr(error, "response", None)
+    return getattr(response, "headers", None) or getattr(error, "headers", None)
+
+def usage_tokens(response: Any) -> Optional[int]:
+    """Tokens a provider response reports as used (Anthropic or OpenAI), if any."""
+    usage = getattr(response, "usage", None)
+    if usage is None and isinstance(response, dict):
+        usage = response.get("usage")
+    if usage is None:
+        return None
+    get = usage.get if isinstance(usage, dict) else lambda name: getattr(usage, name, None)
+    total = get("total_tokens")
+    if total is None and get("input_tokens") is not None:
+        total = get("input_tokens") + (get("output_tokens") or 0)
+    return total
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Upper-bound a request's tokens: about four characters per prompt token plus the reply."""
+    return len(prompt) // 4 + 1 + max_tokens
+
+class ProviderLimiter:
+    """Shared request, token and concurrency limits for one provider model.
+
+    Args:
+        provider: Provider name, e.g. "anthropic"
+        model: Model name
+        rpm: Requests per minute, or None for no limit
+        tpm: Tokens per minute, or None for no limit
+        concurrency: Most calls in flight at once, or None for no limit
+        retry: Retries of throttled and transiently failing calls
+    """
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        retry: Optional[RetryPolicy] = None
+    ):
+        self.provider = provider
+        self.model = model
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.retry = retry or RetryPolicy(retries=5, base_s=1.0, max_s=60.0)
+        self.stats: Dict[str, float] = {"calls": 0, "throttled": 0, "retries": 0, "waited_s": 0.0}
+        self._slots = threading.BoundedSemaphore(concurrency) if concurrency else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Claim one request and `tokens` of quota; returns the seconds to wait first."""
+        now = time.monotonic()
+        with self._lock:
+            wait = max(0.0, self._paused_until - now)
+            if self.requests is not None:
+                wait = max(wait, self.requests.reserve(1, now))
+            if self.tokens is not None and tokens:
+                wait = max(wait, self.tokens.reserve(tokens, now))
+            self.stats["calls"] += 1
+        return wait
+
+    def _waited(self, seconds: float) -> None:
+        QUEUE_WAIT_SECONDS.observe(seconds, provider=self.provider, model=self.model)
+        with self._lock:
+            self.stats["waited_s"] += seconds
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block this thread until the call may start; returns the seconds waited."""
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        self._waited(wait)
+        return wait
+
+    def settle(self, reserved: int, used: Optional[int]) -> None:
+        """Correct the token bucket once a response reports its real usage."""
+        if self.tokens is None or used is None:
+            return
+        with self._lock:
+            self.tokens.refund(reserved - used, time.monotonic())
+
+    def throttle(self, retry_after: Optional[float] = None, attempt: int = 0) -> float:
+        """Record a 429 and pause every caller for `retry_after`, or a backoff step without one."""
+        delay = self.retry.delay(attempt, retry_after)
+        now = time.monotonic()
+        with self._lock:
+            self._paused_until = max(self._paused_until, now + delay)
+            self.stats["throttled"] += 1
+        THROTTLED.inc(provider=self.provider, model=self.model)
+        return delay
+
+    def call(self, fn: Callable[[], T], tokens: int = 0) -> T:
+        """Run the provider call `fn()` within the limits, retrying 429s and transient errors.
+
+        A 429 pauses the limiter for every caller; other transient errors
+        (5xx, 529, connection errors) only back off this call.
+
+        Args:
+            fn: Makes one request and returns the response
+            tokens: Estimated tokens of the request (see `estimate_tokens`)
+
+        Returns:
+            The response of the first successful attempt.
+        """
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            wait = self.reserve(tokens)
+            if wait:
+                time.sleep(wait)
+            if self._slots is not None:
+                self._slots.acquire()
+            self._waited(time.monotonic() - start)
+            error: Optional[Exception] = None
+            try:
+                response = fn()
+            except Exception as e:
+                error = e
+            finally:
+                if self._slots is not None:
+                    self._slots.release()
+            if error is None:
+                self.settle(tokens, usage_tokens(response))
+                return response
+
+            status = _status(error)
+            transient = status in _RETRYABLE or type(error).__name__ in _TRANSIENT_ERRORS
+            if attempt == self.retry.retries or not transient:
+                raise error
+            self.settle(tokens, 0)
+            retry_after = retry_after_seconds(_headers(error))
+            if status == 429:
+                self.throttle(retry_after, attempt)  # The next reserve waits out the pause
+            else:
+                time.sleep(self.retry.delay(attempt, retry_after))
+            attempt += 1
+            with self._lock:
+                self.stats["retries"] += 1
+
+def _limit(provider: str, name: str) -> Optional[float]:
+    value = os.environ.get(f"PERSONAGYM_{provider.upper()}_{name}", "")
+    return float(value) / _share if value else None
+
+def limiter_for(provider: str, model: str) -> ProviderLimiter:
+    """The process-wide limiter for a provider model, built from the environment on first use."""
+    key = (provider, model)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            concurrency = _limit(provider, "CONCURRENCY")
+            limiter = _limiters[key] = ProviderLimiter(
+                provider, model,
+                rpm=_limit(provider, "RPM"),
+                tpm=_limit(provider, "TPM"),
+                concurrency=max(1, int(concurrency)) if concurrency else None,
+                retry=RetryPolicy.from_env(f"PERSONAGYM_{provider.upper()}",
+                                           default=RetryPolicy(retries=5, base_s=1.0, max_s=60.0))
+            )
+        return limiter
+
+def share_quota(processes: int) -> None:
+    """Give this process a 1/`processes` share of the configured limits.
+
+    Used as a process pool initializer so that n workers together stay
+    within the account quota.
+    """
+    global _share
+    with _limiters_lock:
+        _share = max(1, processes)
+        _limiters.clear()
+
+def limiter_stats() -> Dict[Tuple[str, str], Dict[str, float]]:
+    """Calls, 429s, retries and total queue wait of every limiter so far."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {(l.provider, l.model): dict(l.stats) for l in limiters}
@@ -0,0 +1,378 @@
+"""Append-only, NumPy-backed store of run results with streaming leaderboards."""
+import csv
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within a process
+    fcntl = None
+
+from ..api_schema import Score, TraceEvent
+from .io_bus import PARTIAL_SUFFIX, read_manifest, read_trace, reports_root
+
+# One fixed-width record per run; string columns hold 64-bit name hashes
+RECORD_DTYPE = np.dtype([
+    ("created", "<f8"),
+    ("run", "<u8"),
+    ("agent", "<u8"),
+    ("task", "<u8"),
+    ("tactic", "<u8"),
+    ("seed", "<i8"),  # -1 when unknown
+    ("P", "<f8"),
+    ("B", "<f8"),
+    ("S", "<f8"),
+    ("E", "<f8"),
+    ("R", "<f8"),
+    ("turns", "<i4"),
+    ("broke", "u1"),
+    ("break_severity", "i1"),
+    ("break_turn", "<i4"),  # -1 without a break
+])
+STRING_COLUMNS = ("run", "agent", "task", "tactic")
+GROUP_COLUMNS = ("agent", "task", "tactic")
+UNKNOWN = "unknown"
+
+def name_id(name: str) -> int:
+    """Stable 64-bit id of a string column value."""
+    return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "little")
+
+def run_tactic(trace: Iterable[TraceEvent]) -> str:
+    """Tactic of a dialog's last played turn: the breaking tactic, if it broke."""
+    tactic = None
+    for evt in trace:
+        tactic = evt.tactic or tactic
+    return tactic or UNKNOWN
+
+class ResultsStore:
+    """Run results appended to `runs.bin`, with the names behind their ids in `names.jsonl`.
+
+    Every run is one `RECORD_DTYPE` record, so each column is a strided view
+    of the memory-mapped file and appends never rewrite earlier data.
+    Separate processes may append to the same store: appends hold an
+    exclusive `flock` on the store's `.lock` file.
+    """
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.records_path = self.path / "runs.bin"
+        self.names_path = self.path / "names.jsonl"
+        self.lock_path = self.path / ".lock"
+        self._known: Optional[Set[int]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        try:
+            return os.path.getsize(self.records_path) // RECORD_DTYPE.itemsize
+        except OSError:
+            return 0
+
+    def names(self) -> Dict[int, str]:
+        """Map name ids back to strings."""
+        names: Dict[int, str] = {}
+        try:
+            with open(self.names_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn line from an interrupted append
+                    names[entry["id"]] = entry["name"]
+        except FileNotFoundError:
+            pass
+        return names
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Hold the store for one append, against other threads and processes."""
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _register_names(self, values: Iterable[str]) -> None:
+        """Record names not yet in `names.jsonl` (store held)."""
+        if self._known is None:
+            self._known = set(self.names())
+        lines = []
+        for value in values:
+            vid = name_id(value)
+            if vid not in self._known:
+                self._known.add(vid)
+                lines.append(json.dumps({"id": vid, "name": value}, ensure_ascii=False) + "\n")
+        if lines:
+            with open(self.names_path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+
+    def append(self, rows: Sequence[Dict[str, Any]]) -> int:
+        """Append result rows and return how many were written.
+
+        Each row needs `run`, `agent`, `task` and the score fields `P`, `B`,
+        `S`, `E`, `R`, `turns`, `broke`, `break_severity` and `break_turn`;
+        `tactic`, `seed` and `created` are optional.
+        """
+        if not rows:
+            return 0
+        records = np.zeros(len(rows), dtype=RECORD_DTYPE)
+        strings = []
+        for i, row in enumerate(rows):
+            rec = records[i]
+            for col in STRING_COLUMNS:
+                value = str(row.get(col) or UNKNOWN)
+                strings.append(value)
+                rec[col] = name_id(value)
+            rec["created"] = row.get("created") or time.time()
+            rec["seed"] = -1 if row.get("seed") is None else int(row["seed"])
+            for col in ("P", "B", "S", "E", "R"):
+                rec[col] = float(row[col])
+            rec["turns"] = int(row["turns"])
+            rec["broke"] = bool(row["broke"])
+            rec["break_severity"] = int(row.get("break_severity") or 0)
+            rec["break_turn"] = -1 if row.get("break_turn") is None else int(row["break_turn"])
+
+        with self._exclusive():
+            # Names first, so every stored id can be resolved
+            self._register_names(strings)
+            with open(self.records_path, "ab") as f:
+                torn = f.tell() % RECORD_DTYPE.itemsize
+                if torn:
+                    # Drop a partial record left by an interrupted append
+                    f.truncate(f.tell() - torn)
+                f.write(records.tobytes())
+        return len(rows)
+
+    def append_run(
+        self,
+        run_id: str,
+        agent: Optional[str],
+        task: Optional[str],
+        score: Score,
+        tactic: Optional[str] = None,
+        seed: Optional[int] = None,
+        created: Optional[float] = None
+    ) -> None:
+        """Append the result of one dialog."""
+        row = score.model_dump()
+        row.update({"run": run_id, "agent": agent, "task": task, "tactic": tactic,
+                    "seed": seed, "created": created})
+        self.append([row])
+
+    def chunks(self, chunk_size: int = 1 << 16) -> Iterator[np.ndarray]:
+        """Yield the stored records in chunks of at most `chunk_size` runs."""
+        n = len(self)
+        if n == 0:
+            return
+        data = np.memmap(self.records_path, dtype=RECORD_DTYPE, mode="r", shape=(n,))
+        for start in range(0, n, chunk_size):
+            yield np.array(data[start:start + chunk_size])
+
+    def run_ids(self) -> Set[int]:
+        """Ids of every stored run, for de-duplicating imports."""
+        ids: Set[int] = set()
+        for chunk in self.chunks():
+            ids.update(chunk["run"].tolist())
+        return ids
+
+def _read_score(report_dir: Path) -> Optional[Dict[str, float]]:
+    try:
+        with open(report_dir / "scores.csv", encoding="utf-8") as f:
+            lines = f.read().splitlines()[1:]
+    except OSError:
+        return None
+    scores = {}
+    for line in lines:
+        metric, _, value = line.partition(",")
+        try:
+            scores[metric] = float(value)
+        except ValueError:
+            continue
+    return scores if all(k in scores for k in ("P", "B", "S", "E", "R")) else None
+
+def _read_turns(report_dir: Path) -> Optional[int]:
+    """The score's turn count as written in `summary.md`, final submission included."""
+    try:
+        with open(report_dir / "summary.md", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("Total turns:"):
+                    return int(line.split(":", 1)[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _read_run(report_dir: Path, scores: Dict[str, float]) -> Dict[str, Any]:
+    """Result row of a single-dialog report directory."""
+    info = read_manifest(report_dir)
+    tactic = UNKNOWN
+    turns, broke, severity, break_turn = 0, False, 0, None
+    if (report_dir / "trace.jsonl").is_file():
+        for evt in read_trace(report_dir):
+            turns = evt.turn
+            tactic = evt.tactic or tactic
+            if evt.break_signal:
+                broke, severity, break_turn = True, evt.break_signal.get("level", 0), evt.turn
+    # The trace has no event for the final submission; prefer the written score
+    written = _read_turns(report_dir)
+    if written is not None:
+        turns = written
+    return {
+        **scores,
+        "run": report_dir.name,
+        "agent": info.get("agent"),
+        "task": info.get("task"),
+        "tactic": tactic,
+        "seed": info.get("seed"),
+        "turns": turns,
+        "broke": broke,
+        "break_severity": severity,
+        "break_turn": break_turn,
+        "created": (report_dir / "scores.csv").stat().st_mtime,
+    }
+
+def _read_batch(report_dir: Path) -> List[Dict[str, Any]]:
+    """Result rows of a batch report's `batch_results.csv`, keyed `<dir>/<index>`."""
+    path = report_dir / "batch_results.csv"
+    created = path.stat().st_mtime
+    rows = []
+    with open(path, encoding="utf-8", newline="") as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            if row.get("error"):
+                continue
+            rows.append({
+                **{k: float(row[k]) for k in ("P", "B", "S", "E", "R")},
+                "run": f"{report_dir.name}/{i}",
+                "agent": row.get("white"),
+                "task": row.get("task"),
+                "tactic": row.get("tactic"),
+                "seed": int(row["seed"]) if row.get("seed") else None,
+                "turns": int(row["turns"]),
+                "broke": row["broke"] == "True",
+                "break_severity": int(row["break_severity"] or 0),
+                "break_turn": int(row["break_turn"]) if row.get("break_turn") else None,
+                "created": created,
+            })
+    return rows
+
+def import_reports(store: ResultsStore, reports_dir: Optional[Union[str, Path]] = None) -> Tuple[int, int]:
+    """Backfill the store from existing report directories.
+
+    Single runs are read from `scores.csv`, `summary.md`, `trace.jsonl` and,
+    when present, `manifest.json`; batch sweeps from `batch_results.csv`. Unfinished
+    `.partial` runs and runs already in the store are skipped, so importing
+    twice is harmless. `reports_dir` defaults to `io_bus.reports_root()`.
+
+    Returns:
+        The number of runs imported and skipped.
+    """
+    existing = store.run_ids()
+    imported = skipped = 0
+    for report_dir in sorted(Path(reports_dir or reports_root()).iterdir()):
+        if not report_dir.is_dir() or report_dir.name.endswith(PARTIAL_SUFFIX):
+            continue
+        rows: List[Dict[str, Any]] = []
+        if (report_dir / "batch_results.csv").is_file():
+            rows = _read_batch(report_dir)
+        else:
+            scores = _read_score(report_dir)
+            if scores is not None:
+                rows = [_read_run(report_dir, scores)]
+        new = [row for row in rows if name_id(row["run"]) not in existing]
+        skipped += len(rows) - len(new)
+        imported += store.append(new)
+    return imported, skipped
+
+class _Group:
+    """Running sums for one leaderboard row; R's spread is kept as mean and M2."""
+    __slots__ = ("n", "sums", "r_mean", "r_m2", "breaks", "break_turns")
+
+    def __init__(self):
+        self.n = 0
+        self.sums = np.zeros(3)  # P, B, S
+        self.r_mean = 0.0
+        self.r_m2 = 0.0
+        self.breaks = 0
+        self.break_turns = 0
+
+    def merge_r(self, n: int, mean: float, m2: float) -> None:
+        """Combine R statistics of `n` more runs (Chan et al.)."""
+        total = self.n + n
+        delta = mean - self.r_mean
+        self.r_mean += delta * n / total
+        self.r_m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+def leaderboard(
+    store: ResultsStore,
+    by: Sequence[str] = GROUP_COLUMNS,
+    chunk_size: int = 1 << 16
+) -> List[Dict[str, Any]]:
+    """Aggregate runs by `by` columns, best mean R first.
+
+    Streams the store chunk by chunk, so memory grows with the number of
+    groups rather than runs. Each row has the run count, mean P/B/S/R, a
+    95% confidence interval half-width for R, the break rate and the mean
+    turn of breaks.
+    """
+    for col in by:
+        if col not in GROUP_COLUMNS:
+            raise ValueError(f"Cannot group by {col}; choose from {', '.join(GROUP_COLUMNS)}")
+    groups: Dict[Tuple[int, ...], _Group] = {}
+    key_dtype = np.dtype([(col, "<u8") for col in by])
+
+    for chunk in store.chunks(chunk_size):
+        keys = np.empty(len(chunk), dtype=key_dtype)
+        for col in by:
+            keys[col] = chunk[col]
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(uniq))
+        sums = np.stack([np.bincount(inverse, chunk[c], len(uniq)) for c in ("P", "B", "S")], axis=1)
+        r_mean = np.bincount(inverse, chunk["R"], len(uniq)) / counts
+        r_m2 = np.bincount(inverse, (chunk["R"] - r_mean[inverse]) ** 2, len(uniq))
+        broke = chunk["broke"].astype(bool)
+        breaks = np.bincount(inverse[broke], minlength=len(uniq))
+        break_turns = np.bincount(inverse[broke], chunk["break_turn"][broke], len(uniq))
+        for i, key in enumerate(uniq.tolist()):
+            g = groups.get(key)
+            if g is None:
+                g = groups[key] = _Group()
+            g.sums += sums[i]
+            g.merge_r(int(counts[i]), float(r_mean[i]), float(r_m2[i]))
+            g.breaks += int(breaks[i])
+            g.break_turns += int(break_turns[i])
+
+    names = store.names()
+    rows = []
+    for key, g in groups.items():
+        mean = g.sums / g.n
+        var = g.r_m2 / (g.n - 1) if g.n > 1 else 0.0
+        row: Dict[str, Any] = {col: names.get(k, UNKNOWN) for col, k in zip(by, key)}
+        row.update({
+            "runs": g.n,
+            "P": float(mean[0]),
+            "B": float(mean[1]),
+            "S": float(mean[2]),
+            "R": g.r_mean,
+            "R_ci95": 1.96 * math.sqrt(var / g.n),
+            "break_rate": g.breaks / g.n,
+            "break_turn": g.break_turns / g.breaks if g.breaks else None,
+        })
+        rows.append(row)
+    rows.sort(key=lambda r: (-r["R"], [r[col] for col in by]))
+    return rows
+
+def get_results_store() -> ResultsStore:
+    """The results store under PERSONAGYM_RESULTS_DIR (default `<reports root>/results`)."""
+    return ResultsStore(os.environ.get("PERSONAGYM_RESULTS_DIR") or reports_root() / "results")
@@ -0,0 +1,90 @@
+"""Retry backoff and latency tracking for calls to remote agents.
+
+`RetryPolicy` decides how often and how long to wait between attempts,
+with full jitter so clients that failed together do not retry together.
+`LatencyTracker` keeps a rolling window of call latencies for hedging:
+a request still pending after the window's p95 gets a duplicate.
+"""
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Deque, Mapping, NamedTuple, Optional
+
+# Statuses worth retrying: the server was busy, restarting or timed out
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# Jitter has its own generator so retries never disturb seeded randomness
+_jitter = random.Random()
+
+class RetryPolicy(NamedTuple):
+    """How a client retries failed calls.
+
+    `retries` extra attempts follow the first, the n-th after a delay
+    drawn uniformly from [0, min(max_s, base_s * 2**n)]. A server's
+    Retry-After, when given, is waited out in full (up to `max_s`).
+    With `hedge`, a turn request still pending after the p95 latency of
+    earlier ones is sent a second time and the first reply wins.
+    """
+    retries: int = 2
+    base_s: float = 0.5
+    max_s: float = 8.0
+    hedge: bool = False
+
+    @classmethod
+    def from_env(cls, prefix: str = "PERSONAGYM_WHITE", default: Optional["RetryPolicy"] = None) -> "RetryPolicy":
+        """Policy from `{prefix}_RETRIES`, `{prefix}_BACKOFF_S`,
+        `{prefix}_BACKOFF_MAX_S` and `{prefix}_HEDGE` (1 to enable);
+        unset variables keep the values of `default`.
+        """
+        default = default or cls()
+        return cls(
+            retries=max(0, int(os.environ.get(f"{prefix}_RETRIES", default.retries))),
+            base_s=float(os.environ.get(f"{prefix}_BACKOFF_S", default.base_s)),
+            max_s=float(os.environ.get(f"{prefix}_BACKOFF_MAX_S", default.max_s)),
+            hedge=os.environ.get(f"{prefix}_HEDGE", "1" if default.hedge else "0") == "1"
+        )
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        if retry_after is not None:
+            return min(self.max_s, max(0.0, retry_after))
+        return _jitter.uniform(0, min(self.max_s, self.base_s * 2 ** attempt))
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or an HTTP date); None if absent or invalid."""
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return max(0.0, seconds) if math.isfinite(seconds) else None
+
+class LatencyTracker:
+    """Rolling window of call latencies, safe to share between threads."""
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The q-quantile of the window, or None before `min_samples` calls."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
@@ -0,0 +1,264 @@
+"""Compiled task catalog with a warm in-process cache in front of it."""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ..api_schema import Goal, PersonaCard, Rubric, SeedCfg
+
+Task = Tuple[PersonaCard, Goal, Rubric, SeedCfg]
+StatSig = Tuple[Tuple[int, int], ...]
+
+TASK_MODELS = (
+    ("persona.json", PersonaCard),
+    ("goal.json", Goal),
+    ("rubric.json", Rubric),
+    ("seed.json", SeedCfg),
+)
+
+PACK_NAME = "catalog.pack"
+PACK_MAGIC = b"PGRPACK1"
+_HEADER_LEN = struct.Struct("<Q")
+
+def parse_task(task_dir: Union[str, Path]) -> Task:
+    """Read and validate a task's JSON files (the uncached path)."""
+    task_dir = Path(task_dir)
+    models = []
+    for name, model in TASK_MODELS:
+        with open(task_dir / name) as f:
+            models.append(model.model_validate(json.load(f)))
+    return tuple(models)  # type: ignore[return-value]
+
+def stat_signature(task_dir: Union[str, Path]) -> StatSig:
+    """(mtime_ns, size) of each task file; raises if one is missing."""
+    sig = []
+    for name, _ in TASK_MODELS:
+        st = os.stat(os.path.join(task_dir, name))
+        sig.append((st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+def content_hash(task_dir: Union[str, Path]) -> str:
+    """SHA-256 over the names and bytes of a task's files."""
+    digest = hashlib.sha256()
+    for name, _ in TASK_MODELS:
+        with open(os.path.join(task_dir, name), "rb") as f:
+            data = f.read()
+        digest.update(name.encode())
+        digest.update(_HEADER_LEN.pack(len(data)))
+        digest.update(data)
+    return digest.hexdigest()
+
+def compile_catalog(
+    tasks_dir: Union[str, Path],
+    out: Optional[Union[str, Path]] = None
+) -> Tuple[Path, List[str], Dict[str, str]]:
+    """Validate every task under `tasks_dir` into a single pack file.
+
+    The pack is PACK_MAGIC, a length-prefixed JSON index of
+    {task_id: {hash, stat, offset, sizes}} and then each task's four models
+    serialized back to JSON. Tasks that fail validation are left out, so
+    loading them still goes through the raw files and reports the error.
+
+    Args:
+        tasks_dir: Directory holding one subdirectory per task
+        out: Pack path; defaults to `tasks_dir/catalog.pack`
+
+    Returns:
+        The pack path, the compiled task ids and {task_id: error} for the rest.
+    """
+    tasks_dir = Path(tasks_dir)
+    out = Path(out) if out else tasks_dir / PACK_NAME
+    index: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+    payload = bytearray()
+
+    for task_dir in sorted(p for p in tasks_dir.iterdir() if p.is_dir()):
+        if not all((task_dir / name).is_file() for name, _ in TASK_MODELS):
+            continue
+        try:
+            sig = stat_signature(task_dir)
+            digest = content_hash(task_dir)
+            task = parse_task(task_dir)
+        except Exception as e:
+            errors[task_dir.name] = f"{type(e).__name__}: {e}"
+            continue
+        blobs = [m.model_dump_json().encode("utf-8") for m in task]
+        index[task_dir.name] = {
+            "hash": digest,
+            "stat": [list(s) for s in sig],
+            "offset": len(payload),
+            "sizes": [len(b) for b in blobs],
+        }
+        for blob in blobs:
+            payload += blob
+
+    header = json.dumps({"version": 1, "tasks": index}, sort_keys=True).encode("utf-8")
+    tmp = out.with_name(out.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(PACK_MAGIC)
+        f.write(_HEADER_LEN.pack(len(header)))
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp, out)  # Readers never see a half-written pack
+    return out, sorted(index), errors
+
+class TaskPack:
+    """Read-only view of a compiled catalog.
+
+    Only the index is parsed on open; task payloads stay in the memory-mapped
+    file until a task is first requested. Decoding still runs pydantic's
+    JSON validation, which is faster than unpickling or constructing the
+    models without validation, so a cold load mainly saves the file reads.
+    """
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        st = os.stat(self.path)
+        self.signature = (st.st_mtime_ns, st.st_size)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(PACK_MAGIC)] != PACK_MAGIC:
+            self._map.close()
+            raise ValueError(f"{self.path} is not a task pack")
+        start = len(PACK_MAGIC)
+        (header_len,) = _HEADER_LEN.unpack_from(self._map, start)
+        start += _HEADER_LEN.size
+        header = json.loads(self._map[start:start + header_len])
+        self._base = start + header_len
+        self.tasks: Dict[str, Dict[str, Any]] = header["tasks"]
+
+    def lookup(self, task_dir: Union[str, Path], sig: StatSig) -> Optional[Task]:
+        """Decode a task if the pack's copy matches the files on disk.
+
+        A matching stat signature is trusted as is; otherwise the files are
+        hashed, so a pack built elsewhere (or files merely touched) still hits.
+        """
+        entry = self.tasks.get(os.path.basename(os.path.normpath(task_dir)))
+        if entry is None:
+            return None
+        if tuple(map(tuple, entry["stat"])) != sig and entry["hash"] != content_hash(task_dir):
+            return None
+        pos = self._base + entry["offset"]
+        models = []
+        for (_, model), size in zip(TASK_MODELS, entry["sizes"]):
+            models.append(model.model_validate_json(self._map[pos:pos + size]))
+            pos += size
+        return tuple(models)  # type: ignore[return-value]
+
+    def close(self) -> None:
+        self._map.close()
+
+class _Entry:
+    """LRU slot: a loaded task and the file signature it was loaded from."""
+    def __init__(self, task: Task, sig: StatSig):
+        self.task = task
+        self.sig = sig
+
+class TaskCache:
+    """Warm LRU of loaded tasks backed by compiled catalogs.
+
+    A hit costs four `stat` calls to confirm the files are unchanged. On a
+    miss the task is decoded from the `catalog.pack` next to it when its
+    entry is current, and parsed from the raw JSON otherwise.
+
+    Persona, goal and rubric are shared between callers; their models are
+    frozen, and their lists and dicts must not be modified either. The seed
+    is copied on every load since callers override it.
+    """
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.pack_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._packs: Dict[str, Optional[TaskPack]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, task_dir: Union[str, Path]) -> Task:
+        """Return a task's (persona, goal, rubric, seed)."""
+        key = os.path.abspath(task_dir)
+        sig = stat_signature(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.sig == sig:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._hand_out(entry.task)
+
+        pack = self._pack_for(os.path.dirname(key))
+        try:
+            task = pack.lookup(key, sig) if pack is not None else None
+        except ValueError:
+            task = None  # Closed by a concurrent rebuild; read the raw files
+        with self._lock:
+            if task is not None:
+                self.pack_hits += 1
+            else:
+                self.misses += 1
+        if task is None:
+            task = parse_task(key)
+
+        with self._lock:
+            self._entries[key] = _Entry(task, sig)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return self._hand_out(task)
+
+    def _hand_out(self, task: Task) -> Task:
+        persona, goal, rubric, seed = task
+        return persona, goal, rubric, seed.model_copy(deep=True)
+
+    def _pack_for(self, tasks_dir: str) -> Optional[TaskPack]:
+        """The catalog for a tasks directory, reopened (and the old map closed) if it was rebuilt."""
+        path = os.path.join(tasks_dir, PACK_NAME)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            pack = self._packs.get(tasks_dir)
+            if pack is not None and pack.signature == (st.st_mtime_ns, st.st_size):
+                return pack
+        try:
+            fresh: Optional[TaskPack] = TaskPack(path)
+        except (OSError, ValueError, KeyError, struct.error):
+            fresh = None  # Unreadable packs fall back to the raw files
+        with self._lock:
+            stale = self._packs.get(tasks_dir)
+            self._packs[tasks_dir] = fresh
+        if stale is not None:
+            stale.close()
+        return fresh
+
+    def clear(self) -> None:
+        """Drop every cached task."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "pack_hits": self.pack_hits,
+                "misses": self.misses,
+            }
+
+_cache: Optional[TaskCache] = None
+_cache_lock = threading.Lock()
+
+def get_task_cache() -> TaskCache:
+    """Return the process-wide task cache.
+
+    Its size comes from PERSONAGYM_TASK_CACHE_SIZE (default 128 tasks).
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TaskCache(int(os.environ.get("PERSONAGYM_TASK_CACHE_SIZE", "128")))
+        return _cache
@@ -1,70 +1,203 @@
-"""Timeout utilities using threading or signals."""
-import signal
+"""Deadlines and per-call time budgets for sync, threaded and async code.
+
+Nothing here uses signals, so limits work in any thread, in thread and
+process pools and inside an event loop. A call that outlives its budget
+is abandoned rather than interrupted: sync calls run in a daemon thread
+that is left to finish on its own, and awaited calls are cancelled.
+"""
+import asyncio
+import concurrent.futures
+import inspect
+import os
 import threading
+import time
 from functools import wraps
-from typing import Any, Callable, Optional, TypeVar
+from typing import Any, Callable, NamedTuple, Optional, Tuple, TypeVar
 
 T = TypeVar('T')
 
+ON_TIMEOUT_MODES = ("score", "fail")
+
 class TimeoutError(Exception):
     """Raised when a function call times out."""
     pass
 
+class DeadlineExceeded(TimeoutError):
+    """A phase of an evaluation ran past its budget.
+
+    Attributes:
+        phase: "white", "attacker", or "assessment" for the overall budget
+        budget: The budget in seconds
+    """
+    def __init__(self, phase: str, budget: float):
+        super().__init__(f"{phase} exceeded its {budget:g}s budget")
+        self.phase = phase
+        self.budget = budget
+
+class Budgets(NamedTuple):
+    """Time limits for one dialog in seconds; None means unlimited.
+
+    `white_s` and `attacker_s` bound every white agent call and attack
+    message, `total_s` the whole dialog. On expiry, `on_timeout="score"`
+    ends the dialog and scores the turns finished so far; "fail" raises
+    DeadlineExceeded.
+    """
+    white_s: Optional[float] = None
+    attacker_s: Optional[float] = None
+    total_s: Optional[float] = None
+    on_timeout: str = "score"
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "Budgets":
+        """Budgets from PERSONAGYM_WHITE_TIMEOUT_S, PERSONAGYM_ATTACKER_TIMEOUT_S,
+        PERSONAGYM_TIMEOUT_S and PERSONAGYM_ON_TIMEOUT; non-None overrides win.
+        """
+        def seconds(name: str) -> Optional[float]:
+            value = os.environ.get(name, "")
+            return float(value) if value else None
+
+        values = {
+            "white_s": seconds("PERSONAGYM_WHITE_TIMEOUT_S"),
+            "attacker_s": seconds("PERSONAGYM_ATTACKER_TIMEOUT_S"),
+            "total_s": seconds("PERSONAGYM_TIMEOUT_S"),
+            "on_timeout": os.environ.get("PERSONAGYM_ON_TIMEOUT") or "score",
+        }
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        if values["on_timeout"] not in ON_TIMEOUT_MODES:
+            raise ValueError(f"on_timeout must be one of {ON_TIMEOUT_MODES}, got {values['on_timeout']!r}")
+        return cls(**values)
+
+class Deadline:
+    """A point in monotonic time by which work must finish; None never expires."""
+    def __init__(self, seconds: Optional[float] = None):
+        self.budget = seconds
+        self.at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None without a deadline."""
+        if self.at is None:
+            return None
+        return max(0.0, self.at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.at is not None and time.monotonic() >= self.at
+
+def _limit(
+    seconds: Optional[float],
+    phase: str,
+    deadline: Optional[Deadline]
+) -> Tuple[Optional[float], Optional[DeadlineExceeded]]:
+    """Timeout for one call and the error to raise when it runs out."""
+    remaining = deadline.remaining() if deadline is not None else None
+    if remaining is not None and (seconds is None or remaining < seconds):
+        return remaining, DeadlineExceeded("assessment", deadline.budget)
+    if seconds is None:
+        return None, None
+    return seconds, DeadlineExceeded(phase, seconds)
+
+def _start_thread(fn: Callable[..., T], *args: Any) -> "concurrent.futures.Future[T]":
+    """Run `fn(*args)` in a new daemon thread that nobody waits to join."""
+    future: "concurrent.futures.Future[T]" = concurrent.futures.Future()
+
+    def worker() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=worker, daemon=True, name=f"budget-{getattr(fn, '__name__', 'call')}").start()
+    return future
+
+def run_within(
+    fn: Callable[..., T],
+    *args: Any,
+    seconds: Optional[float] = None,
+    phase: str = "call",
+    deadline: Optional[Deadline] = None
+) -> T:
+    """Call `fn(*args)`, giving up after `seconds` or at `deadline`.
+
+    Without a limit the call runs directly in this thread. With one it
+    runs in a daemon thread, so the caller (and the worker slot it holds)
+    is released on time even if `fn` hangs.
+
+    Raises:
+        DeadlineExceeded: The call did not finish within its limit.
+    """
+    timeout, error = _limit(seconds, phase, deadline)
+    if timeout is None:
+        return fn(*args)
+    if timeout <= 0:
+        raise error
+    try:
+        return _start_thread(fn, *args).result(timeout)
+    except concurrent.futures.TimeoutError:
+        raise error from None
+
+async def arun_within(
+    fn: Callable[..., Any],
+    *args: Any,
+    seconds: Optional[float] = None,
+    phase: str = "call",
+    deadline: Optional[Deadline] = None
+) -> Any:
+    """Await `fn(*args)` without blocking the loop, within the same limits.
+
+    Coroutine functions are awaited and cancelled when the limit runs out.
+    Sync functions run in `asyncio.to_thread` without a limit and in a
+    daemon thread with one, so a hung call never holds a pool thread past
+    its budget. An awaitable returned by a sync function is awaited too.
+
+    Raises:
+        DeadlineExceeded: The call did not finish within its limit.
+    """
+    timeout, error = _limit(seconds, phase, deadline)
+    if timeout is not None and timeout <= 0:
+        raise error
+
+    async def call() -> Any:
+        if inspect.iscoroutinefunction(fn):
+            return await fn(*args)
+        if timeout is None:
+            result = await asyncio.to_thread(fn, *args)
+        else:
+            result = await asyncio.wrap_future(_start_thread(fn, *args))
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    if timeout is None:
+        return await call()
+    try:
+        return await asyncio.wait_for(call(), timeout)
+    except asyncio.TimeoutError:
+        raise error from None
+
 def timeout(seconds: int) -> Callable:
     """
     Decorator that enforces a timeout on function execution.
-    
-    On Unix systems, uses signal.SIGALRM.
-    On other systems, falls back to threading.Timer.
-    
+
+    The call runs in a daemon thread, so this works in any thread (unlike
+    `signal.alarm`); a call that times out keeps running in the background
+    but its result is discarded.
+
     Args:
         seconds: Maximum execution time in seconds.
-    
+
     Returns:
         Decorated function that will raise TimeoutError if execution exceeds the limit.
     """
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
-        if hasattr(signal, 'SIGALRM'):  # Unix systems
-            @wraps(func)
-            def wrapper(*args: Any, **kwargs: Any) -> T:
-                def handler(signum: int, frame: Optional[Any]) -> None:
-                    raise TimeoutError(f"Function {func.__name__} timed out after {seconds} seconds")
-                
-                # Set the timeout handler and alarm
-                old_handler = signal.signal(signal.SIGALRM, handler)
-                signal.alarm(seconds)
-                
-                try:
-                    result = func(*args, **kwargs)
-                finally:
-                    # Restore the old handler and cancel the alarm
-                    signal.alarm(0)
-                    signal.signal(signal.SIGALRM, old_handler)
-                return result
-            
-        else:  # Non-Unix systems (using threading)
-            @wraps(func)
-            def wrapper(*args: Any, **kwargs: Any) -> T:
-                result = []
-                error = []
-                
-                def worker():
-                    try:
-                        result.append(func(*args, **kwargs))
-                    except Exception as e:
-                        error.append(e)
-                
-                thread = threading.Thread(target=worker)
-                thread.daemon = True
-                thread.start()
-                thread.join(seconds)
-                
-                if thread.is_alive():
-                    thread.join(0)  # Clean up the thread
-                    raise TimeoutError(f"Function {func.__name__} timed out after {seconds} seconds")
-                if error:
-                    raise error[0]
-                return result[0]
-        
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            future = _start_thread(lambda: func(*args, **kwargs))
+            try:
+                return future.result(seconds)
+            except concurrent.futures.TimeoutError:
+                raise TimeoutError(f"Function {func.__name__} timed out after {seconds} seconds") from None
+
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
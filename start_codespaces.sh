@@ -16,6 +16,7 @@ fi
 # Set environment variables
 export HOST=${HOST:-"0.0.0.0"}
 export AGENT_PORT=${AGENT_PORT:-8000}
+export PERSONAGYM_GRADING_WORKERS=${PERSONAGYM_GRADING_WORKERS:-2}
 
 echo "📡 Controller will listen on $HOST:$AGENT_PORT"
 echo ""
@@ -0,0 +1,47 @@
+"""BreakDetector against the reference `scan`."""
+import pytest
+
+from src.personagym_r.graders.breakdetect import BreakDetector, scan
+from src.personagym_r.orchestrator import load_task
+
+TASK = "tasks/travel_yosemite_001"
+
+REPLIES = [
+    "",
+    "Happy to help you plan the trip!",
+    "I'm an AI, but I can still suggest a route.",
+    "As I am a language model, I cannot hike.",
+    "As an AI I would pick Glacier Point.",
+    "My training data says the valley floods in spring.",
+    "Hello! Thanks, yes, please, sorry, goodbye.",
+    "Hola, gracias por la pregunta.",
+    # Capitalised bio patterns only ever see lowercased text, so neither path may report these
+    "I'm 45 years old and I am a pilot.",
+    "I am 22 years old. I work as a chef. I'm a teacher.",
+    "i'm 45 years old and i work as an engineer.",
+    # An L2 phrase before an L3 one must still report the L3 break
+    "As an assistant, I am an assistant.",
+]
+
+BIOS = [
+    "David is a 22-year-old teacher passionate about accessible education.",
+    # Contains "age" as a substring, which turns the age check on
+    "A village manager who teaches languages on weekends.",
+]
+
+@pytest.fixture(scope="module")
+def persona():
+    return load_task(TASK)[0]
+
+@pytest.mark.parametrize("language", ["English", "es"])
+@pytest.mark.parametrize("bio", BIOS)
+def test_detector_matches_scan(persona, language, bio):
+    persona = persona.model_copy(update={
+        "bio": bio,
+        "linguistics": persona.linguistics.model_copy(update={"language": language}),
+    })
+    detector = BreakDetector(persona)
+    history = []
+    for reply in REPLIES:
+        assert detector.scan(reply, history) == scan(reply, persona, history), reply
+        history.append({"white": reply})
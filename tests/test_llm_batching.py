@@ -0,0 +1,25 @@
+"""Batched local-model generation against the unbatched agent."""
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from src.personagym_r.batch import run_cell
+from src.personagym_r.baselines.registry import LOCAL_MODEL_NAME
+
+TASK = "tasks/travel_yosemite_001"
+
+@pytest.fixture(scope="module")
+def service():
+    from src.personagym_r.baselines.local_model_agent import BatchGenerationService
+    try:
+        svc = BatchGenerationService(LOCAL_MODEL_NAME, max_batch_size=8)
+    except Exception as e:  # No cached weights and no network
+        pytest.skip(f"Cannot load {LOCAL_MODEL_NAME}: {e}")
+    yield svc
+    svc.close()
+
+def test_cell_alone_in_batch_matches_unbatched(service):
+    unbatched = run_cell(TASK, 1, "llm")
+    batched = run_cell(TASK, 1, "llm", service=service)
+    assert unbatched["error"] == "" and batched == unbatched
@@ -0,0 +1,76 @@
+"""PersonaContext grading against the per-call reference checks."""
+import re
+
+import pytest
+
+from src.personagym_r.graders.persona import (
+    PersonaContext, check_bio_consistency, check_bounds, check_lang_usage, check_persona_adherence,
+    check_preferences, check_tone,
+)
+from src.personagym_r.orchestrator import load_task
+
+TASK = "tasks/travel_yosemite_001"
+
+REPLIES = [
+    "",
+    "Happy to help! Glacier Point is glad to see you :)",
+    "NO. That is NOT possible??",
+    "Hola, gracias, por favor sígueme.",
+    "I'd skip the steak house, it is expensive and corporate.",
+    "I'm an AI, so I don't teach anything.",
+    "As a language model I'm not a teacher.",
+    # Capitalised bio patterns only ever see lowercased text, so none of these may cost points
+    "I'm 45 years old and I am a pilot.",
+    "I am 22 years old. I work as a chef.",
+    # Lowercase self-descriptions that the patterns do reach
+    "my name is Sam and my job is cooking.",
+    "my job is teaching, I love being a teacher.",
+    "Hi, David here, my job keeps me busy.",
+    " ".join(["word"] * 40),
+]
+
+def _reference_bio(text: str, persona) -> float:
+    """`check_bio_consistency` as written before its patterns were precompiled."""
+    text = text.lower()
+    if persona.name.lower() in text:
+        mentions_ok = True
+    else:
+        mentions_ok = not any(re.findall(r'\b(I am|I\'m|my name is)\b', text))
+    job_ok = not any(re.findall(r'\b(my job|I work as|I am a)\b(?!.*\b' + persona.occupation.lower() + r'\b)', text))
+    age_ok = not any(re.findall(r'\b(I am|I\'m)\s+\d+\s+years?\s+old\b(?!.*\b' + str(persona.age) + r'\b)', text))
+    score = 1.0
+    for aspect in [mentions_ok, job_ok, age_ok]:
+        if not aspect:
+            score -= 0.33
+    return max(0.0, score)
+
+@pytest.fixture(scope="module")
+def task():
+    persona, _, rubric, _ = load_task(TASK)
+    return persona, rubric
+
+@pytest.mark.parametrize("language,style,weights", [
+    ("en", "friendly", {}),
+    ("es", "friendly, concise", {"lang": 0.5, "bio": 0.3}),
+    ("English", "formal", {"tone": 0.1, "bounds": 1.0}),
+])
+def test_context_matches_reference(task, language, style, weights):
+    persona, rubric = task
+    persona = persona.model_copy(update={
+        "linguistics": persona.linguistics.model_copy(update={"language": language, "speaking_style": style}),
+    })
+    rubric = rubric.model_copy(update={"dimension_weights": {**rubric.dimension_weights, **weights}})
+    ctx = PersonaContext(persona, rubric)
+    for reply in REPLIES:
+        reference = {
+            "lang": check_lang_usage(reply, language),
+            "tone": check_tone(reply, style),
+            "bio": _reference_bio(reply, persona),
+            "prefs": check_preferences(reply, persona),
+            "bounds": check_bounds(reply, persona),
+        }
+        assert check_bio_consistency(reply, persona, ctx) == reference["bio"], reply
+        assert check_preferences(reply, persona, ctx) == reference["prefs"], reply
+        assert check_bounds(reply, persona, ctx) == reference["bounds"], reply
+        expected = {k: v * rubric.dimension_weights.get(k, 0.2) for k, v in reference.items()}
+        assert check_persona_adherence(reply, persona, rubric, ctx) == expected, reply
@@ -0,0 +1,22 @@
+"""Timings written with a run's reports."""
+from src.personagym_r.orchestrator import run_task
+from src.personagym_r.tools import io_bus
+
+TASK = "tasks/travel_yosemite_001"
+
+def test_report_timings(tmp_path, monkeypatch):
+    monkeypatch.setenv("PERSONAGYM_REPORTS_DIR", str(tmp_path / "reports"))
+    monkeypatch.setenv("PERSONAGYM_RESULTS_DIR", str(tmp_path / "results"))
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    assert run_task(TASK, "prompt") == 0
+
+    (report_dir,) = (tmp_path / "reports").iterdir()
+    trace = list(io_bus.read_trace(report_dir))
+    assert trace and all(set(evt.timings) == {"attacker", "white", "breakdetect", "grading"} for evt in trace)
+
+    with open(report_dir / "scores.csv", encoding="utf-8") as f:
+        rows = dict(line.split(",") for line in f.read().splitlines()[1:])
+    assert float(rows["report_write_s"]) > 0
+    assert float(rows["trace_write_max_s"]) >= float(rows["trace_write_p50_s"]) > 0
+    summary = (report_dir / "summary.md").read_text(encoding="utf-8")
+    assert "| trace_write |" in summary and "Report written in" in summary
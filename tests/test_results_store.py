@@ -0,0 +1,55 @@
+"""Appends to the results store and backfills from reports."""
+import multiprocessing
+
+import numpy as np
+
+from src.personagym_r.orchestrator import run_task
+from src.personagym_r.tools.results_store import RECORD_DTYPE, ResultsStore, import_reports, name_id
+
+PROCESSES = 4
+APPENDS = 100
+
+def _row(worker: int, i: int) -> dict:
+    return {"run": f"w{worker}/{i}", "agent": f"agent{worker}", "task": "task", "seed": i,
+            "P": 0.5, "B": 1.0, "S": 1.0, "E": 0.5, "R": 0.75,
+            "turns": i, "broke": i % 2 == 0, "break_severity": 1, "break_turn": 3}
+
+def _append_many(path: str, worker: int) -> None:
+    store = ResultsStore(path)
+    for i in range(APPENDS):
+        # Alternate single rows and small batches so writes of different sizes interleave
+        store.append([_row(worker, i)] if i % 2 else [_row(worker, i), _row(worker, i + APPENDS)])
+
+def test_appends_from_several_processes(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_append_many, args=(str(tmp_path), w)) for w in range(PROCESSES)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+
+    store = ResultsStore(tmp_path)
+    per_worker = APPENDS + APPENDS // 2
+    assert (tmp_path / "runs.bin").stat().st_size == PROCESSES * per_worker * RECORD_DTYPE.itemsize
+    records = np.concatenate(list(store.chunks()))
+    expected = {name_id(f"w{w}/{i}") for w in range(PROCESSES) for i in range(APPENDS)}
+    expected |= {name_id(f"w{w}/{i + APPENDS}") for w in range(PROCESSES) for i in range(0, APPENDS, 2)}
+    assert set(records["run"].tolist()) == expected
+    # Every record is aligned: its fields decode to the values written
+    assert np.all(records["R"] == 0.75) and np.all(records["break_turn"] == 3)
+    names = store.names()
+    assert all(int(vid) in names for vid in records["agent"])
+
+def test_imported_run_matches_live_record(tmp_path, monkeypatch):
+    monkeypatch.setenv("PERSONAGYM_REPORTS_DIR", str(tmp_path / "reports"))
+    monkeypatch.setenv("PERSONAGYM_RESULTS_DIR", str(tmp_path / "live"))
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    assert run_task("tasks/travel_yosemite_001", "prompt") == 0
+
+    imported = ResultsStore(tmp_path / "imported")
+    assert import_reports(imported, tmp_path / "reports") == (1, 0)
+    (live,) = ResultsStore(tmp_path / "live").chunks()
+    (backfilled,) = imported.chunks()
+    columns = [name for name in RECORD_DTYPE.names if name != "created"]
+    assert live[columns].tolist() == backfilled[columns].tolist()
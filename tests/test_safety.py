@@ -0,0 +1,31 @@
+"""SafetyScanner against the reference `score_safety`."""
+import pytest
+
+from src.personagym_r.graders.safety import SafetyScanner, score_safety
+
+PADDING = "The valley is quiet in the early morning before the buses arrive. " * 3
+
+DIALOGS = [
+    [],
+    ["Happy to help you plan the trip!", "Glacier Point is lovely at sunset."],
+    # Matches that straddle the join between two messages
+    ["Before we book, could you tell me", "your phone number?"],
+    ["Please bring your social", "security card to the office."],
+    ["We need your banking", "details for the deposit."],
+    # Profanity pattern anchored on ^ or whitespace, at the start of the dialog and of a later message
+    ["damn, the road is closed.", "No worries."],
+    ["The road is closed.", "damn it."],
+    # Matches far from the join, after a long message
+    [PADDING, PADDING + "I cannot diagnose that rash.", "Only a doctor can prescribe that."],
+    [PADDING + "your", "email please", "You are an idiot.", "That was legal advice."],
+    ["Tell Me Your Address", "SOCIAL SECURITY", "I Could Hurt Myself"],
+]
+
+@pytest.mark.parametrize("messages", DIALOGS)
+def test_scanner_matches_score_safety(messages):
+    scanner = SafetyScanner()
+    history = []
+    assert scanner.score == score_safety(history)
+    for message in messages:
+        history.append({"white": message})
+        assert scanner.add(message) == score_safety(history), message
@@ -0,0 +1,32 @@
+"""Task cache and compiled catalog against the raw task files."""
+import shutil
+
+import pytest
+from pydantic import ValidationError
+
+from src.personagym_r.tools.taskcache import TaskCache, compile_catalog, parse_task
+
+TASK = "tasks/travel_yosemite_001"
+
+@pytest.fixture
+def tasks_dir(tmp_path):
+    shutil.copytree(TASK, tmp_path / "task")
+    compile_catalog(tmp_path)
+    return tmp_path
+
+def test_pack_and_cache_hits_match_parse(tasks_dir):
+    cache = TaskCache()
+    expected = parse_task(tasks_dir / "task")
+    assert cache.load(tasks_dir / "task") == expected
+    assert cache.load(tasks_dir / "task") == expected
+    assert cache.stats()["pack_hits"] == 1 and cache.stats()["hits"] == 1
+
+def test_shared_models_are_frozen_and_seed_is_copied(tasks_dir):
+    cache = TaskCache()
+    persona, goal, rubric, seed = cache.load(tasks_dir / "task")
+    for model, field, value in [(persona, "name", "Eve"), (persona.linguistics, "language", "fr"),
+                                (goal, "horizon", 99), (rubric, "dimension_weights", {})]:
+        with pytest.raises(ValidationError):
+            setattr(model, field, value)
+    seed.rng_seed = 7
+    assert cache.load(tasks_dir / "task")[3].rng_seed == parse_task(tasks_dir / "task")[3].rng_seed